@@ -0,0 +1,264 @@
+"""
+Offline voice pipeline benchmark: ShopAgent through a scripted shopping
+conversation, end to end, with no LiveKit room and no paid APIs.
+
+STT and LLM are the deterministic fakes in fake_pipeline.py (the LLM
+makes the same tool calls a real one would); TTS is the real Murf client
+against a Murf stub running in its own process. Each level runs N sessions
+concurrently in a fresh worker process and reports:
+
+    response    end of user speech -> agent's first audio
+    llm_ttft    LLM time to first token
+    tts_ttfb    Murf time to first audio
+    tool        tool call time; "round trip" is from the LLM step that asked
+                for tools to the step that got their results
+    loop lag    event loop lag, which is heard as audio stalls
+    memory      worker RSS growth per session
+
+The knee is the first level whose p95 response is --knee times the first
+level's, or that drops turns.
+
+Usage:
+    uv run python benchmarks/bench_pipeline.py [--sessions 1 2 4 8 16] [--llm-ttft 0.3]
+        [--murf-latency 0.15] [--murf-speed 4.0] [--knee 1.5] [--tts-cache]
+"""
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("MURF_API_KEY", "stub")
+
+import psutil
+from conversations import shopping_conversation
+from livekit.agents import AgentSession
+
+import agent
+import commerce
+import murf_tts
+from fake_pipeline import FakeSTT, PacedAudioOutput, ScriptedLLM, SilenceAudioInput
+from loop_monitor import LoopLagMonitor
+from murf_stub import MurfStub
+from order_store import JsonFileOrderStore
+from tracing import Histogram, Turn, TurnTracer
+from tts_cache import TTSCache
+
+# A reply that hasn't finished playing by then counts as a dropped turn
+TURN_TIMEOUT = 30.0
+# User's pause after the agent stops talking
+USER_PAUSE = 0.5
+# Sessions start spread over this many seconds, as calls come in
+STAGGER = 2.0
+
+
+class ToolRoundTrips:
+    """Exporter that measures what a tool step costs beyond the tools themselves."""
+
+    def __init__(self) -> None:
+        self.round_trip = Histogram()
+        self.overhead = Histogram()
+
+    def export(self, turn: Turn):
+        llm_spans = [s for s in turn.spans if s.name == "llm"]
+        for asked, answered in zip(llm_spans, llm_spans[1:]):
+            tools = [
+                s for s in turn.spans
+                if s.name.startswith("tool.") and s.start >= asked.end and s.end <= answered.start
+            ]
+            gap = answered.start - asked.end
+            self.round_trip.record(gap)
+            self.overhead.record(max(gap - sum(s.duration for s in tools), 0.0))
+
+    def close(self):
+        pass
+
+
+class RssSampler:
+    def __init__(self, interval: float = 0.2) -> None:
+        self._process = psutil.Process()
+        self.interval = interval
+        self.baseline = self.peak = self._process.memory_info().rss
+
+    async def run(self):
+        while True:
+            self.peak = max(self.peak, self._process.memory_info().rss)
+            await asyncio.sleep(self.interval)
+
+
+async def run_session(index: int, sessions: int, murf_url: str, shared: dict, llm_ttft: float) -> int:
+    """One customer's conversation. Returns the number of turns that completed."""
+    await asyncio.sleep(STAGGER * index / sessions)
+    lines, script = shopping_conversation()
+    stt = FakeSTT()
+    session = AgentSession(
+        stt=stt,
+        llm=ScriptedLLM(script, ttft=llm_ttft),
+        tts=agent.make_tts(
+            base_url=murf_url,
+            http_client=shared["http"],
+            cache=shared["cache"],
+            breaker=shared["breaker"],
+        ),
+        turn_detection="stt",
+        # The fake speaker can't pause
+        resume_false_interruption=False,
+    )
+    session.input.audio = SilenceAudioInput()
+    session.output.audio = PacedAudioOutput()
+    shared["tracer"].attach(session)
+
+    replied = asyncio.Event()
+
+    @session.on("agent_state_changed")
+    def _on_state(ev):
+        if ev.old_state == "speaking" and ev.new_state == "listening":
+            replied.set()
+
+    shop_agent = agent.ShopAgent(
+        session_id=f"bench-{index}", loop_monitor=shared["monitor"], tracer=shared["tracer"]
+    )
+    await session.start(agent=shop_agent, record=False)
+    completed = 0
+    try:
+        for line in lines:
+            replied.clear()
+            stt.say(line)
+            try:
+                await asyncio.wait_for(replied.wait(), TURN_TIMEOUT)
+            except asyncio.TimeoutError:
+                continue
+            completed += 1
+            await asyncio.sleep(USER_PAUSE)
+    finally:
+        await session.aclose()
+    return completed
+
+
+async def _run_level(sessions: int, murf_url: str, llm_ttft: float, tts_cache: bool) -> dict:
+    monitor = LoopLagMonitor()
+    monitor.start()
+    round_trips = ToolRoundTrips()
+    tracer = TurnTracer([round_trips], finalize_delay=0.5)
+    http = murf_tts.create_http_client()
+    shared = {
+        "monitor": monitor,
+        "tracer": tracer,
+        "http": http,
+        "cache": TTSCache() if tts_cache else None,
+        "breaker": murf_tts.create_breaker(),
+    }
+    rss = RssSampler()
+    sampler = asyncio.create_task(rss.run())
+    start = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory() as orders_dir:
+            commerce.order_store = JsonFileOrderStore(Path(orders_dir))
+            completed = await asyncio.gather(
+                *(run_session(i, sessions, murf_url, shared, llm_ttft) for i in range(sessions))
+            )
+    finally:
+        wall = time.perf_counter() - start
+        sampler.cancel()
+        await tracer.aclose()
+        await monitor.stop()
+        await http.aclose()
+
+    lines, _ = shopping_conversation()
+    loop = monitor.metrics()
+    loop.pop("watched")
+    return {
+        "sessions": sessions,
+        "turns": sum(completed),
+        "dropped": len(lines) * sessions - sum(completed),
+        "wall": wall,
+        "stages": tracer.metrics()["stages"],
+        "round_trip": round_trips.round_trip.summary(),
+        "tool_overhead": round_trips.overhead.summary(),
+        "loop": loop,
+        "rss_per_session_mb": (rss.peak - rss.baseline) / sessions / 2**20,
+    }
+
+
+def run_level(sessions: int, murf_url: str, llm_ttft: float, tts_cache: bool) -> dict:
+    return asyncio.run(_run_level(sessions, murf_url, llm_ttft, tts_cache))
+
+
+def serve_stub(latency: float, speed: float, urls: mp.Queue):
+    async def _serve():
+        stub = MurfStub(first_byte_latency=latency, synthesis_speed=speed)
+        urls.put(await stub.start())
+        await asyncio.Event().wait()
+
+    asyncio.run(_serve())
+
+
+def _ms(summary: dict, key: str) -> str:
+    return f"{summary[key]:.0f}" if summary.get("count") else "-"
+
+
+def print_report(results: list[dict], knee_factor: float):
+    header = (
+        f"{'sessions':>8} {'turns':>6} {'dropped':>7} "
+        f"{'resp p50':>9} {'p95':>6} {'p99':>6} {'llm ttft':>9} {'tts ttfb':>9} "
+        f"{'tool p95':>9} {'trip p95':>9} {'lag p99':>8} {'stalls':>7} {'MB/sess':>8}"
+    )
+    print(header)
+    for r in results:
+        response = r["stages"].get("response", {})
+        tools = [s for name, s in r["stages"].items() if name.startswith("tool.")]
+        tool_p95 = max((s["p95_ms"] for s in tools), default=0.0)
+        print(
+            f"{r['sessions']:>8} {r['turns']:>6} {r['dropped']:>7} "
+            f"{_ms(response, 'p50_ms'):>9} {_ms(response, 'p95_ms'):>6} {_ms(response, 'p99_ms'):>6} "
+            f"{_ms(r['stages'].get('llm_ttft', {}), 'p50_ms'):>9} "
+            f"{_ms(r['stages'].get('tts_ttfb', {}), 'p95_ms'):>9} "
+            f"{tool_p95:>9.1f} {_ms(r['round_trip'], 'p95_ms'):>9} "
+            f"{r['loop']['p99_ms']:>8.1f} {r['loop']['stalls']:>7} {r['rss_per_session_mb']:>8.1f}"
+        )
+
+    baseline = results[0]["stages"].get("response", {}).get("p95_ms")
+    for r in results[1:]:
+        p95 = r["stages"].get("response", {}).get("p95_ms")
+        if r["dropped"] or (baseline and p95 and p95 > knee_factor * baseline):
+            print(f"\nScaling knee: {r['sessions']} sessions (p95 response {p95} ms vs {baseline} ms)")
+            return
+    print(f"\nNo knee up to {results[-1]['sessions']} sessions")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--llm-ttft", type=float, default=0.3, help="scripted LLM time to first token, seconds")
+    parser.add_argument("--murf-latency", type=float, default=0.15, help="stub first-byte latency, seconds")
+    parser.add_argument("--murf-speed", type=float, default=4.0, help="stub audio seconds synthesized per second")
+    parser.add_argument("--knee", type=float, default=1.5, help="p95 response growth that marks the knee")
+    parser.add_argument("--tts-cache", action="store_true", help="share a TTS audio cache between sessions")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    urls = ctx.Queue()
+    stub = ctx.Process(target=serve_stub, args=(args.murf_latency, args.murf_speed, urls), daemon=True)
+    stub.start()
+    murf_url = urls.get(timeout=30)
+
+    results = []
+    try:
+        for sessions in args.sessions:
+            # A fresh worker per level, so memory and warm caches don't carry over
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                results.append(pool.submit(run_level, sessions, murf_url, args.llm_ttft, args.tts_cache).result())
+            print(f"{sessions} sessions done in {results[-1]['wall']:.1f}s", file=sys.stderr)
+    finally:
+        stub.terminate()
+    print_report(results, args.knee)
+
+
+if __name__ == "__main__":
+    main()
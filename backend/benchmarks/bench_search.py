@@ -0,0 +1,67 @@
+"""
+Compare catalog full-text search against the old linear substring scan.
+
+"substring" is list_products(search=...), a substring match like the
+linear scan but over the filtered candidates; "ranked top5" is
+search_products(), through the inverted index.
+
+Usage:
+    uv run python benchmarks/bench_search.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from synthetic import make_catalog, make_queries
+
+from catalog import CatalogIndex
+
+
+def linear_search(products: list[dict], search: str) -> list[dict]:
+    """The search branch list_products used before the inverted index."""
+    search_lower = search.lower()
+    return [
+        p for p in products
+        if search_lower in p["name"].lower() or search_lower in p.get("description", "").lower()
+    ]
+
+
+def _per_query_us(fn, queries: list[str]) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries)
+    print(f"{'products':>10} {'build ms':>10} {'linear us':>12} {'substring us':>13} {'ranked top5 us':>15} {'speedup':>8}")
+    for size in args.sizes:
+        products = make_catalog(size)
+
+        start = time.perf_counter()
+        index = CatalogIndex(products)
+        index.warm()
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        linear_us = _per_query_us(lambda q, products=products: linear_search(products, q), queries)
+        substring_us = _per_query_us(lambda q, index=index: index.query(search=q), queries)
+        top5_us = _per_query_us(lambda q, index=index: index.query(search=q, limit=5, ranked=True), queries)
+
+        print(
+            f"{size:>10} {build_ms:>10.1f} {linear_us:>12.1f} {substring_us:>13.1f} "
+            f"{top5_us:>15.1f} {linear_us / top5_us:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Worker cold start: what importing the agent costs, and how long a new job
+process takes to get from spawn to a session ready to start.
+
+"imports" runs `python -X importtime` on the agent module, with and
+without the LiveKit plugins, and prints the packages that take longest
+to import (self time, summed over their modules).
+
+"spawn" starts job-like processes the way the worker does on Linux (a
+forkserver that preloads the plugin packages) or fresh (spawn, as on
+macOS and Windows) and times each stage in the child: import, prewarm,
+building the AgentSession and the ShopAgent. It stops short of
+session.start(), which needs a LiveKit room; the turn detector is left
+out because it needs the worker's inference process.
+
+Usage:
+    uv run python benchmarks/bench_startup.py imports [--top 15]
+    uv run python benchmarks/bench_startup.py spawn [--runs 3] [--method forkserver|spawn]
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+SRC = BACKEND / "src"
+sys.path.insert(0, str(SRC))
+
+# Only checked for presence when the plugins are constructed
+DUMMY_KEYS = {"MURF_API_KEY": "stub", "DEEPGRAM_API_KEY": "stub", "GOOGLE_API_KEY": "stub"}
+# What the worker's forkserver preloads
+PRELOAD = [
+    "livekit.plugins.deepgram",
+    "livekit.plugins.google",
+    "livekit.plugins.noise_cancellation",
+    "livekit.plugins.silero",
+    "livekit.plugins.turn_detector",
+]
+STAGES = ("import", "prewarm", "session", "agent")
+
+
+def import_profile(code: str) -> dict[str, tuple[float, float]]:
+    """{package: (self seconds, cumulative seconds of its top module)} for importing in code"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND,
+        env={**os.environ, "PYTHONPATH": str(SRC)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    self_time: dict[str, float] = defaultdict(float)
+    cumulative: dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        module = name.strip()
+        # livekit.plugins.* are separate distributions; group them on their own
+        depth = 3 if module.startswith("livekit.plugins.") else 2 if module.startswith("livekit.") else 1
+        package = ".".join(module.split(".")[:depth])
+        self_time[package] += int(self_us) / 1e6
+        if module == package:
+            cumulative[package] = int(cumulative_us) / 1e6
+    return {package: (self_time[package], cumulative.get(package, 0.0)) for package in self_time}
+
+
+def run_imports(top: int):
+    cases = [
+        ("agent", "import agent"),
+        ("agent + plugins", "import agent; agent.import_plugins()"),
+    ]
+    for name, code in cases:
+        profile = import_profile(code)
+        total = sum(own for own, _ in profile.values())
+        print(f"\n{name}: {total * 1e3:.0f} ms")
+        print(f"{'package':>40} {'self ms':>9} {'cumulative ms':>14}")
+        ranked = sorted(profile.items(), key=lambda item: item[1][0], reverse=True)
+        for package, (own, cumulative) in ranked[:top]:
+            print(f"{package:>40} {own * 1e3:>9.0f} {cumulative * 1e3:>14.0f}")
+
+
+def _job(started: float, queue: mp.Queue):
+    """A job process up to session.start(): seconds spent in each stage"""
+    os.chdir(BACKEND)
+    os.environ.update(DUMMY_KEYS)
+    from types import SimpleNamespace
+
+    timings = {"spawn": time.time() - started}
+    start = time.perf_counter()
+    import agent
+
+    timings["import"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    proc = SimpleNamespace(userdata={})
+    agent.prewarm(proc)
+    timings["prewarm"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    agent.create_session(proc.userdata, turn_detection="vad")
+    timings["session"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    agent.ShopAgent()
+    timings["agent"] = time.perf_counter() - start
+    queue.put(timings)
+
+
+def run_spawn(runs: int, method: str):
+    ctx = mp.get_context(method)
+    if method == "forkserver":
+        ctx.set_forkserver_preload(PRELOAD)
+    results = []
+    for _ in range(runs):
+        queue = ctx.Queue()
+        started = time.time()
+        process = ctx.Process(target=_job, args=(started, queue))
+        process.start()
+        timings = queue.get(timeout=120)
+        timings["total"] = time.time() - started
+        process.join()
+        results.append(timings)
+
+    print(f"{method}, median of {runs} runs")
+    for stage in ("spawn", *STAGES, "total"):
+        print(f"{stage:>10} {statistics.median(r[stage] for r in results) * 1e3:>8.0f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    imports = commands.add_parser("imports", help="per-package import time")
+    imports.add_argument("--top", type=int, default=15)
+    spawn = commands.add_parser("spawn", help="job process spawn to session ready")
+    spawn.add_argument("--runs", type=int, default=3)
+    spawn.add_argument("--method", choices=("forkserver", "spawn"), default="forkserver")
+    args = parser.parse_args()
+    if args.command == "imports":
+        run_imports(args.top)
+    else:
+        run_spawn(args.runs, args.method)
+
+
+if __name__ == "__main__":
+    main()
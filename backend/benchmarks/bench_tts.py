@@ -0,0 +1,118 @@
+"""
+Time to first audio frame for Murf TTS, against a local Murf stub.
+
+Compares the whole-file path (streaming=False) with streaming synthesis,
+for a single sentence and for a multi-sentence reply. "stall" is the
+silence a listener would hear after playback starts, waiting for audio
+that has not arrived yet.
+
+Usage:
+    uv run python benchmarks/bench_tts.py [--runs 5] [--latency 0.4] [--speed 1.0] [--depth 3]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("MURF_API_KEY", "stub")
+
+import murf_tts
+from murf_stub import MurfStub
+
+SENTENCE = "Our RGB Gaming Mouse is 1499 rupees, with 16000 DPI and an ergonomic grip."
+REPLY = (
+    "Great choice! The Cyberpunk Hoodie is 1999 rupees. "
+    "It's super cozy with premium fleece and cool neon accents. "
+    "What size would work best for you, M, L, or XL?"
+)
+
+
+class Playback:
+    """Plays frames in real time as they arrive, recording first frame and stalls."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.first: float | None = None
+        self.stall = 0.0
+        self._playing_until = 0.0
+
+    def frame(self, duration: float):
+        now = time.perf_counter() - self.start
+        if self.first is None:
+            self.first = self._playing_until = now
+        elif now > self._playing_until:
+            self.stall += now - self._playing_until
+            self._playing_until = now
+        self._playing_until += duration
+
+    def result(self) -> tuple[float, float, float]:
+        """(seconds to first frame, seconds to last frame, seconds stalled)"""
+        return self.first or 0.0, time.perf_counter() - self.start, self.stall
+
+
+async def _time_stream(stream, playback: Playback | None = None) -> tuple[float, float, float]:
+    playback = playback or Playback()
+    async for ev in stream:
+        playback.frame(ev.frame.duration)
+    return playback.result()
+
+
+async def time_synthesize(tts: murf_tts.TTS, text: str) -> tuple[float, float, float]:
+    async with tts.synthesize(text) as stream:
+        return await _time_stream(stream)
+
+
+async def time_reply(tts: murf_tts.TTS, text: str) -> tuple[float, float, float]:
+    """A reply as the agent speaks it: through stream() if supported, else one sentence at a time."""
+    if tts.capabilities.streaming:
+        stream = tts.stream()
+        stream.push_text(text)
+        stream.end_input()
+        try:
+            return await _time_stream(stream)
+        finally:
+            await stream.aclose()
+
+    # What the StreamAdapter does: synthesize each sentence in turn
+    playback = Playback()
+    for sentence in tts._tokenizer.tokenize(text):
+        async with tts.synthesize(sentence) as stream:
+            await _time_stream(stream, playback)
+    return playback.result()
+
+
+async def run(runs: int, latency: float, speed: float, depth: int):
+    stub = MurfStub(first_byte_latency=latency, synthesis_speed=speed)
+    url = await stub.start()
+    cases = [("sentence", time_synthesize, SENTENCE), ("reply", time_reply, REPLY)]
+    print(f"{'case':>10} {'mode':>10} {'first frame ms':>15} {'last frame ms':>14} {'stall ms':>9}")
+    try:
+        for name, fn, text in cases:
+            for streaming in (False, True):
+                tts = murf_tts.TTS(base_url=url, streaming=streaming, pipeline_depth=depth)
+                timings = [await fn(tts, text) for _ in range(runs)]
+                first, last, stall = (statistics.median(t[i] for t in timings) * 1e3 for i in range(3))
+                mode = "streaming" if streaming else "whole"
+                print(f"{name:>10} {mode:>10} {first:>15.0f} {last:>14.0f} {stall:>9.0f}")
+                await tts.aclose()
+    finally:
+        await stub.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.4, help="stub first-byte latency, seconds")
+    parser.add_argument("--speed", type=float, default=1.0, help="stub audio seconds synthesized per second")
+    parser.add_argument("--depth", type=int, default=murf_tts.MURF_PIPELINE_DEPTH, help="sentences synthesized at once")
+    args = parser.parse_args()
+    asyncio.run(run(args.runs, args.latency, args.speed, args.depth))
+
+
+if __name__ == "__main__":
+    main()
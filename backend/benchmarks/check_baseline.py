@@ -0,0 +1,97 @@
+"""
+Regression gate for the commerce microbenchmarks.
+
+Compares the medians in a pytest-benchmark JSON report with the stored
+baseline (benchmarks/baseline.json) and exits non-zero if any benchmark
+got slower by more than the tolerance. Benchmarks missing from either
+side are listed but never fail the gate, so quick and full runs can share
+one baseline.
+
+The baseline is only meaningful on the machine that recorded it; after a
+hardware change, or an intended speed change, record a new one with
+--update.
+
+Usage:
+    uv run pytest benchmarks/ --benchmark-json=.benchmarks/latest.json
+    uv run python benchmarks/check_baseline.py .benchmarks/latest.json [--tolerance 0.25] [--update]
+"""
+
+import argparse
+import json
+import platform
+import sys
+from pathlib import Path
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+# Slowdown allowed before failing, as a fraction of the baseline median
+TOLERANCE = 0.25
+# Differences below this are timer noise, however large in relative terms
+MIN_DELTA = 2e-6
+
+
+def load_report(path: Path) -> dict[str, float]:
+    """{benchmark name: median seconds} from a pytest-benchmark JSON report"""
+    report = json.loads(path.read_text())
+    return {b["name"]: b["stats"]["median"] for b in report["benchmarks"]}
+
+
+def load_baseline(path: Path) -> dict[str, float]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())["benchmarks"]
+
+
+def save_baseline(path: Path, medians: dict[str, float]):
+    baseline = {
+        "machine": f"{platform.machine()} {platform.processor() or platform.system()}, "
+                   f"{platform.python_implementation()} {platform.python_version()}",
+        "benchmarks": dict(sorted(medians.items())),
+    }
+    path.write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+def compare(current: dict[str, float], baseline: dict[str, float], tolerance: float) -> list[str]:
+    """Print the comparison; return the names of benchmarks that regressed."""
+    regressions = []
+    print(f"{'benchmark':<48} {'baseline us':>12} {'current us':>11} {'change':>8}")
+    for name in sorted(current.keys() | baseline.keys()):
+        if name not in baseline:
+            print(f"{name:<48} {'-':>12} {current[name] * 1e6:>11.1f} {'new':>8}")
+            continue
+        if name not in current:
+            print(f"{name:<48} {baseline[name] * 1e6:>12.1f} {'-':>11} {'not run':>8}")
+            continue
+        change = current[name] / baseline[name] - 1
+        regressed = change > tolerance and current[name] - baseline[name] > MIN_DELTA
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<48} {baseline[name] * 1e6:>12.1f} {current[name] * 1e6:>11.1f} {change:>+8.0%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("report", type=Path, help="pytest-benchmark --benchmark-json output")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown, e.g. 0.25 for 25%%")
+    parser.add_argument("--update", action="store_true", help="record the report's medians as the baseline")
+    args = parser.parse_args()
+
+    current = load_report(args.report)
+    baseline = load_baseline(args.baseline)
+    if args.update:
+        # Keep entries this run didn't cover, e.g. full-scale ones after a quick run
+        save_baseline(args.baseline, {**baseline, **current})
+        print(f"Recorded {len(current)} benchmarks in {args.baseline}")
+        return
+
+    regressions = compare(current, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} benchmarks are more than {args.tolerance:.0%} slower than the baseline")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Fixtures for the commerce microbenchmarks (test_commerce_bench.py).
+
+--bench-scale picks the data sizes: "quick" for a run of a minute or two,
+"full" for catalogs up to 100k products and order histories up to 1M.
+Data is generated once per session and shared between benchmarks.
+"""
+
+import pytest
+from synthetic import make_catalog, make_order_summaries
+
+import commerce
+from carts import CartStore
+from catalog import CatalogIndex
+from catalog_store import MappedCatalog, compile_catalog
+from order_journal import OrderJournal
+from order_store import JsonFileOrderStore, SqliteOrderStore
+
+SCALES = {
+    "quick": {"catalog_size": [10_000], "cart_lines": [1, 50, 500], "history_size": [1_000, 100_000]},
+    "full": {
+        "catalog_size": [10_000, 100_000],
+        "cart_lines": [1, 50, 500],
+        "history_size": [1_000, 100_000, 1_000_000],
+    },
+}
+# Rows per SQLite transaction when loading a history
+SQLITE_BATCH = 10_000
+
+
+def pytest_addoption(parser):
+    parser.addoption("--bench-scale", choices=sorted(SCALES), default="quick", help="commerce benchmark data sizes")
+
+
+def pytest_generate_tests(metafunc):
+    sizes = SCALES[metafunc.config.getoption("--bench-scale")]
+    for name, values in sizes.items():
+        if name in metafunc.fixturenames:
+            metafunc.parametrize(name, values, ids=str, scope="session")
+
+
+@pytest.fixture(scope="session")
+def catalog_data(catalog_size, tmp_path_factory) -> tuple[list[dict], CatalogIndex]:
+    """Synthetic products and their index over the compiled, memory-mapped catalog."""
+    products = make_catalog(catalog_size)
+    compiled = tmp_path_factory.mktemp("catalog") / "catalog.bin"
+    compile_catalog(products, compiled)
+    return products, CatalogIndex(MappedCatalog(compiled)).warm()
+
+
+@pytest.fixture
+def catalog(catalog_data, monkeypatch) -> list[dict]:
+    """Installs the synthetic catalog and an empty cart store in commerce. Returns the products."""
+    products, index = catalog_data
+    monkeypatch.setattr(commerce, "PRODUCTS", index.products)
+    monkeypatch.setattr(commerce, "_catalog", index)
+    monkeypatch.setattr(commerce, "cart_store", CartStore())
+    return products
+
+
+def _json_history(path, summaries: list[dict]) -> JsonFileOrderStore:
+    store = JsonFileOrderStore(path)
+    # Written in one go rather than through append(), which fsyncs in batches
+    store.journal.path.write_bytes(b"".join(OrderJournal._encode(s) for s in summaries))
+    store.journal.checkpoint()
+    return store
+
+
+def _sqlite_history(path, summaries: list[dict]) -> SqliteOrderStore:
+    store = SqliteOrderStore(path / "orders.db")
+    orders = (
+        {"id": s["order_id"], "buyer": {"name": s["buyer"]}, "total": s["total"],
+         "currency": s["currency"], "created_at": s["created_at"], "line_items": []}
+        for s in summaries
+    )
+    batch = []
+    for order in orders:
+        batch.append(order)
+        if len(batch) == SQLITE_BATCH:
+            store.save_many(batch)
+            batch = []
+    store.save_many(batch)
+    return store
+
+
+@pytest.fixture(scope="session")
+def histories(tmp_path_factory):
+    """(store kind, entries) -> order store holding that many orders, built on first use."""
+    built = {}
+
+    def get(kind: str, size: int):
+        if (kind, size) not in built:
+            path = tmp_path_factory.mktemp(f"{kind}-{size}")
+            build = _json_history if kind == "json" else _sqlite_history
+            built[kind, size] = build(path, make_order_summaries(size))
+        return built[kind, size]
+
+    yield get
+    for store in built.values():
+        if isinstance(store, SqliteOrderStore):
+            store.close()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def order_store(request, tmp_path, monkeypatch):
+    """An empty order store of each kind, installed in commerce."""
+    store = JsonFileOrderStore(tmp_path) if request.param == "json" else SqliteOrderStore(tmp_path / "orders.db")
+    monkeypatch.setattr(commerce, "order_store", store)
+    yield store
+    if isinstance(store, SqliteOrderStore):
+        store.close()
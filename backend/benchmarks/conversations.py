@@ -0,0 +1,57 @@
+"""
+Scripted shopping conversations for the pipeline benchmarks.
+Each is a list of user lines with a ScriptedLLM script that answers them
+with the tool calls the real LLM makes for such a line.
+"""
+
+import commerce
+from fake_pipeline import ScriptedTurn
+
+
+def shopping_conversation() -> tuple[list[str], dict[str, ScriptedTurn]]:
+    """Browse, ask about a product, add two items, review the cart and check out."""
+    hoodie = commerce.list_products(category="hoodie")[0]
+    mug = commerce.list_products(category="mug")[0]
+    size = hoodie["size"][0]
+    turns = [
+        (
+            "Hi, what hoodies do you have?",
+            [("get_products", {"category": "hoodie", "search": None})],
+            f"We have the {hoodie['name']} for ₹{hoodie['price']}. Want to hear more about it?",
+        ),
+        (
+            f"Tell me about the {hoodie['name']}",
+            [("get_product_details", {"product_id": hoodie["id"]})],
+            f"The {hoodie['name']} is ₹{hoodie['price']}. It comes in {', '.join(hoodie['size'])}. "
+            "What size would you like?",
+        ),
+        (
+            f"Add it in size {size}",
+            [("add_to_cart", {"product_id": hoodie["id"], "quantity": 1, "size": size})],
+            f"I've added the {hoodie['name']} to your cart for ₹{hoodie['price']}.",
+        ),
+        (
+            "Do you have a coffee mug?",
+            [("find_product", {"query": "coffee mug"})],
+            f"Our {mug['name']} is ₹{mug['price']}. Shall I add it?",
+        ),
+        (
+            "Yes, add the mug too",
+            [("add_to_cart", {"product_id": mug["id"], "quantity": 1, "size": None})],
+            f"I've added the {mug['name']} to your cart for ₹{mug['price']}.",
+        ),
+        (
+            "What's in my cart?",
+            [("view_cart", {})],
+            f"You have the {hoodie['name']} and the {mug['name']}, "
+            f"₹{hoodie['price'] + mug['price']} in total.",
+        ),
+        (
+            "Check out please",
+            [("checkout", {})],
+            "Your order is confirmed. Thank you for shopping with us!",
+        ),
+    ]
+    lines = [line for line, _, _ in turns]
+    script = {line: ScriptedTurn(tool_calls, reply) for line, tool_calls, reply in turns}
+    return lines, script
@@ -0,0 +1,389 @@
+"""
+Load generator: how many shop sessions one agent worker process holds
+before audio degrades.
+
+Ramps up simulated rooms in a single worker process, --step at a time.
+Each room runs ShopAgent through the scripted shopping conversation on
+repeat, with the real Silero VAD listening to a silent microphone, the
+fake STT and LLM from fake_pipeline.py, and the Murf client against a
+Murf stub in another process. After each step's warm-up it measures, for
+--step-duration seconds:
+
+    cpu         worker process CPU, in cores
+    rss         worker process resident memory
+    lag         event loop lag p99
+    in late     microphone frames handed to VAD/STT late, p99
+    underruns   gaps in the agent's speech where the speaker ran dry,
+                per session-minute, and the longest gap
+    response    end of user speech -> agent's first audio
+
+    admission   the load admission.py would report to LiveKit, at its
+                highest, and the resource behind it
+
+A step is degraded when it drops turns, delivers microphone frames more
+than a frame late (p99), underruns more than UNDERRUN_LIMIT times per
+session-minute, or its p95 response grows past --knee times the first
+step's. The ramp stops there. The report gives the per-session CPU and
+memory cost for sizing WorkerOptions and admission.py
+(WORKER_MAX_SESSIONS, job_memory_warn_mb), and checks that admission
+would have turned rooms away before the degraded step.
+
+All sessions share one process, as with JobExecutorType.THREAD. With the
+default executor every job gets a process of its own, so the per-session
+cost plus the idle process's memory is what each job adds to a machine.
+Not measured: noise cancellation, which needs a LiveKit room, and the
+turn detector, which runs in the worker's shared inference process.
+
+Usage:
+    uv run python benchmarks/loadgen.py [--max-sessions 32] [--step 4] [--step-duration 20]
+        [--warmup 5] [--knee 1.5] [--no-vad] [--json capacity.json]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("MURF_API_KEY", "stub")
+
+import psutil
+from bench_pipeline import serve_stub
+from conversations import shopping_conversation
+from livekit.agents import AgentSession
+from livekit.agents.utils.hw import get_cpu_monitor
+
+import agent
+import commerce
+import murf_tts
+from admission import LOAD_THRESHOLD, AdmissionController, LoadReporter
+from fake_pipeline import (
+    INPUT_FRAME_MS,
+    FakeSTT,
+    PacedAudioOutput,
+    ScriptedLLM,
+    SilenceAudioInput,
+)
+from loop_monitor import LoopLagMonitor
+from order_store import JsonFileOrderStore
+from tracing import Histogram, Turn, TurnTracer
+
+# A reply that hasn't finished playing by then counts as a dropped turn
+TURN_TIMEOUT = 10.0
+# User's pause after the agent stops talking
+USER_PAUSE = 0.5
+# New rooms of a step join over this many seconds
+STAGGER = 2.0
+# Speaker underruns per session-minute that count as degraded audio
+UNDERRUN_LIMIT = 1.0
+# How often admission's load is sampled, as LiveKit does
+LOAD_INTERVAL = 0.5
+
+
+class Window:
+    """What the rooms record during one measurement window."""
+
+    def __init__(self) -> None:
+        self.input_late = Histogram()
+        self.output_gaps = Histogram()
+        self.response = Histogram()
+        self.turns = 0
+        self.dropped = 0
+
+    def reset(self):
+        # In place: the rooms' audio fakes hold on to the histograms
+        self.input_late.reset()
+        self.output_gaps.reset()
+        self.response.reset()
+        self.turns = 0
+        self.dropped = 0
+
+    def export(self, turn: Turn):
+        for response in turn.latencies().get("response", []):
+            self.response.record(response)
+
+    def close(self):
+        pass
+
+
+async def run_room(index: int, shared: dict, stop: asyncio.Event):
+    """One simulated room: the shopping conversation, over and over, until stop is set."""
+    lines, script = shopping_conversation()
+    window: Window = shared["window"]
+    stt = FakeSTT()
+    tts = agent.make_tts(base_url=shared["murf_url"], http_client=shared["http"], breaker=shared["breaker"])
+    session = AgentSession(
+        stt=stt,
+        llm=ScriptedLLM(script, ttft=shared["llm_ttft"]),
+        tts=tts,
+        vad=shared["vad"],
+        turn_detection="stt",
+        # The fake speaker can't pause
+        resume_false_interruption=False,
+    )
+    session.input.audio = SilenceAudioInput(lateness=window.input_late)
+    session.output.audio = PacedAudioOutput(gaps=window.output_gaps)
+    shared["tracer"].attach(session)
+
+    replied = asyncio.Event()
+
+    @session.on("agent_state_changed")
+    def _on_state(ev):
+        if ev.old_state == "speaking" and ev.new_state == "listening":
+            replied.set()
+
+    shop_agent = agent.ShopAgent(session_id=f"load-{index}", tracer=shared["tracer"])
+    await session.start(agent=shop_agent, record=False)
+    reporter = LoadReporter(f"load-{index}", tts_in_flight=lambda: tts.in_flight, directory=shared["load_dir"])
+    reporter.start()
+    try:
+        while not stop.is_set():
+            for line in lines:
+                if stop.is_set():
+                    break
+                replied.clear()
+                stt.say(line)
+                try:
+                    await asyncio.wait_for(replied.wait(), TURN_TIMEOUT)
+                except asyncio.TimeoutError:
+                    window.dropped += 1
+                    continue
+                window.turns += 1
+                await asyncio.sleep(USER_PAUSE)
+    finally:
+        await reporter.aclose()
+        await session.aclose()
+
+
+async def measure(sessions: int, duration: float, window: Window, admission: AdmissionController) -> dict:
+    process = psutil.Process()
+    monitor = LoopLagMonitor()
+    monitor.start()
+    window.reset()
+    cpu = process.cpu_times()
+    rss = process.memory_info().rss
+    load, limit = 0.0, None
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        await asyncio.sleep(LOAD_INTERVAL)
+        rss = max(rss, process.memory_info().rss)
+        sample = await asyncio.to_thread(admission.load)
+        if sample >= load:
+            load, limit = sample, max(admission.loads, key=admission.loads.get)
+    wall = time.perf_counter() - start
+    await monitor.stop()
+    used = process.cpu_times()
+    lag = monitor.metrics()
+    return {
+        "sessions": sessions,
+        "cpu_cores": (used.user + used.system - cpu.user - cpu.system) / wall,
+        "rss_mb": rss / 2**20,
+        "lag_p99_ms": lag["p99_ms"],
+        "stalls": lag["stalls"],
+        "input_late": window.input_late.summary(),
+        "underruns_per_minute": window.output_gaps.count / sessions / (wall / 60),
+        "output_gaps": window.output_gaps.summary(),
+        "response": window.response.summary(),
+        "turns": window.turns,
+        "dropped": window.dropped,
+        "admission_load": load,
+        "admission_limit": limit,
+    }
+
+
+def degraded(step: dict, first: dict, knee: float) -> Optional[str]:
+    """Why a step's audio or latency is degraded, or None."""
+    if step["dropped"]:
+        return f"{step['dropped']} dropped turns"
+    if step["input_late"]["p99_ms"] > INPUT_FRAME_MS:
+        return f"microphone frames {step['input_late']['p99_ms']:.0f} ms late (p99)"
+    if step["underruns_per_minute"] > UNDERRUN_LIMIT:
+        return f"{step['underruns_per_minute']:.1f} speaker underruns per session-minute"
+    baseline = first["response"]["p95_ms"]
+    if first["response"]["count"] and step["response"]["p95_ms"] > knee * baseline:
+        return f"p95 response {step['response']['p95_ms']:.0f} ms vs {baseline:.0f} ms"
+    return None
+
+
+async def _ramp(args: argparse.Namespace, murf_url: str) -> dict:
+    vad = None
+    if args.vad:
+        from livekit.plugins import silero
+
+        vad = silero.VAD.load()
+    window = Window()
+    tracer = TurnTracer([window], finalize_delay=0.5)
+    http = murf_tts.create_http_client()
+    shared = {
+        "murf_url": murf_url,
+        "llm_ttft": args.llm_ttft,
+        "vad": vad,
+        "window": window,
+        "tracer": tracer,
+        "http": http,
+        "breaker": murf_tts.create_breaker(),
+    }
+    idle_rss = psutil.Process().memory_info().rss / 2**20
+    load_dir = tempfile.TemporaryDirectory()
+    shared["load_dir"] = Path(load_dir.name)
+    admission = AdmissionController(directory=shared["load_dir"])
+    stop = asyncio.Event()
+    rooms: list[asyncio.Task] = []
+    steps = []
+    try:
+        with tempfile.TemporaryDirectory() as orders_dir:
+            commerce.order_store = JsonFileOrderStore(Path(orders_dir))
+            for target in range(args.step, args.max_sessions + 1, args.step):
+                while len(rooms) < target:
+                    rooms.append(asyncio.create_task(run_room(len(rooms), shared, stop)))
+                    await asyncio.sleep(STAGGER / args.step)
+                await asyncio.sleep(args.warmup)
+                step = await measure(target, args.step_duration, window, admission)
+                step["degraded"] = degraded(step, steps[0] if steps else step, args.knee)
+                steps.append(step)
+                print(
+                    f"{target} sessions: {step['cpu_cores']:.2f} cores, {step['rss_mb']:.0f} MB, "
+                    f"admission load {step['admission_load']:.2f}"
+                    + (f", degraded: {step['degraded']}" if step["degraded"] else ""),
+                    file=sys.stderr,
+                )
+                if step["degraded"]:
+                    break
+            stop.set()
+            await asyncio.gather(*rooms, return_exceptions=True)
+    finally:
+        for room in rooms:
+            room.cancel()
+        await tracer.aclose()
+        await http.aclose()
+        load_dir.cleanup()
+    return {"idle_rss_mb": idle_rss, "vad": args.vad, "steps": steps}
+
+
+def ramp(args: argparse.Namespace, murf_url: str) -> dict:
+    return asyncio.run(_ramp(args, murf_url))
+
+
+def _slope(steps: list[dict], key: str) -> float:
+    """Least-squares cost per session of key across steps"""
+    if len(steps) < 2:
+        return steps[0][key] / steps[0]["sessions"] if steps else 0.0
+    xs = [s["sessions"] for s in steps]
+    ys = [s[key] for s in steps]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+
+
+def capacity(result: dict) -> dict:
+    """Per-session cost and how many sessions fit, in one process and on this machine."""
+    healthy = [s for s in result["steps"] if not s["degraded"]]
+    if not healthy:
+        return {"process_sessions": 0}
+    cpu = max(_slope(healthy, "cpu_cores"), 1e-6)
+    rss = max(_slope(healthy, "rss_mb"), 0.0)
+    cores = get_cpu_monitor().cpu_count()
+    memory_mb = psutil.virtual_memory().total / 2**20
+    # A process per job: each job costs a session plus an idle process's memory
+    by_cpu = int(cores / cpu)
+    by_memory = int(memory_mb / (result["idle_rss_mb"] + rss))
+    machine_sessions = min(by_cpu, by_memory)
+    full = [s for s in result["steps"] if s["admission_load"] >= LOAD_THRESHOLD]
+    return {
+        "process_sessions": healthy[-1]["sessions"],
+        "admission_full_at": full[0]["sessions"] if full else None,
+        "cpu_per_session": cpu,
+        "rss_mb_per_session": rss,
+        "job_rss_mb": result["idle_rss_mb"] + rss,
+        "cores": cores,
+        "memory_mb": memory_mb,
+        "machine_sessions": machine_sessions,
+        "machine_limit": "cpu" if by_cpu <= by_memory else "memory",
+    }
+
+
+def print_report(result: dict):
+    print(
+        f"{'sessions':>8} {'cpu':>6} {'rss MB':>7} {'lag p99':>8} {'in late':>8} "
+        f"{'underrun/min':>12} {'gap max':>8} {'resp p50':>9} {'p95':>6} {'turns':>6} {'dropped':>7} {'admission':>14}"
+    )
+    for s in result["steps"]:
+        print(
+            f"{s['sessions']:>8} {s['cpu_cores']:>6.2f} {s['rss_mb']:>7.0f} {s['lag_p99_ms']:>8.1f} "
+            f"{s['input_late']['p99_ms']:>8.1f} {s['underruns_per_minute']:>12.2f} {s['output_gaps']['max_ms']:>8.0f} "
+            f"{s['response']['p50_ms']:>9.0f} {s['response']['p95_ms']:>6.0f} {s['turns']:>6} {s['dropped']:>7} "
+            f"{s['admission_load']:>5.2f} {s['admission_limit'] or '-':>8}"
+        )
+
+    cap = result["capacity"]
+    last = result["steps"][-1] if result["steps"] else None
+    print()
+    if not cap["process_sessions"]:
+        print(f"Degraded from the first step: {last['degraded'] if last else 'no steps run'}")
+        return
+    if last["degraded"]:
+        print(f"One process holds {cap['process_sessions']} sessions; degraded at {last['sessions']}: {last['degraded']}")
+    else:
+        print(f"One process holds at least {cap['process_sessions']} sessions (ramp ended before degrading)")
+    print(
+        f"Per session: {cap['cpu_per_session'] * 100:.1f}% of a core, {cap['rss_mb_per_session']:.1f} MB; "
+        f"idle process {result['idle_rss_mb']:.0f} MB"
+        + ("" if result["vad"] else " (without VAD)")
+    )
+    print(
+        f"This machine ({cap['cores']:g} cores, {cap['memory_mb'] / 1024:.1f} GB), a process per job, fully used: "
+        f"about {cap['machine_sessions']} sessions, limited by {cap['machine_limit']}"
+    )
+    print(
+        f"Sizing: WORKER_MAX_SESSIONS={cap['machine_sessions']} (load_threshold {LOAD_THRESHOLD} takes up to "
+        f"{int(cap['machine_sessions'] * LOAD_THRESHOLD)}); job_memory_warn_mb above {cap['job_rss_mb']:.0f}"
+    )
+    full_at = cap["admission_full_at"]
+    if full_at is None:
+        print(f"Admission never reached load_threshold {LOAD_THRESHOLD}")
+    elif last["degraded"] and full_at >= last["sessions"]:
+        print(f"Admission reached load_threshold {LOAD_THRESHOLD} only at {full_at} sessions, once audio had degraded")
+    else:
+        print(f"Admission reached load_threshold {LOAD_THRESHOLD} at {full_at} sessions, before audio degraded")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-sessions", type=int, default=32)
+    parser.add_argument("--step", type=int, default=4, help="sessions added per step")
+    parser.add_argument("--step-duration", type=float, default=20.0, help="seconds measured per step")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds before measuring a step")
+    parser.add_argument("--knee", type=float, default=1.5, help="p95 response growth that counts as degraded")
+    parser.add_argument("--llm-ttft", type=float, default=0.3, help="scripted LLM time to first token, seconds")
+    parser.add_argument("--murf-latency", type=float, default=0.15, help="stub first-byte latency, seconds")
+    parser.add_argument("--murf-speed", type=float, default=4.0, help="stub audio seconds synthesized per second")
+    parser.add_argument("--no-vad", dest="vad", action="store_false", help="leave out the Silero VAD")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    urls = ctx.Queue()
+    stub = ctx.Process(target=serve_stub, args=(args.murf_latency, args.murf_speed, urls), daemon=True)
+    stub.start()
+    murf_url = urls.get(timeout=30)
+    try:
+        # The worker gets a fresh process, so its memory is the sessions' alone
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            result = pool.submit(ramp, args, murf_url).result()
+    finally:
+        stub.terminate()
+    result["capacity"] = capacity(result)
+    print_report(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
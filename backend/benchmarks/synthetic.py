@@ -0,0 +1,96 @@
+"""
+Synthetic data generators for benchmarks.
+Products look like the real catalog so indexes see realistic term spread.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+CATEGORIES = ["mug", "tshirt", "hoodie", "cap", "bag", "accessory", "sticker", "poster"]
+COLORS = ["black", "white", "navy", "gray", "red", "green", "blue", "purple"]
+ADJECTIVES = [
+    "Cyberpunk", "Neural", "Quantum", "Retro", "Pixel", "Neon", "Binary", "Async",
+    "Hacker's", "Developer", "Midnight", "Glitch", "Turbo", "Cloud", "Kernel", "Lambda",
+]
+NOUNS = {
+    "mug": ["Coffee Mug", "Energy Mug", "Travel Mug"],
+    "tshirt": ["T-Shirt", "Tee", "Graphic Tee"],
+    "hoodie": ["Hoodie", "Zip Hoodie", "Pullover"],
+    "cap": ["Cap", "Snapback", "Beanie"],
+    "bag": ["Backpack", "Laptop Bag", "Tote"],
+    "accessory": ["Gaming Mouse", "Mechanical Keyboard", "Mouse Pad", "USB Hub"],
+    "sticker": ["Sticker Pack", "Laptop Decal"],
+    "poster": ["Poster", "Wall Print"],
+}
+FEATURES = [
+    "with LED base", "for long coding sessions", "100% cotton", "with neon accents",
+    "with embroidered logo", "with USB charging port", "with customizable RGB",
+    "with Cherry MX switches", "water-resistant", "premium fleece", "ergonomic design",
+]
+
+
+def make_catalog(n: int, seed: int = 0) -> list[dict]:
+    """Generate n products shaped like commerce.PRODUCTS."""
+    rng = random.Random(seed)
+    products = []
+    for i in range(n):
+        category = rng.choice(CATEGORIES)
+        product = {
+            "id": f"{category}-{i:06d}",
+            "name": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS[category])}",
+            "description": f"{rng.choice(ADJECTIVES)} design {rng.choice(FEATURES)}",
+            "price": rng.randrange(199, 9999),
+            "currency": "INR",
+            "category": category,
+            "color": rng.choice(COLORS),
+            "stock": rng.randrange(0, 50),
+        }
+        if category in ("tshirt", "hoodie"):
+            product["size"] = ["S", "M", "L", "XL"]
+        products.append(product)
+    return products
+
+
+def make_queries(n: int, seed: int = 1) -> list[str]:
+    """Generate n spoken-style search phrases."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        category = rng.choice(CATEGORIES)
+        words = [rng.choice(NOUNS[category]).split()[-1].lower()]
+        if rng.random() < 0.5:
+            words.insert(0, rng.choice(COLORS))
+        if rng.random() < 0.3:
+            words.insert(0, rng.choice(ADJECTIVES).lower())
+        queries.append(" ".join(words))
+    return queries
+
+
+BUYERS = ["Asha", "Ravi", "Meera", "Kabir", "Voice Customer", "Guest"]
+
+
+def make_cart_lines(products: list[dict], n: int, seed: int = 2) -> list[tuple[str, int, Optional[str]]]:
+    """n distinct (product_id, quantity, size) lines from products."""
+    rng = random.Random(seed)
+    lines = []
+    for product in rng.sample(products, n):
+        size = rng.choice(product["size"]) if product.get("size") else None
+        lines.append((product["id"], rng.randrange(1, 4), size))
+    return lines
+
+
+def make_order_summaries(n: int, seed: int = 3) -> list[dict]:
+    """n order history entries, oldest first, shaped like order_store._summary()."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "order_id": f"{i:08x}",
+            "total": rng.randrange(199, 50_000),
+            "currency": "INR",
+            "created_at": (start + timedelta(seconds=i)).isoformat(),
+            "buyer": rng.choice(BUYERS),
+        }
+        for i in range(n)
+    ]
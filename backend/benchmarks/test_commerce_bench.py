@@ -0,0 +1,77 @@
+"""
+Microbenchmarks for the commerce hot paths: catalog queries, cart reads
+and writes, checkout and order history, at catalog and order scale.
+
+Usage:
+    uv run pytest benchmarks/ [--bench-scale quick|full] --benchmark-json=.benchmarks/latest.json
+    uv run python benchmarks/check_baseline.py .benchmarks/latest.json
+"""
+
+import itertools
+import random
+
+import pytest
+from synthetic import make_cart_lines
+
+import commerce
+
+SESSION = "bench-session"
+
+
+def _fill_cart(products: list[dict], lines: int):
+    for product_id, quantity, size in make_cart_lines(products, lines):
+        commerce.add_to_cart(SESSION, product_id, quantity, size)
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"category": "hoodie"},
+        {"category": "mug", "max_price": 1000},
+        {"color": "black", "max_price": 2000},
+        {"search": "zip hoodie"},
+    ],
+    ids=["category", "category-price", "color-price", "substring"],
+)
+def test_list_products(benchmark, catalog, filters) -> None:
+    assert benchmark(commerce.list_products, **filters)
+
+
+def test_search_products(benchmark, catalog) -> None:
+    """Ranked full-text search, the agent's find_product tool."""
+    assert benchmark(commerce.search_products, "black hoodie")
+
+
+def test_get_product_by_id(benchmark, catalog) -> None:
+    ids = itertools.cycle([p["id"] for p in random.Random(0).sample(catalog, 1000)])
+    assert benchmark(lambda: commerce.get_product_by_id(next(ids)))
+
+
+def test_get_cart(benchmark, catalog, cart_lines) -> None:
+    _fill_cart(catalog, cart_lines)
+    assert len(benchmark(commerce.get_cart, SESSION)["items"]) == cart_lines
+
+
+def test_add_to_cart(benchmark, catalog, cart_lines) -> None:
+    """Adding one more of a product already in a cart of cart_lines lines."""
+    _fill_cart(catalog, cart_lines)
+    product_id, _, size = make_cart_lines(catalog, cart_lines)[0]
+    assert benchmark(commerce.add_to_cart, SESSION, product_id, 1, size)["total"]
+
+
+def test_create_order(benchmark, catalog, order_store, cart_lines) -> None:
+    def setup():
+        _fill_cart(catalog, cart_lines)
+        return (SESSION,), {"buyer_name": "Asha"}
+
+    order = benchmark.pedantic(commerce.create_order, setup=setup, rounds=30)
+    assert len(order["line_items"]) == cart_lines
+
+
+@pytest.mark.parametrize("store_kind", ["json", "sqlite"])
+@pytest.mark.parametrize("buyer", [None, "Asha"], ids=["all", "buyer"])
+def test_get_order_history(benchmark, histories, store_kind, history_size, buyer, monkeypatch) -> None:
+    monkeypatch.setattr(commerce, "order_store", histories(store_kind, history_size))
+    history = benchmark(commerce.get_order_history, limit=10, buyer_name=buyer)
+    assert len(history) == 10
+    assert history[0]["created_at"] > history[-1]["created_at"]
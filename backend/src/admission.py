@@ -0,0 +1,259 @@
+"""
+Load-aware worker admission.
+
+LiveKit's default load function reports the machine's CPU, averaged over
+a few seconds. A new shop session's cost (VAD, turn detector, TTS audio)
+doesn't show up there until after the room has been accepted. This
+module reports load from what sessions actually cost, instead.
+
+Each job process runs a LoadReporter. It writes the process's CPU, RSS
+and Murf requests in flight to a small file in LOAD_DIR every
+REPORT_INTERVAL. In the worker, AdmissionController.load is the
+WorkerOptions load_fnc. It keeps a rolling per-session CPU and RSS cost
+from those reports, then reports the fullest of these:
+
+    sessions   active jobs + 1, of WORKER_MAX_SESSIONS (set it from
+               benchmarks/loadgen.py; 0 for no limit)
+    cpu        machine CPU + one session's CPU, of all cores
+    memory     used memory + one session's RSS, of all memory
+    tts        Murf requests in flight, of WORKER_MAX_TTS_IN_FLIGHT
+               (0 for no limit)
+
+Each figure is what the worker would use if it accepted one more room.
+The dispatcher stops sending rooms once the load reaches LOAD_THRESHOLD.
+
+Sessions that share a process split its cost. Give each worker on a
+machine its own AGENT_LOAD_DIR.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import psutil
+from livekit.agents import utils
+from livekit.agents.utils.hw import get_cpu_monitor
+
+logger = logging.getLogger(__name__)
+
+# Where job processes report to the worker
+LOAD_DIR = Path(os.environ.get("AGENT_LOAD_DIR", Path(tempfile.gettempdir()) / "shop-agent-load"))
+
+# Load at which the worker stops taking rooms
+LOAD_THRESHOLD = float(os.environ.get("AGENT_LOAD_THRESHOLD", "0.7"))
+
+# Sessions and Murf requests in flight a worker can hold; 0 for no limit
+MAX_SESSIONS = int(os.environ.get("WORKER_MAX_SESSIONS", "0"))
+MAX_TTS_IN_FLIGHT = int(os.environ.get("WORKER_MAX_TTS_IN_FLIGHT", "0"))
+
+# A session's cost until running sessions have reported theirs: CPU in
+# cores, and the RSS of a job process (mostly the idle process itself)
+SESSION_CPU = float(os.environ.get("AGENT_SESSION_CPU", "0.05"))
+SESSION_RSS_MB = float(os.environ.get("AGENT_SESSION_RSS_MB", "200"))
+
+# How often job processes report; older reports are ignored
+REPORT_INTERVAL = 1.0
+STALE_AFTER = 5 * REPORT_INTERVAL
+
+# Weight of each new measurement in the rolling per-session cost
+COST_SMOOTHING = 0.1
+
+# Machine CPU samples averaged, 0.5 s each
+CPU_SAMPLES = 5
+
+# One sampling thread per process, however many controllers read it
+_cpu_monitor = get_cpu_monitor()
+_cpu = utils.MovingAverage(CPU_SAMPLES)
+_cpu_lock = threading.Lock()
+_cpu_thread: Optional[threading.Thread] = None
+
+
+def _sample_cpu():
+    while True:
+        busy = _cpu_monitor.cpu_percent(interval=0.5)
+        with _cpu_lock:
+            _cpu.add_sample(busy)
+
+
+def machine_cpu() -> float:
+    """Share of the machine's CPU in use, averaged over the last few seconds."""
+    global _cpu_thread
+
+    with _cpu_lock:
+        if _cpu_thread is None:
+            _cpu_thread = threading.Thread(target=_sample_cpu, daemon=True, name="admission-cpu")
+            _cpu_thread.start()
+        return _cpu.get_avg()
+
+
+class LoadReporter:
+    """
+    Reports a job process's cost to the worker: CPU (cores, over the last
+    interval), RSS and Murf requests in flight, as LOAD_DIR/<job id>.json.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        tts_in_flight: Callable[[], int] = lambda: 0,
+        directory: Path = LOAD_DIR,
+        interval: float = REPORT_INTERVAL,
+    ) -> None:
+        self.path = Path(directory) / f"{job_id}.json"
+        self.tts_in_flight = tts_in_flight
+        self.interval = interval
+        self._process = psutil.Process()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="load-reporter")
+
+    async def aclose(self):
+        if self._task is not None:
+            await utils.aio.cancel_and_wait(self._task)
+            self._task = None
+        self.path.unlink(missing_ok=True)
+
+    async def _run(self):
+        cpu = self._process.cpu_times()
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval)
+            used, now = self._process.cpu_times(), time.monotonic()
+            self.report(
+                (used.user + used.system - cpu.user - cpu.system) / (now - last),
+                self._process.memory_info().rss / 2**20,
+            )
+            cpu, last = used, now
+
+    def report(self, cpu: float, rss_mb: float):
+        report = {
+            "pid": os.getpid(),
+            "time": time.time(),
+            "cpu": cpu,
+            "rss_mb": rss_mb,
+            "tts_in_flight": self.tts_in_flight(),
+        }
+        # Written aside and renamed, so the worker never reads half a report
+        partial = self.path.with_suffix(".tmp")
+        try:
+            partial.write_text(json.dumps(report))
+            os.replace(partial, self.path)
+        except OSError as e:
+            logger.warning(f"Could not report load: {e}")
+
+
+class AdmissionController:
+    """
+    The worker's load_fnc: load() projects one more session onto what is in use.
+    machine_cpu and virtual_memory read the machine; tests pass their own.
+    """
+
+    def __init__(
+        self,
+        directory: Path = LOAD_DIR,
+        threshold: float = LOAD_THRESHOLD,
+        max_sessions: int = MAX_SESSIONS,
+        max_tts_in_flight: int = MAX_TTS_IN_FLIGHT,
+        session_cpu: float = SESSION_CPU,
+        session_rss_mb: float = SESSION_RSS_MB,
+        machine_cpu: Callable[[], float] = machine_cpu,
+        virtual_memory: Callable[[], Any] = psutil.virtual_memory,
+    ) -> None:
+        self.directory = Path(directory)
+        self.threshold = threshold
+        self.max_sessions = max_sessions
+        self.max_tts_in_flight = max_tts_in_flight
+        self.cpu_per_session = session_cpu
+        self.rss_mb_per_session = session_rss_mb
+        self.machine_cpu = machine_cpu
+        self.virtual_memory = virtual_memory
+        self.full = False
+        # Each resource's share, as of the last load()
+        self.loads: dict[str, float] = {}
+        self.stats = {"reports": 0, "full_since": None, "times_full": 0}
+
+    def read_reports(self) -> list[dict]:
+        """Recent reports from job processes; deletes those of processes that have exited."""
+        reports = []
+        now = time.time()
+        for path in self.directory.glob("*.json"):
+            try:
+                report = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if now - report["time"] <= STALE_AFTER:
+                reports.append(report)
+            elif not psutil.pid_exists(report["pid"]):
+                with contextlib.suppress(OSError):
+                    path.unlink()
+        return reports
+
+    def update_costs(self, reports: list[dict]):
+        """Move the rolling per-session cost towards what reporting sessions use."""
+        if not reports:
+            return
+        self.stats["reports"] += len(reports)
+        # Sessions sharing a process (the thread executor) split its cost
+        by_process: dict[int, list[dict]] = {}
+        for report in reports:
+            by_process.setdefault(report["pid"], []).append(report)
+        cpu = sum(sum(r["cpu"] for r in group) / len(group) for group in by_process.values()) / len(reports)
+        rss = sum(sum(r["rss_mb"] for r in group) / len(group) for group in by_process.values()) / len(reports)
+        self.cpu_per_session += COST_SMOOTHING * (cpu - self.cpu_per_session)
+        self.rss_mb_per_session += COST_SMOOTHING * (rss - self.rss_mb_per_session)
+
+    def load(self, worker=None) -> float:
+        """
+        Worker load in [0, 1]: the largest share of any resource the worker
+        would use with one more session. Called by LiveKit every half second.
+        """
+        reports = self.read_reports()
+        self.update_costs(reports)
+        sessions = len(worker.active_jobs) if worker is not None else len(reports)
+        memory = self.virtual_memory()
+
+        loads = {
+            "cpu": self.machine_cpu() + self.cpu_per_session / _cpu_monitor.cpu_count(),
+            "memory": (memory.total - memory.available + self.rss_mb_per_session * 2**20) / memory.total,
+        }
+        if self.max_sessions:
+            loads["sessions"] = (sessions + 1) / self.max_sessions
+        if self.max_tts_in_flight:
+            loads["tts"] = sum(r["tts_in_flight"] for r in reports) / self.max_tts_in_flight
+        self.loads = loads
+        load = min(max(loads.values()), 1.0)
+        self._update_full(load, sessions)
+        return load
+
+    def _update_full(self, load: float, sessions: int):
+        full = load >= self.threshold
+        if full == self.full:
+            return
+        self.full = full
+        limit = max(self.loads, key=self.loads.get)
+        if full:
+            self.stats["times_full"] += 1
+            self.stats["full_since"] = time.time()
+            logger.info(f"Worker full at {sessions} sessions, limited by {limit}: {self.metrics()}")
+        else:
+            self.stats["full_since"] = None
+            logger.info(f"Worker taking rooms again at {sessions} sessions: {self.metrics()}")
+
+    def metrics(self) -> dict:
+        """Loads and per-session costs, for logging."""
+        return {
+            "loads": {name: round(value, 2) for name, value in self.loads.items()},
+            "cpu_per_session": round(self.cpu_per_session, 3),
+            "rss_mb_per_session": round(self.rss_mb_per_session),
+            **self.stats,
+        }
@@ -1,10 +1,11 @@
+import asyncio
+import contextlib
+import functools
 import logging
-import json
-from datetime import datetime
-from pathlib import Path
+import os
+import time
 from typing import Annotated
 
-from dotenv import load_dotenv
 from livekit.agents import (
     Agent,
     AgentSession,
@@ -12,58 +13,81 @@ from livekit.agents import (
     JobProcess,
     MetricsCollectedEvent,
     RoomInputOptions,
+    RunContext,
     WorkerOptions,
     cli,
+    function_tool,
     metrics,
     tokenize,
-    function_tool,
-    RunContext
 )
 
-from livekit.plugins import silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
-import murf_tts
-import commerce
+# Loads .env.local; first, since the modules below read settings on import
+import env  # noqa: F401
 
+# isort: split
+import commerce
+import murf_tts
+from admission import AdmissionController, LoadReporter
+from cart_channel import CartChannel
+from carts import session_key
+from loop_monitor import LoopLagMonitor
+from tracing import TurnTracer, create_exporters, traced_tool
+from tts_cache import TTSCache
 
 logger = logging.getLogger("shop_agent")
 
-load_dotenv(".env.local")
-
-# Session ID for cart management
+# Fallback cart session ID when the agent isn't bound to a room
 SESSION_ID = "default_session"
 
-
-class ShopAgent(Agent):
-    def __init__(self) -> None:
-        super().__init__(
-            instructions="""You are Alex, a warm and friendly tech store assistant who genuinely loves helping customers find amazing products!
+# Most products listed in the system prompt; the rest are found via tools
+PROMPT_CATALOG_LIMIT = 40
+
+# Pre-render common phrases into the TTS cache at prewarm (TTS_PRESYNTH=1),
+# spending at most TTS_PRESYNTH_BUDGET seconds per process
+PRESYNTH_ENABLED = os.environ.get("TTS_PRESYNTH", "0") == "1"
+PRESYNTH_BUDGET = float(os.environ.get("TTS_PRESYNTH_BUDGET", "6"))
+
+# Things Alex says word for word, whatever the product
+FIXED_PHRASES = [
+    "Can I help you find anything else?",
+    "What else can I help you find?",
+    "Would you like to browse more items?",
+    "What size would you like - S, M, L, or XL?",
+    "Your cart is empty. Browse our products to start shopping!",
+    "Thank you for shopping with us!",
+]
+
+
+def catalog_prompt() -> str:
+    """Catalog section of the system prompt, generated from the shared catalog."""
+    products = commerce.list_products(limit=PROMPT_CATALOG_LIMIT)
+    total = len(commerce.current_catalog())
+    by_category: dict[str, list[dict]] = {}
+    for product in products:
+        by_category.setdefault(product.get("category", "other"), []).append(product)
+
+    lines = []
+    for n, (category, items) in enumerate(by_category.items(), 1):
+        sizes = items[0].get("size")
+        lines.append(f"{n}. {category.upper()}" + (f" (Sizes: {', '.join(sizes)})" if sizes else "") + ":")
+        for p in items:
+            lines.append(f"   - {p['id']}: {p['name']} (₹{p['price']}) - {p.get('highlights') or p['description']}")
+        lines.append("")
+    if total > len(products):
+        lines.append(f"...and {total - len(products)} more. Use get_products() or find_product() to look them up.")
+    return "\n".join(lines)
+
+
+INSTRUCTIONS = """You are Alex, a warm and friendly tech store assistant who genuinely loves helping customers find amazing products!
 
 🛍️ YOUR PRODUCT CATALOG:
-1. MUGS:
-   - mug-001: Cyberpunk Coffee Mug (₹899) - LED-lit ceramic mug, perfect for late-night coding
-   - mug-002: Hacker's Energy Mug (₹1299) - Extra large 500ml capacity, keeps drinks hot for hours
-
-2. T-SHIRTS (Sizes: S, M, L, XL):
-   - tshirt-001: Neural Network T-Shirt (₹799) - 100% cotton, circuit board design, breathable fabric
-   - tshirt-002: AI Developer Tee (₹699) - Soft premium cotton, "Powered by AI" print
-
-
-3. HOODIES (Sizes: M, L, XL):
-   - hoodie-001: Cyberpunk Hoodie (₹1999) - Premium fleece, neon accents, kangaroo pocket
-   - hoodie-002: Code Warrior Hoodie (₹2299) - Extra warm, perfect for cold offices
-
-4. ACCESSORIES:
-   - cap-001: Tech Geek Cap (₹499) - Adjustable snapback, embroidered logo
-   - bag-001: Developer Backpack (₹2499) - Padded laptop compartment, USB charging port, water-resistant
-   - mouse-001: RGB Gaming Mouse (₹1499) - 16000 DPI, ergonomic grip, customizable RGB, 7 programmable buttons
-   - keyboard-001: Mechanical Keyboard (₹3999) - Cherry MX Blue switches, RGB per-key lighting, aluminum frame, N-key rollover
-
+{catalog}
 🎯 YOUR MISSION:
 Help customers discover products, answer questions, and add items to their cart!
 
 💡 YOUR FRIENDLY APPROACH:
 1. When customer mentions a product → Call get_product_details() to share info
+   - Not sure which product ID they mean? → Call find_product() with their words once, don't guess IDs
 2. When customer says "yes/sure/sounds good" → Call add_to_cart() to help them
 3. For clothing → Kindly ask "What size would you like?" (S, M, L, or XL)
 4. Share features naturally - help them make great choices!
@@ -95,37 +119,153 @@ You: *Call add_to_cart("hoodie-001", 1, "L")* "Perfect! I've added the Cyberpunk
 - End with friendly questions: "What else can I help you find?"
 
 
-Remember: You're here to make shopping delightful and easy. Be their friendly guide!""",
+Remember: You're here to make shopping delightful and easy. Be their friendly guide!"""
+
+
+@functools.lru_cache(maxsize=1)
+def _instructions_for(catalog) -> str:
+    # catalog only keys the cache: a reload makes a new catalog object
+    return INSTRUCTIONS.format(catalog=catalog_prompt())
+
+
+def shop_instructions() -> str:
+    """System prompt for the current catalog, built once per catalog version."""
+    return _instructions_for(commerce.current_catalog())
+
+
+def spoken_phrases() -> list[str]:
+    """
+    Sentences worth pre-synthesizing: the fixed phrases and the Murf
+    outage fallback, plus product sentences in the shape the prompt's
+    examples teach the LLM.
+    """
+    phrases = [*FIXED_PHRASES, murf_tts.FALLBACK_PHRASE]
+    for p in commerce.list_products(limit=PROMPT_CATALOG_LIMIT):
+        phrases.append(f"Our {p['name']} is ₹{p['price']}.")
+        phrases.append(f"I've added the {p['name']} to your cart for ₹{p['price']}.")
+    return phrases
+
+
+def make_tts(**kwargs) -> murf_tts.TTS:
+    """Alex's voice. Used for the session and for pre-synthesis, so cache keys match."""
+    return murf_tts.TTS(
+        voice="en-US-ryan",
+        style="Conversational",  # Warm and natural
+        tokenizer=tokenize.basic.SentenceTokenizer(
+            min_sentence_len=20,  # Shorter for quick responses
+        ),
+        **kwargs,
+    )
+
+
+class ShopAgent(Agent):
+    def __init__(
+        self,
+        session_id: str = SESSION_ID,
+        loop_monitor: LoopLagMonitor | None = None,
+        tracer: TurnTracer | None = None,
+    ) -> None:
+        super().__init__(
+            instructions=shop_instructions(),
         )
+        # Cart key for this room; tools must hold the cart lock while mutating
+        self.session_id = session_id
+        # Product ID lookups this session, to measure how often the LLM guesses wrong
+        self.lookup_stats = {"lookups": 0, "misses": 0, "resolver_calls": 0, "resolved_hits": 0}
+        self._resolved_ids: set[str] = set()
+        # Records event loop lag during slow tools, if the session runs a monitor
+        self.loop_monitor = loop_monitor
+        # Times each tool call as part of the reply that made it
+        self.tracer = tracer
+
+    def _watch(self, label: str):
+        if self.loop_monitor is None:
+            return contextlib.nullcontext()
+        return self.loop_monitor.watch(label)
+
+    def _lookup_product(self, product_id: str) -> dict | None:
+        """Look up a product ID from a tool call and record the outcome."""
+        product = commerce.get_product_by_id(product_id)
+        self.lookup_stats["lookups"] += 1
+        if not product:
+            self.lookup_stats["misses"] += 1
+        elif product_id in self._resolved_ids:
+            # ID came from find_product instead of a guess-and-retry loop
+            self.lookup_stats["resolved_hits"] += 1
+            self._resolved_ids.discard(product_id)
+        return product
+
+    def _suggest(self, text: str) -> str:
+        """Closest catalog matches for an unknown product reference."""
+        matches = commerce.resolve_products(text.replace("-", " "))
+        self._resolved_ids.update(p["id"] for p in matches)
+        if not matches:
+            return ""
+        return " Did you mean: " + ", ".join(f"{p['name']} ({p['id']})" for p in matches) + "?"
         
     
     @function_tool
+    @traced_tool
     async def get_products(
         self,
         context: RunContext,
-        category: Annotated[str, "Product category: mug, tshirt, hoodie, cap, bag, accessory, or leave empty for all"] = None
+        category: Annotated[str, "Product category: mug, tshirt, hoodie, cap, bag, accessory, or leave empty for all"] = None,
+        search: Annotated[str | None, "Words the customer used, like 'black hoodie' or 'rgb'"] = None
     ):
-        """Get list of available products, optionally filtered by category.
+        """Get list of available products, optionally filtered by category or search words.
         
         Args:
             category: Filter by category or None for everything
+            search: Free-text search; best matches come first
         """
-        products = commerce.list_products(category=category)
+        if search:
+            products = commerce.search_products(search, limit=5, category=category)
+        else:
+            products = commerce.list_products(category=category, limit=5)
         
         if not products:
-            return f"No products found in category: {category}"
+            return f"No products found for: {search or category}"
         
         result = f"Available products:\n"
-        for p in products[:5]:  # Limit to 5 for voice
+        for p in products:  # At most 5, for voice
             result += f"- {p['name']}: ₹{p['price']}"
             if p.get('size'):
                 result += f" (Sizes: {', '.join(p['size'])})"
             result += "\n"
         
-        logger.info(f"Listed {len(products)} products in {category or 'all'}")
+        logger.info(f"Listed {len(products)} products in {category or 'all'} (search: {search})")
         return result.strip()
     
     @function_tool
+    @traced_tool
+    async def find_product(
+        self,
+        context: RunContext,
+        query: Annotated[str, "What the customer called the product, e.g. 'hoody', 'key board', 'RGB mouse'"]
+    ):
+        """🔎 Find the product ID for what the customer said. CALL THIS when unsure of the exact product ID.
+
+        Handles misheard or misspelled names, so call it once instead of guessing IDs.
+
+        Args:
+            query: The customer's words for the product
+        """
+        self.lookup_stats["resolver_calls"] += 1
+        matches = commerce.resolve_products(query)
+
+        if not matches:
+            return f"No product matches '{query}'. Ask the customer to describe it differently."
+
+        self._resolved_ids.update(p["id"] for p in matches)
+        result = "Best matches:\n"
+        for p in matches:
+            result += f"- {p['id']}: {p['name']} (₹{p['price']})\n"
+
+        logger.info(f"Resolved '{query}' to {[p['id'] for p in matches]}")
+        return result.strip()
+
+    @function_tool
+    @traced_tool
     async def get_product_details(
         self,
         context: RunContext,
@@ -141,10 +281,10 @@ Remember: You're here to make shopping delightful and easy. Be their friendly gu
         Args:
             product_id: Exact product ID from the catalog
         """
-        product = commerce.get_product_by_id(product_id)
+        product = self._lookup_product(product_id)
         
         if not product:
-            return f"Product {product_id} not found. Check the product ID."
+            return f"Product {product_id} not found.{self._suggest(product_id)}"
         
         result = f"{product['name']} costs ₹{product['price']}. "
         result += f"{product['description']}. "
@@ -155,6 +295,7 @@ Remember: You're here to make shopping delightful and easy. Be their friendly gu
         return result
     
     @function_tool
+    @traced_tool
     async def add_to_cart(
         self,
         context: RunContext,
@@ -178,34 +319,17 @@ Remember: You're here to make shopping delightful and easy. Be their friendly gu
             quantity: Number of items (usually 1)
             size: Only for tshirts/hoodies - S, M, L, or XL
         """
-        import aiohttp
-        
-        product = commerce.get_product_by_id(product_id)
+        product = self._lookup_product(product_id)
         if not product:
-            return f"Error: Product {product_id} not found. Use correct ID."
+            return f"Error: Product {product_id} not found.{self._suggest(product_id)}"
         
         # Check if size is needed
         if product.get('category') in ['tshirt', 'hoodie'] and not size:
             return f"Please specify size for {product['name']}: {', '.join(product.get('size', []))}"
         
-        # Add to both backend and frontend carts
-        commerce.add_to_cart(SESSION_ID, product_id, quantity, size)
-        
-        # Also add to frontend cart via API
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    'http://localhost:3001/api/cart',
-                    json={
-                        'product_id': product_id,
-                        'quantity': quantity,
-                        'size': size
-                    }
-                ) as response:
-                    if response.status == 200:
-                        logger.info(f"Added to frontend cart: {product_id}")
-        except Exception as e:
-            logger.warning(f"Failed to sync with frontend cart: {e}")
+        # The web UI gets the change from the cart channel
+        async with commerce.cart_store.lock(self.session_id):
+            commerce.add_to_cart(self.session_id, product_id, quantity, size)
         
         message = f"Great! Added {product['name']} to your cart"
         if size:
@@ -216,12 +340,13 @@ Remember: You're here to make shopping delightful and easy. Be their friendly gu
         return message
     
     @function_tool
+    @traced_tool
     async def view_cart(self, context: RunContext):
         """View current shopping cart contents and total.
         
         Returns cart summary with items and total price.
         """
-        cart = commerce.get_cart(SESSION_ID)
+        cart = commerce.get_cart(self.session_id)
         
         if not cart['items']:
             return "Your cart is empty. Browse our products to start shopping!"
@@ -239,6 +364,7 @@ Remember: You're here to make shopping delightful and easy. Be their friendly gu
         return result
     
     @function_tool
+    @traced_tool
     async def remove_from_cart(
         self,
         context: RunContext,
@@ -249,13 +375,15 @@ Remember: You're here to make shopping delightful and easy. Be their friendly gu
         Args:
             product_id: Product ID to remove
         """
-        commerce.remove_from_cart(SESSION_ID, product_id)
+        async with commerce.cart_store.lock(self.session_id):
+            commerce.remove_from_cart(self.session_id, product_id)
         
         message = f"Removed product from cart"
         logger.info(f"Removed from cart: {product_id}")
         return message
     
     @function_tool
+    @traced_tool
     async def checkout(self, context: RunContext):
         """💳 Complete the purchase and checkout. CALL THIS when customer wants to finalize order.
         
@@ -266,20 +394,10 @@ Remember: You're here to make shopping delightful and easy. Be their friendly gu
         
         Creates an order and clears the cart.
         """
-        import aiohttp
-        
         try:
-            # Create order in backend
-            order = commerce.create_order(SESSION_ID, buyer_name="Voice Customer")
-            
-            # Also trigger frontend checkout
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post('http://localhost:3001/api/checkout') as response:
-                        if response.status == 200:
-                            logger.info("Frontend checkout triggered")
-            except Exception as e:
-                logger.warning(f"Failed to trigger frontend checkout: {e}")
+            # Create order in backend; the file I/O runs off the event loop
+            async with self._watch("checkout"), commerce.cart_store.lock(self.session_id):
+                order = await commerce.create_order_async(self.session_id, buyer_name="Voice Customer")
             
             result = f"Order confirmed! Order ID: {order['id']}. "
             result += f"Total: ₹{order['total']}. "
@@ -292,16 +410,76 @@ Remember: You're here to make shopping delightful and easy. Be their friendly gu
             return str(e)
 
 
+def import_plugins():
+    """
+    Import the LiveKit plugins, which register themselves on import (on the
+    main thread only). They take most of the agent's import time and only
+    job processes use them, so the module doesn't import them at the top.
+
+    The worker calls this before starting: on Linux, job processes fork
+    from a server that preloads every registered plugin, the turn detector
+    runs in the worker's inference process, and download-files fetches
+    files for registered plugins. prewarm calls it too, for platforms where
+    job processes are spawned fresh; there it is a no-op otherwise.
+    """
+    from livekit.plugins import deepgram, google, noise_cancellation, silero  # noqa: F401
+    from livekit.plugins.turn_detector import multilingual  # noqa: F401
+
+
 def prewarm(proc: JobProcess):
-    """Prewarm the VAD model"""
-    proc.userdata["vad"] = silero.VAD.load()
+    """Prewarm the plugins, the VAD model, the catalog indexes, the Murf HTTP client and the TTS audio cache"""
+    import_plugins()
+    from livekit.plugins import silero
 
+    proc.userdata["vad"] = silero.VAD.load()
+    # Search and resolver indexes, so the first tool call doesn't build them on the audio loop
+    commerce.warm_catalog()
+    # One connection pool for every session in the process; it lives as long as the process
+    proc.userdata["murf_http"] = murf_tts.create_http_client()
+    # Shared so every session in the process stops calling Murf during an outage
+    proc.userdata["murf_breaker"] = murf_tts.create_breaker()
+    proc.userdata["tts_cache"] = TTSCache()
+    if PRESYNTH_ENABLED:
+        presynthesize(proc.userdata["tts_cache"])
+
+
+def presynthesize(cache: TTSCache):
+    """Render spoken_phrases() into the cache, in parallel, within PRESYNTH_BUDGET."""
+
+    async def _run():
+        # A client of its own: this event loop closes before any job starts
+        tts = make_tts(cache=cache)
+        try:
+            return await tts.presynthesize(spoken_phrases(), budget=PRESYNTH_BUDGET)
+        finally:
+            await tts.aclose()
+
+    start = time.perf_counter()
+    try:
+        counts = asyncio.run(_run())
+    except Exception as e:
+        logger.warning(f"TTS pre-synthesis failed: {e}")
+        return
+    logger.info(f"TTS pre-synthesis in {time.perf_counter() - start:.1f}s: {counts}")
+
+
+def create_session(userdata: dict, turn_detection=None) -> tuple[AgentSession, murf_tts.TTS]:
+    """
+    The agent session and its TTS, from what prewarm put in userdata.
+    turn_detection defaults to the multilingual turn detector model, which
+    needs the job's inference executor.
+    """
+    from livekit.plugins import deepgram, google
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+    if turn_detection is None:
+        turn_detection = MultilingualModel()
+    tts = make_tts(
+        http_client=userdata.get("murf_http"),
+        cache=userdata.get("tts_cache"),
+        breaker=userdata.get("murf_breaker"),
+    )
 
-async def entrypoint(ctx: JobContext):
-    """Main entrypoint for the Shop Agent"""
-    
-    logger.info(f"Starting Shop Agent session for room: {ctx.room.name}")
-    
     # Create session with Murf TTS
     session = AgentSession(
         stt=deepgram.STT(
@@ -312,16 +490,20 @@ async def entrypoint(ctx: JobContext):
             model="gemini-2.0-flash-001",  # Stable model with good tool calling
             temperature=0.6,  # Balanced for natural conversation
         ),
-        tts=murf_tts.TTS(
-            voice="en-US-ryan",
-            style="Conversational",  # Warm and natural
-            tokenizer=tokenize.basic.SentenceTokenizer(
-                min_sentence_len=20,  # Shorter for quick responses
-            ),
-        ),
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        tts=tts,
+        turn_detection=turn_detection,
+        vad=userdata["vad"],
     )
+    return session, tts
+
+
+async def entrypoint(ctx: JobContext):
+    """Main entrypoint for the Shop Agent"""
+    from livekit.plugins import noise_cancellation
+
+    logger.info(f"Starting Shop Agent session for room: {ctx.room.name}")
+
+    session, tts = create_session(ctx.proc.userdata)
     
     # Metrics collection
     usage_collector = metrics.UsageCollector()
@@ -334,11 +516,38 @@ async def entrypoint(ctx: JobContext):
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        # Each resolved hit is an ID found in one call instead of a retry loop
+        logger.info(f"Product lookups: {shop_agent.lookup_stats}")
+        logger.info(f"Cart store: {commerce.cart_store.metrics()}")
+        if "tts_cache" in ctx.proc.userdata:
+            logger.info(f"TTS cache: {ctx.proc.userdata['tts_cache'].metrics()}")
+        logger.info(f"Murf: {tts.metrics()}")
+        logger.info(f"Cart channel: {cart_channel.metrics()}")
+        await loop_monitor.stop()
+        logger.info(f"Event loop lag: {loop_monitor.metrics()}")
+        await tracer.aclose()
+        logger.info(f"Turn latency: {tracer.metrics()}")
 
     ctx.add_shutdown_callback(log_usage)
 
+    # Audio stalls show up as event loop lag
+    loop_monitor = LoopLagMonitor()
+    loop_monitor.start()
+
+    # Where each turn's latency goes: end of speech, LLM, tools, TTS
+    tracer = TurnTracer(create_exporters())
+    tracer.attach(session)
+
+    # This session's CPU, memory and Murf requests, for the worker's load
+    load_reporter = LoadReporter(ctx.job.id, tts_in_flight=lambda: tts.in_flight)
+    load_reporter.start()
+    ctx.add_shutdown_callback(load_reporter.aclose)
+
     # Start the session with Shop Agent
-    shop_agent = ShopAgent()
+    shop_agent = ShopAgent(session_id=session_key(ctx.room.name), loop_monitor=loop_monitor, tracer=tracer)
+
+    # Cart updates to the web UI, and its cart buttons, over the room
+    cart_channel = CartChannel(ctx.room, shop_agent.session_id)
     
     await session.start(
         agent=shop_agent,
@@ -350,7 +559,24 @@ async def entrypoint(ctx: JobContext):
 
     # Join the room
     await ctx.connect()
+    cart_channel.start()
+    ctx.add_shutdown_callback(cart_channel.aclose)
 
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
+    import_plugins()
+    # Stop taking rooms on what sessions really cost, not CPU alone
+    admission = AdmissionController()
+    cli.run_app(WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        load_fnc=admission.load,
+        load_threshold=admission.threshold,
+        # Leave room for pre-synthesis and the catalog indexes (about 1 s
+        # per 10k products) on top of loading the VAD model
+        initialize_process_timeout=(
+            10.0
+            + (PRESYNTH_BUDGET if PRESYNTH_ENABLED else 0)
+            + len(commerce.current_catalog()) / 10_000
+        ),
+    ))
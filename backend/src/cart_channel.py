@@ -0,0 +1,155 @@
+"""
+Cart state shared with the web UI over the LiveKit room.
+
+The Python cart is the only cart. CartChannel pushes every change to it to
+the room as a data message on the "cart" topic, and serves the UI's cart
+buttons as RPC methods, so the UI updates in one hop whether the change
+came from the voice agent or from a click.
+
+Messages are JSON:
+    {"type": "cart", "version": n, "cart": {"items": [...], "total": ..., "currency": ...}}
+    {"type": "order", "version": n, "order": {...}}
+version increases with every message from one agent, so a client can drop
+anything older than what it has already applied.
+
+RPC methods (JSON payload in, the updated cart out):
+    cart.add {"product_id", "quantity", "size"}
+    cart.remove {"product_id"}
+    cart.checkout {} -> the order
+"""
+
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from livekit import rtc
+from livekit.agents import utils
+
+import commerce
+
+logger = logging.getLogger(__name__)
+
+CART_TOPIC = "cart"
+
+# Categories sold by size; the voice agent asks for one before adding them
+SIZED_CATEGORIES = ("tshirt", "hoodie")
+
+
+def _cart_line(args: dict) -> tuple[str, int, Optional[str]]:
+    """product_id, quantity and size from cart.add arguments, checked against the catalog."""
+    product_id, quantity, size = args.get("product_id"), args.get("quantity", 1), args.get("size")
+    if not isinstance(product_id, str):
+        raise ValueError("product_id is required")
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+        raise ValueError("quantity must be a whole number of at least 1")
+    product = commerce.get_product_by_id(product_id)
+    if product is None:
+        raise ValueError(f"Product {product_id} not found")
+    if size is None:
+        if product.get("category") in SIZED_CATEGORIES:
+            raise ValueError(f"Please specify size for {product['name']}: {', '.join(product.get('size', []))}")
+    elif size not in product.get("size", []):
+        raise ValueError(f"{product['name']} does not come in size {size}")
+    return product_id, quantity, size
+
+
+class CartChannel:
+    def __init__(self, room: rtc.Room, session_id: str, buyer_name: str = "Voice Customer") -> None:
+        self.room = room
+        self.session_id = session_id
+        self.buyer_name = buyer_name
+        self._version = 0
+        self._sends: set[asyncio.Task] = set()
+        self._rpc_methods = {
+            "cart.add": self._rpc_add,
+            "cart.remove": self._rpc_remove,
+            "cart.checkout": self._rpc_checkout,
+        }
+        self.stats = {"published": 0, "publish_errors": 0, "rpc_calls": 0}
+
+    def start(self):
+        """Start publishing changes and serving RPCs, and send the current cart."""
+        commerce.add_listener(self._on_change)
+        for method, handler in self._rpc_methods.items():
+            self.room.local_participant.register_rpc_method(method, handler)
+        # Late joiners get the cart as it is
+        self.room.on("participant_connected", self._on_participant_connected)
+        self._publish("cart", commerce.get_cart(self.session_id))
+
+    async def aclose(self):
+        commerce.remove_listener(self._on_change)
+        self.room.off("participant_connected", self._on_participant_connected)
+        for method in self._rpc_methods:
+            self.room.local_participant.unregister_rpc_method(method)
+        if self._sends:
+            await asyncio.wait(self._sends, timeout=2.0)
+        await utils.aio.cancel_and_wait(*self._sends)
+
+    def _on_participant_connected(self, participant: rtc.RemoteParticipant):
+        self._publish("cart", commerce.get_cart(self.session_id))
+
+    def _on_change(self, event: str, session_id: str, data: dict):
+        if session_id == self.session_id:
+            self._publish(event, data)
+
+    def _publish(self, event: str, data: dict):
+        # Empty carts from get_cart() have no total
+        if event == "cart" and not data["items"]:
+            data = commerce.EMPTY_CART
+        self._version += 1
+        payload = json.dumps({"type": event, "version": self._version, event: data})
+        # publish_data queues the packet before its first await, so sends
+        # leave in the order they were started
+        task = asyncio.create_task(self._send(payload))
+        self._sends.add(task)
+        task.add_done_callback(self._sends.discard)
+
+    async def _send(self, payload: str):
+        try:
+            await self.room.local_participant.publish_data(payload, reliable=True, topic=CART_TOPIC)
+            self.stats["published"] += 1
+        except Exception as e:
+            self.stats["publish_errors"] += 1
+            logger.warning(f"Failed to publish cart update: {e}")
+
+    def _args(self, data: rtc.RpcInvocationData) -> dict:
+        self.stats["rpc_calls"] += 1
+        try:
+            args = json.loads(data.payload) if data.payload else {}
+        except json.JSONDecodeError:
+            args = None
+        if not isinstance(args, dict):
+            raise rtc.RpcError(rtc.RpcError.ErrorCode.APPLICATION_ERROR, "Payload must be a JSON object")
+        return args
+
+    async def _rpc_add(self, data: rtc.RpcInvocationData) -> str:
+        args = self._args(data)
+        try:
+            product_id, quantity, size = _cart_line(args)
+            async with commerce.cart_store.lock(self.session_id):
+                commerce.add_to_cart(self.session_id, product_id, quantity, size)
+        except ValueError as e:
+            raise rtc.RpcError(rtc.RpcError.ErrorCode.APPLICATION_ERROR, f"Cannot add to cart: {e}") from e
+        # The view built for the published update, so not copied again
+        return json.dumps(commerce.get_cart(self.session_id))
+
+    async def _rpc_remove(self, data: rtc.RpcInvocationData) -> str:
+        args = self._args(data)
+        if "product_id" not in args:
+            raise rtc.RpcError(rtc.RpcError.ErrorCode.APPLICATION_ERROR, "product_id is required")
+        async with commerce.cart_store.lock(self.session_id):
+            commerce.remove_from_cart(self.session_id, args["product_id"])
+        return json.dumps(commerce.get_cart(self.session_id))
+
+    async def _rpc_checkout(self, data: rtc.RpcInvocationData) -> str:
+        self._args(data)
+        try:
+            async with commerce.cart_store.lock(self.session_id):
+                order = await commerce.create_order_async(self.session_id, buyer_name=self.buyer_name)
+        except ValueError as e:
+            raise rtc.RpcError(rtc.RpcError.ErrorCode.APPLICATION_ERROR, str(e)) from e
+        return json.dumps(order)
+
+    def metrics(self) -> dict:
+        return dict(self.stats)
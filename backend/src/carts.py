@@ -0,0 +1,267 @@
+"""
+Per-session shopping carts for a worker hosting many concurrent rooms.
+Carts expire after sitting idle, and the least recently used ones are
+evicted when the store reaches its session or line cap.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CART_MAX_SESSIONS = int(os.environ.get("CART_MAX_SESSIONS", "1000"))
+CART_MAX_LINES = int(os.environ.get("CART_MAX_LINES", "50000"))
+CART_IDLE_TTL = float(os.environ.get("CART_IDLE_TTL", "1800"))
+
+
+def session_key(room_name: str, participant_identity: Optional[str] = None) -> str:
+    """Cart key for a LiveKit room, optionally narrowed to one participant."""
+    if participant_identity:
+        return f"{room_name}/{participant_identity}"
+    return room_name
+
+
+class Cart:
+    """
+    Cart lines indexed by (product_id, size), with a running total.
+
+    Each mutation adjusts the total by the lines it touches, and the
+    enriched view returned by view() is cached until the next mutation.
+    Line prices are copied from the product when it is added; after a
+    catalog reload, reprice() brings them up to date.
+    """
+
+    def __init__(self) -> None:
+        self._lines: dict[tuple[str, Optional[str]], dict] = {}
+        self._sizes: dict[str, list[Optional[str]]] = {}
+        self.total = 0
+        # The catalog the line prices were taken from
+        self.priced_by = None
+        self._view: Optional[dict] = None
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    @property
+    def items(self) -> list[dict]:
+        return list(self._lines.values())
+
+    def line(self, product_id: str, size: Optional[str] = None) -> Optional[dict]:
+        """The line for product_id in size, or None. Treat as read-only."""
+        return self._lines.get((product_id, size))
+
+    def add(self, product: dict, quantity: int = 1, size: Optional[str] = None) -> int:
+        """Add quantity of product, merging with an existing line. Returns lines added."""
+        self._view = None
+        line = self._lines.get((product["id"], size))
+        if line is not None:
+            line["quantity"] += quantity
+            line["item_total"] += line["price"] * quantity
+            self.total += line["price"] * quantity
+            return 0
+
+        self._lines[(product["id"], size)] = {
+            "product_id": product["id"],
+            "quantity": quantity,
+            "size": size,
+            "name": product["name"],
+            "price": product["price"],
+            "currency": product["currency"],
+            "item_total": product["price"] * quantity,
+        }
+        self._sizes.setdefault(product["id"], []).append(size)
+        self.total += product["price"] * quantity
+        return 1
+
+    def remove(self, product_id: str) -> int:
+        """Remove every line for product_id, whatever the size. Returns lines removed."""
+        sizes = self._sizes.pop(product_id, ())
+        for size in sizes:
+            self.total -= self._lines.pop((product_id, size))["item_total"]
+        if sizes:
+            self._view = None
+        return len(sizes)
+
+    def reprice(self, catalog, lookup: Callable[[list[str]], list[Optional[dict]]]) -> int:
+        """
+        Refresh line names and prices from lookup (e.g. get_products_by_ids),
+        dropping lines whose product is gone. Returns lines removed.
+        """
+        keys = list(self._lines)
+        products = lookup([product_id for product_id, _ in keys])
+        removed = 0
+        self.total = 0
+        for key, product in zip(keys, products):
+            if product is None:
+                del self._lines[key]
+                self._sizes[key[0]].remove(key[1])
+                if not self._sizes[key[0]]:
+                    del self._sizes[key[0]]
+                removed += 1
+                continue
+            line = self._lines[key]
+            line.update(
+                name=product["name"],
+                price=product["price"],
+                currency=product["currency"],
+                item_total=product["price"] * line["quantity"],
+            )
+            self.total += line["item_total"]
+        self.priced_by = catalog
+        self._view = None
+        return removed
+
+    def view(self, currency: str = "INR") -> dict:
+        """Enriched cart with line totals and grand total. Treat as read-only."""
+        if self._view is None:
+            self._view = {
+                "items": [dict(line) for line in self._lines.values()],
+                "total": self.total,
+                "currency": currency,
+            }
+        return self._view
+
+
+class CartStore:
+    """
+    Session carts with per-session asyncio locks, idle TTL and LRU eviction.
+
+    Carts are kept in least-recently-used order, so expired carts are always
+    at the front and eviction only touches the carts it removes. The total
+    number of cart lines is the memory cap: a cart's size is dominated by
+    its lines, and counting them is cheaper than measuring bytes.
+    Carts whose lock is held or awaited are never evicted. A session's
+    lock lives only while some coroutine holds or waits for it, so sessions
+    without carts leave nothing behind.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = CART_MAX_SESSIONS,
+        max_lines: int = CART_MAX_LINES,
+        idle_ttl: float = CART_IDLE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.max_lines = max_lines
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        # session_id -> (cart, last access time), least recently used first
+        self._carts: OrderedDict[str, tuple[Cart, float]] = OrderedDict()
+        self._locks: dict[str, asyncio.Lock] = {}
+        # session_id -> coroutines holding or waiting for its lock
+        self._lock_users: dict[str, int] = {}
+        self._lines = 0
+        self.stats = {
+            "created": 0,
+            "evicted_idle": 0,
+            "evicted_lru": 0,
+            "evicted_lines": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._carts)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    @property
+    def line_count(self) -> int:
+        return self._lines
+
+    @contextlib.asynccontextmanager
+    async def lock(self, session_id: str) -> AsyncIterator[None]:
+        """Serialize cart mutations for one session: `async with store.lock(session_id): ...`"""
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        self._lock_users[session_id] = self._lock_users.get(session_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._lock_users[session_id] -= 1
+            if not self._lock_users[session_id]:
+                del self._lock_users[session_id]
+                del self._locks[session_id]
+
+    def get(self, session_id: str) -> Optional[Cart]:
+        """Return the session's cart, or None if it has none or it expired."""
+        entry = self._carts.get(session_id)
+        if entry is None:
+            return None
+        now = self._clock()
+        if now - entry[1] > self.idle_ttl and not self._is_locked(session_id):
+            self._evict(session_id, "evicted_idle")
+            return None
+        self._carts[session_id] = (entry[0], now)
+        self._carts.move_to_end(session_id)
+        return entry[0]
+
+    def get_or_create(self, session_id: str) -> Cart:
+        """Return the session's cart, creating an empty one if needed."""
+        cart = self.get(session_id)
+        if cart is None:
+            self.evict_expired()
+            cart = Cart()
+            self._carts[session_id] = (cart, self._clock())
+            self.stats["created"] += 1
+            self._enforce_caps(keep=session_id)
+        return cart
+
+    def discard(self, session_id: str):
+        """Drop a session's cart."""
+        entry = self._carts.pop(session_id, None)
+        if entry is not None:
+            self._lines -= len(entry[0])
+
+    def lines_changed(self, session_id: str, delta: int):
+        """Record that a cart gained or lost lines, evicting others if over the cap."""
+        self._lines += delta
+        if delta > 0:
+            self._enforce_caps(keep=session_id)
+
+    def evict_expired(self) -> int:
+        """Drop carts idle for longer than the TTL. Returns how many were dropped."""
+        cutoff = self._clock() - self.idle_ttl
+        expired = []
+        for session_id, (_, last_access) in self._carts.items():
+            if last_access >= cutoff:
+                break
+            if not self._is_locked(session_id):
+                expired.append(session_id)
+        for session_id in expired:
+            self._evict(session_id, "evicted_idle")
+        return len(expired)
+
+    def metrics(self) -> dict:
+        """Current size and eviction counters, for logging."""
+        return {"sessions": len(self._carts), "lines": self._lines, **self.stats}
+
+    def _is_locked(self, session_id: str) -> bool:
+        return session_id in self._lock_users
+
+    def _evict(self, session_id: str, reason: str):
+        self.discard(session_id)
+        self.stats[reason] += 1
+        logger.debug(f"Evicted cart {session_id} ({reason})")
+
+    def _enforce_caps(self, keep: Optional[str] = None):
+        sessions, lines = len(self._carts), self._lines
+        victims = []
+        for session_id, (cart, _) in self._carts.items():
+            if sessions <= self.max_sessions and lines <= self.max_lines:
+                break
+            if session_id == keep or self._is_locked(session_id):
+                continue
+            victims.append((session_id, "evicted_lru" if sessions > self.max_sessions else "evicted_lines"))
+            sessions -= 1
+            lines -= len(cart)
+        for session_id, reason in victims:
+            self._evict(session_id, reason)
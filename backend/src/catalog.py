@@ -0,0 +1,592 @@
+"""
+In-memory indexes over the product catalog.
+Built once when the catalog is loaded so filtered lookups don't rescan it.
+"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Sequence
+from typing import Callable, Optional
+
+# Fields covered by full-text search and how much a hit in each one counts
+SEARCH_FIELDS = {
+    "name": 3.0,
+    "category": 2.0,
+    "color": 1.5,
+    "description": 1.0,
+}
+
+# Score multiplier for a query word that only matches term prefixes
+PREFIX_MATCH_WEIGHT = 0.5
+
+# Upper bound on vocabulary terms a single prefix can expand to
+MAX_PREFIX_EXPANSIONS = 64
+
+STOP_WORDS = frozenset({
+    "a", "an", "and", "any", "do", "for", "have", "i", "in", "is", "it", "me",
+    "my", "of", "on", "one", "or", "some", "the", "to", "want", "with", "you",
+})
+
+# Fields the resolver matches spoken product references against
+RESOLVE_FIELDS = {
+    "name": 1.0,
+    "category": 0.7,
+    "color": 0.3,
+}
+
+# Similarity given to words that only share a Soundex key
+SOUND_MATCH_SIMILARITY = 0.75
+
+# Largest edit distance tolerated for words longer than four letters
+MAX_EDIT_DISTANCE = 2
+
+# Resolver matches below this confidence are not returned
+MIN_RESOLVE_CONFIDENCE = 0.3
+
+_WORD_RE = re.compile(r"[^\W_]+")
+_COMPOUND_RE = re.compile(r"[^\W_]+(?:[-'][^\W_]+)+")
+
+
+def stem(word: str) -> str:
+    """
+    Light suffix stripping so plurals and spelling variants share a term.
+    "hoodies", "hoodie" and "hoody" all become "hoodi".
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "i"
+    if word.endswith(("sses", "shes", "ches", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us")):
+        word = word[:-1]
+    if word.endswith("ie"):
+        return word[:-1]
+    if word.endswith("y"):
+        return word[:-1] + "i"
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into normalized search terms.
+    Hyphenated words are also indexed joined ("t-shirt" -> "tshirt").
+    """
+    text = text.lower()
+    words = _WORD_RE.findall(text)
+    words.extend(m.group().replace("-", "").replace("'", "") for m in _COMPOUND_RE.finditer(text))
+    return [
+        stem(w) for w in words
+        if (len(w) > 1 or w.isdigit()) and w not in STOP_WORDS
+    ]
+
+
+class SearchIndex:
+    """
+    Inverted index from normalized terms to the products containing them.
+
+    Products matching every query word are ranked first, by a field-weighted
+    TF-IDF score; products matching only some words follow. A query word that
+    isn't a known term matches the terms it prefixes ("key" -> "keyboard").
+    Words that match nothing are ignored, so filler in a spoken request
+    doesn't empty the result.
+    """
+
+    def __init__(self, products: Sequence[dict]) -> None:
+        postings: dict[str, dict[int, float]] = {}
+        for pos, product in enumerate(products):
+            for field, weight in SEARCH_FIELDS.items():
+                value = product.get(field)
+                if not value:
+                    continue
+                for term in set(tokenize(str(value))):
+                    entry = postings.setdefault(term, {})
+                    entry[pos] = entry.get(pos, 0.0) + weight
+
+        # Fold IDF into the postings so a query only has to add scores up
+        total = max(len(products), 1)
+        for entry in postings.values():
+            idf = math.log(1 + total / len(entry))
+            for pos in entry:
+                entry[pos] *= idf
+        self._postings = postings
+        self._vocabulary = sorted(postings)
+        # Best-first order per term, so one-word queries stop after k hits
+        self._ranked: dict[str, list[int]] = {}
+
+    def _word_scores(self, word: str) -> dict[int, float]:
+        """Per-product scores for one query word."""
+        exact = self._postings.get(word)
+        if exact is not None:
+            return exact
+
+        start = bisect_left(self._vocabulary, word)
+        end = bisect_left(self._vocabulary, word + "\uffff", lo=start)
+        merged: dict[int, float] = {}
+        for term in self._vocabulary[start:min(end, start + MAX_PREFIX_EXPANSIONS)]:
+            for pos, score in self._postings[term].items():
+                score *= PREFIX_MATCH_WEIGHT
+                if score > merged.get(pos, 0.0):
+                    merged[pos] = score
+        return merged
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        accept: Optional[Callable[[int], bool]] = None,
+    ) -> list[int]:
+        """
+        Return positions of matching products, best match first.
+        ``accept`` filters positions before ranking; ``limit`` keeps the top-k.
+        """
+        words = {}
+        for word in dict.fromkeys(tokenize(query)):
+            scores = self._word_scores(word)
+            if scores:
+                words[word] = scores
+        if not words:
+            return []
+        if len(words) == 1:
+            [(word, scores)] = words.items()
+            return self._rank_single(word, scores, accept, limit)
+        per_word = sorted(words.values(), key=len)
+
+        # Products matching every word; set intersections run in C
+        full = set(per_word[0])
+        for scores in per_word[1:]:
+            full.intersection_update(scores)
+        ranked = self._rank(full, per_word, accept, limit)
+        if limit is not None and len(ranked) >= limit:
+            return ranked
+
+        # Not enough full matches: follow with partial matches
+        partial: dict[int, int] = {}
+        for scores in per_word:
+            for pos in scores:
+                if pos not in full:
+                    partial[pos] = partial.get(pos, 0) + 1
+        remaining = None if limit is None else limit - len(ranked)
+        for coverage in range(len(per_word) - 1, 0, -1):
+            tier = [pos for pos, count in partial.items() if count == coverage]
+            ranked.extend(self._rank(tier, per_word, accept, remaining))
+            if remaining is not None:
+                remaining = limit - len(ranked)
+                if remaining <= 0:
+                    break
+        return ranked
+
+    def _rank_single(
+        self,
+        word: str,
+        scores: dict[int, float],
+        accept: Optional[Callable[[int], bool]],
+        limit: Optional[int],
+    ) -> list[int]:
+        if word not in self._postings:
+            return self._rank(scores, [scores], accept, limit)
+
+        order = self._ranked.get(word)
+        if order is None:
+            order = sorted(scores, key=lambda pos: (-scores[pos], pos))
+            self._ranked[word] = order
+        if accept is None:
+            return order[:limit]
+        ranked = []
+        for pos in order:
+            if accept(pos):
+                ranked.append(pos)
+                if limit is not None and len(ranked) >= limit:
+                    break
+        return ranked
+
+    @staticmethod
+    def _rank(
+        positions: Iterable[int],
+        per_word: list[dict[int, float]],
+        accept: Optional[Callable[[int], bool]],
+        limit: Optional[int],
+    ) -> list[int]:
+        if accept is not None:
+            positions = [pos for pos in positions if accept(pos)]
+
+        def key(pos: int) -> tuple[float, int]:
+            return -sum(scores.get(pos, 0.0) for scores in per_word), pos
+
+        if limit is not None:
+            return heapq.nsmallest(limit, positions, key=key)
+        return sorted(positions, key=key)
+
+
+def soundex(word: str) -> str:
+    """Four-character Soundex code, so words that sound alike share a key."""
+    codes = {
+        **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"),
+        **dict.fromkeys("dt", "3"), "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+    }
+    word = "".join(c for c in word.lower() if c.isalpha())
+    if not word:
+        return ""
+    key = word[0].upper()
+    last = codes.get(word[0], "")
+    for c in word[1:]:
+        code = codes.get(c, "")
+        if code and code != last:
+            key += code
+            if len(key) == 4:
+                break
+        if c not in "hw":
+            last = code
+    return key.ljust(4, "0")
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """
+    Levenshtein distance between a and b, or None if it exceeds max_distance.
+    Gives up as soon as every cell in a row is over the bound.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if min(current) > max_distance:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+def _trigrams(word: str) -> set[str]:
+    padded = f"^{word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ProductResolver:
+    """
+    Maps free text, such as a speech transcript, to the most likely products.
+
+    Works at the vocabulary level: each query word is matched against the
+    words of product names, categories and colors exactly, by Soundex key, or
+    within a small edit distance. Candidate words come from a character
+    trigram index, so only a handful of words are ever compared. Adjacent
+    query words are also tried joined ("key board" -> "keyboard").
+    """
+
+    def __init__(self, products: Sequence[dict]) -> None:
+        # word -> {product position: field weight}
+        self._words: dict[str, dict[int, float]] = {}
+        for pos, product in enumerate(products):
+            for field, weight in RESOLVE_FIELDS.items():
+                for word in self._split(str(product.get(field, ""))):
+                    entry = self._words.setdefault(word, {})
+                    entry[pos] = max(entry.get(pos, 0.0), weight)
+
+        self._by_trigram: dict[str, set[str]] = {}
+        self._by_sound: dict[str, set[str]] = {}
+        for word in self._words:
+            for gram in _trigrams(word):
+                self._by_trigram.setdefault(gram, set()).add(word)
+            self._by_sound.setdefault(soundex(word), set()).add(word)
+
+    @staticmethod
+    def _split(text: str) -> list[str]:
+        text = text.lower()
+        words = _WORD_RE.findall(text)
+        words.extend(m.group().replace("-", "").replace("'", "") for m in _COMPOUND_RE.finditer(text))
+        return [w for w in words if len(w) > 1 and w not in STOP_WORDS and not w.isdigit()]
+
+    def _similar(self, word: str) -> dict[str, float]:
+        """Vocabulary words close to word, with a 0-1 similarity."""
+        if word in self._words:
+            return {word: 1.0}
+
+        similar = {}
+        for candidate in self._by_sound.get(soundex(word), ()):
+            similar[candidate] = SOUND_MATCH_SIMILARITY
+
+        max_distance = MAX_EDIT_DISTANCE if len(word) > 4 else 1
+        grams = _trigrams(word)
+        shared: dict[str, int] = {}
+        for gram in grams:
+            for candidate in self._by_trigram.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        # Each edit can break at most three trigrams
+        min_shared = len(grams) - 3 * max_distance
+        for candidate, count in shared.items():
+            if count < min_shared:
+                continue
+            distance = edit_distance(word, candidate, max_distance)
+            if distance is not None:
+                score = 1.0 - distance / max(len(word), len(candidate))
+                similar[candidate] = max(similar.get(candidate, 0.0), score)
+        return similar
+
+    def resolve(self, text: str, limit: int = 3) -> list[tuple[int, float]]:
+        """Return (position, confidence) for the best matching products."""
+        words = self._split(text)
+        if not words:
+            return []
+        # Each unit covers one word, or two when adjacent words are joined
+        units = [(w, 1) for w in words]
+        units.extend((a + b, 2) for a, b in zip(words, words[1:]))
+
+        scores: dict[int, float] = {}
+        for unit, span in units:
+            best: dict[int, float] = {}
+            for word, similarity in self._similar(unit).items():
+                for pos, weight in self._words[word].items():
+                    best[pos] = max(best.get(pos, 0.0), similarity * weight * span)
+            for pos, score in best.items():
+                scores[pos] = scores.get(pos, 0.0) + score
+
+        ranked = sorted(
+            ((pos, min(score / len(words), 1.0)) for pos, score in scores.items()),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return [item for item in ranked[:limit] if item[1] >= MIN_RESOLVE_CONFIDENCE]
+
+
+class CatalogColumns:
+    """
+    Per-product filter columns, with category and color dictionary-encoded.
+
+    Built in memory from a product list, or handed out by a memory-mapped
+    catalog (see catalog_store) as views over the file, so the same query
+    code serves both.
+    """
+
+    def __init__(
+        self,
+        *,
+        categories: list[str],
+        colors: list[str],
+        category_codes: Sequence[int],
+        color_codes: Sequence[int],
+        prices: Sequence[int],
+        price_order: Sequence[int],
+        sorted_prices: Sequence[int],
+        by_category: dict[int, Sequence[int]],
+        by_color: dict[int, Sequence[int]],
+        ids,
+    ) -> None:
+        self.categories = categories
+        self.colors = colors
+        self.category_codes = category_codes
+        self.color_codes = color_codes
+        self.prices = prices
+        self.price_order = price_order
+        self.sorted_prices = sorted_prices
+        self.by_category = by_category
+        self.by_color = by_color
+        # Anything with get(product_id) -> position or None
+        self.ids = ids
+
+    @classmethod
+    def build(cls, products: Sequence[dict]) -> "CatalogColumns":
+        categories: dict[str, int] = {}
+        colors: dict[str, int] = {}
+        category_codes = [
+            categories.setdefault(p.get("category", "").lower(), len(categories))
+            for p in products
+        ]
+        color_codes = [
+            colors.setdefault(p.get("color", "").lower(), len(colors))
+            for p in products
+        ]
+        by_category: dict[int, list[int]] = {}
+        by_color: dict[int, list[int]] = {}
+        for pos in range(len(products)):
+            by_category.setdefault(category_codes[pos], []).append(pos)
+            by_color.setdefault(color_codes[pos], []).append(pos)
+
+        prices = [p["price"] for p in products]
+        price_order = sorted(range(len(products)), key=prices.__getitem__)
+        return cls(
+            categories=list(categories),
+            colors=list(colors),
+            category_codes=category_codes,
+            color_codes=color_codes,
+            prices=prices,
+            price_order=price_order,
+            sorted_prices=[prices[pos] for pos in price_order],
+            by_category=by_category,
+            by_color=by_color,
+            ids={p["id"]: pos for pos, p in enumerate(products)},
+        )
+
+
+class CatalogIndex:
+    """
+    Read-only lookup structures for a product list.
+
+    Products are addressed by their position in the list. Category and color
+    filters use hash indexes, ``max_price`` uses a price-sorted array, and a
+    query walks only the smallest candidate set and checks the remaining
+    filters against precomputed columns.
+
+    ``products`` may be a plain list, or a mapped catalog that provides its
+    own columns. The text indexes are built on first use, or up front by
+    warm().
+    """
+
+    def __init__(self, products: Sequence[dict]) -> None:
+        if hasattr(products, "columns"):
+            self.products = products
+            self._columns = products.columns()
+        else:
+            self.products = list(products)
+            self._columns = CatalogColumns.build(self.products)
+
+        self._category_code = {c: code for code, c in enumerate(self._columns.categories)}
+        self._color_code = {c: code for code, c in enumerate(self._columns.colors)}
+        self._search: Optional[SearchIndex] = None
+        self._resolver: Optional[ProductResolver] = None
+        # Lowercased "name\ndescription" per product, for substring search
+        self._text: Optional[list[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def _search_index(self) -> SearchIndex:
+        if self._search is None:
+            self._search = SearchIndex(self.products)
+        return self._search
+
+    def _product_resolver(self) -> ProductResolver:
+        if self._resolver is None:
+            self._resolver = ProductResolver(self.products)
+        return self._resolver
+
+    def _substring_text(self) -> list[str]:
+        if self._text is None:
+            self._text = [
+                f"{p['name']}\n{p.get('description', '')}".lower() for p in self.products
+            ]
+        return self._text
+
+    def warm(self) -> "CatalogIndex":
+        """
+        Build the text indexes now, instead of on the first search or
+        resolve. Takes roughly a second per 10k products.
+        """
+        self._search_index()
+        self._product_resolver()
+        self._substring_text()
+        return self
+
+    def get(self, product_id: str) -> Optional[dict]:
+        """Look up a product by ID."""
+        pos = self._columns.ids.get(product_id)
+        return self.products[pos] if pos is not None else None
+
+    def get_many(self, product_ids: Sequence[str]) -> list[Optional[dict]]:
+        """Look up several products at once, None for unknown IDs."""
+        ids = self._columns.ids
+        products = self.products
+        positions = [ids.get(pid) for pid in product_ids]
+        return [products[pos] if pos is not None else None for pos in positions]
+
+    def resolve(self, text: str, limit: int = 3) -> list[tuple[dict, float]]:
+        """
+        Best guesses for the product a customer means, with confidence.
+        An exact product ID in the text wins outright.
+        """
+        for token in re.findall(r"[a-z]+-\d+", text.lower()):
+            product = self.get(token)
+            if product is not None:
+                return [(product, 1.0)]
+        return [
+            (self.products[pos], score)
+            for pos, score in self._product_resolver().resolve(text, limit)
+        ]
+
+    def categories(self) -> list[str]:
+        """Distinct normalized categories in the catalog."""
+        return list(self._columns.categories)
+
+    def _matches(
+        self,
+        pos: int,
+        category: Optional[int],
+        color: Optional[int],
+        max_price: Optional[int],
+    ) -> bool:
+        columns = self._columns
+        return (
+            (category is None or columns.category_codes[pos] == category)
+            and (color is None or columns.color_codes[pos] == color)
+            and (not max_price or columns.prices[pos] <= max_price)
+        )
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        max_price: Optional[int] = None,
+        color: Optional[str] = None,
+        search: Optional[str] = None,
+        limit: Optional[int] = None,
+        ranked: bool = False,
+    ) -> list[dict]:
+        """
+        Return up to limit products matching every given filter.
+        Results are in catalog order, and search is a substring match on
+        name and description. With ranked, search goes through the search
+        index instead and the best matches come first.
+        Cost is proportional to the smallest candidate set, not the catalog,
+        and only the products returned are read from the catalog.
+        """
+        columns = self._columns
+        category_code = color_code = None
+        if category:
+            category_code = self._category_code.get(category.lower())
+            if category_code is None:
+                return []
+        if color:
+            color_code = self._color_code.get(color.lower())
+            if color_code is None:
+                return []
+
+        if search and ranked:
+            accept = None
+            if category or color or max_price:
+                def accept(pos: int) -> bool:
+                    return self._matches(pos, category_code, color_code, max_price)
+            positions = self._search_index().search(search, limit=limit, accept=accept)
+            return [self.products[pos] for pos in positions]
+
+        candidates: list[Sequence[int]] = []
+        if category_code is not None:
+            candidates.append(columns.by_category[category_code])
+        if color_code is not None:
+            candidates.append(columns.by_color[color_code])
+        price_cutoff = None
+        if max_price:
+            price_cutoff = bisect_right(columns.sorted_prices, max_price)
+
+        if candidates or price_cutoff is not None:
+            driver = min(candidates, key=len) if candidates else None
+            if driver is None or (price_cutoff is not None and price_cutoff < len(driver)):
+                driver = columns.price_order[:price_cutoff]
+            positions = sorted(
+                pos for pos in driver
+                if self._matches(pos, category_code, color_code, max_price)
+            )
+        else:
+            positions = range(len(self.products))
+
+        if search:
+            needle = search.lower()
+            text = self._substring_text()
+            positions = [pos for pos in positions if needle in text[pos]]
+
+        if limit is not None:
+            positions = positions[:limit]
+        return [self.products[pos] for pos in positions]
@@ -0,0 +1,338 @@
+"""
+Compiled, memory-mapped product catalog.
+
+shared-data/catalog.json is the editable source of truth. It is compiled
+into a columnar binary file that every agent process maps read-only, so the
+OS keeps one copy of the pages no matter how many job processes run, and
+startup never parses the full JSON.
+
+Usage:
+    uv run python src/catalog_store.py compile [--source PATH] [--out PATH]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Optional
+
+from catalog import CatalogColumns
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SOURCE = Path(os.environ.get("CATALOG_SOURCE", "../shared-data/catalog.json"))
+CATALOG_COMPILED = Path(os.environ.get("CATALOG_COMPILED", "../shared-data/catalog.bin"))
+
+# How often, at most, to stat the catalog files for changes
+RELOAD_CHECK_INTERVAL = 1.0
+
+MAGIC = b"SHOPCAT1"
+# magic, product count, byte length of the JSON metadata block that follows
+_HEADER = struct.Struct("<8sII")
+
+# Section name -> array typecode. All sections are little-endian.
+_SECTIONS = {
+    "prices": "i",
+    "category_codes": "H",
+    "color_codes": "H",
+    "price_order": "I",
+    "sorted_prices": "i",
+    "category_positions": "I",
+    "color_positions": "I",
+    "id_slots": "I",
+    "id_offsets": "Q",
+    "ids": "B",
+    "record_offsets": "Q",
+    "records": "B",
+}
+
+
+def _id_hash(product_id: bytes) -> int:
+    return zlib.crc32(product_id)
+
+
+def _grouped_positions(codes: Sequence[int], n_codes: int) -> tuple[array, list[list[int]]]:
+    """Positions grouped by code, plus each code's [start, end) in that array."""
+    groups: list[list[int]] = [[] for _ in range(n_codes)]
+    for pos, code in enumerate(codes):
+        groups[code].append(pos)
+    positions = array("I")
+    ranges = []
+    for group in groups:
+        ranges.append([len(positions), len(positions) + len(group)])
+        positions.extend(group)
+    return positions, ranges
+
+
+def _pack_blobs(blobs: Sequence[bytes]) -> tuple[array, array]:
+    """Concatenate blobs, returning (offsets, data); blob i is data[offsets[i]:offsets[i + 1]]."""
+    offsets = array("Q", [0])
+    data = bytearray()
+    for blob in blobs:
+        data += blob
+        offsets.append(len(data))
+    return offsets, array("B", data)
+
+
+def compile_catalog(products: Sequence[dict], out_path: Path):
+    """
+    Write products to out_path in the mapped catalog format.
+    The file is written next to out_path and renamed into place, so readers
+    only ever see a complete catalog.
+    """
+    if sys.byteorder != "little":
+        raise RuntimeError("Catalog compilation requires a little-endian host")
+
+    columns = CatalogColumns.build(products)
+    sections: dict[str, array] = {
+        "prices": array("i", columns.prices),
+        "category_codes": array("H", columns.category_codes),
+        "color_codes": array("H", columns.color_codes),
+        "price_order": array("I", columns.price_order),
+        "sorted_prices": array("i", columns.sorted_prices),
+    }
+    sections["category_positions"], category_ranges = _grouped_positions(
+        columns.category_codes, len(columns.categories)
+    )
+    sections["color_positions"], color_ranges = _grouped_positions(
+        columns.color_codes, len(columns.colors)
+    )
+
+    # Open-addressing hash table: slot holds position + 1, 0 means empty
+    encoded_ids = [p["id"].encode() for p in products]
+    n_slots = 1
+    while n_slots < 2 * max(len(products), 1):
+        n_slots *= 2
+    id_slots = array("I", bytes(4 * n_slots))
+    for pos, product_id in enumerate(encoded_ids):
+        slot = _id_hash(product_id) & (n_slots - 1)
+        while id_slots[slot]:
+            slot = (slot + 1) & (n_slots - 1)
+        id_slots[slot] = pos + 1
+    sections["id_slots"] = id_slots
+
+    records = [json.dumps(p, ensure_ascii=False, separators=(",", ":")).encode() for p in products]
+    sections["id_offsets"], sections["ids"] = _pack_blobs(encoded_ids)
+    sections["record_offsets"], sections["records"] = _pack_blobs(records)
+
+    # Lay sections out after the metadata, each 8-byte aligned
+    meta = {
+        "categories": columns.categories,
+        "colors": columns.colors,
+        "category_ranges": category_ranges,
+        "color_ranges": color_ranges,
+        "sections": {},
+    }
+    body = bytearray()
+    for name in _SECTIONS:
+        body += bytes(-len(body) % 8)
+        meta["sections"][name] = [len(body), len(sections[name])]
+        body += sections[name].tobytes()
+
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode()
+    meta_bytes += b" " * (-(_HEADER.size + len(meta_bytes)) % 8)
+    header = _HEADER.pack(MAGIC, len(products), len(meta_bytes))
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=out_path.parent, prefix=out_path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(meta_bytes)
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        # Readable by every worker, whichever user compiled it
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, out_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
+class _IdTable:
+    """Hash lookup from product ID to position, read from the mapped file."""
+
+    def __init__(self, catalog: "MappedCatalog") -> None:
+        self._slots = catalog._section("id_slots")
+        self._offsets = catalog._section("id_offsets")
+        self._ids = catalog._section("ids")
+        self._mask = len(self._slots) - 1
+
+    def get(self, product_id: str) -> Optional[int]:
+        key = product_id.encode()
+        slot = _id_hash(key) & self._mask
+        while True:
+            entry = self._slots[slot]
+            if not entry:
+                return None
+            pos = entry - 1
+            if self._ids[self._offsets[pos]:self._offsets[pos + 1]] == key:
+                return pos
+            slot = (slot + 1) & self._mask
+
+
+class MappedCatalog(Sequence):
+    """
+    Read-only view over a compiled catalog file.
+    Indexing decodes one product record; nothing else is copied out of the map.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.mtime_ns = stat.st_mtime_ns
+        self.inode = stat.st_ino
+        self._view = memoryview(self._mmap)
+
+        magic, self._count, meta_len = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a compiled catalog")
+        self._meta = json.loads(bytes(self._view[_HEADER.size:_HEADER.size + meta_len]))
+        self._body_start = _HEADER.size + meta_len
+        self._record_offsets = self._section("record_offsets")
+        self._records = self._section("records")
+
+    def _section(self, name: str) -> memoryview:
+        start, count = self._meta["sections"][name]
+        typecode = _SECTIONS[name]
+        nbytes = count * array(typecode).itemsize
+        start += self._body_start
+        return self._view[start:start + nbytes].cast(typecode)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(self._count))]
+        if pos < 0:
+            pos += self._count
+        if not 0 <= pos < self._count:
+            raise IndexError("catalog index out of range")
+        start, end = self._record_offsets[pos], self._record_offsets[pos + 1]
+        return json.loads(bytes(self._records[start:end]))
+
+    def columns(self) -> CatalogColumns:
+        """Filter columns as views over the mapped file."""
+        category_positions = self._section("category_positions")
+        color_positions = self._section("color_positions")
+        return CatalogColumns(
+            categories=self._meta["categories"],
+            colors=self._meta["colors"],
+            category_codes=self._section("category_codes"),
+            color_codes=self._section("color_codes"),
+            prices=self._section("prices"),
+            price_order=self._section("price_order"),
+            sorted_prices=self._section("sorted_prices"),
+            by_category={
+                code: category_positions[start:end]
+                for code, (start, end) in enumerate(self._meta["category_ranges"])
+            },
+            by_color={
+                code: color_positions[start:end]
+                for code, (start, end) in enumerate(self._meta["color_ranges"])
+            },
+            ids=_IdTable(self),
+        )
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class CatalogWatcher:
+    """
+    Keeps a mapped catalog in sync with its files.
+
+    load() returns the current catalog, compiling the JSON source first if
+    the compiled file is missing or older. poll() stats the files at most
+    once per interval and returns a freshly mapped catalog only when
+    something changed; due() says whether the interval has passed.
+    """
+
+    def __init__(
+        self,
+        source: Path = CATALOG_SOURCE,
+        compiled: Path = CATALOG_COMPILED,
+        check_interval: float = RELOAD_CHECK_INTERVAL,
+    ) -> None:
+        self.source = Path(source)
+        self.compiled = Path(compiled)
+        self.check_interval = check_interval
+        self._current: Optional[MappedCatalog] = None
+        self._next_check = 0.0
+
+    def _compile_if_stale(self):
+        source_mtime = _mtime_ns(self.source)
+        compiled_mtime = _mtime_ns(self.compiled)
+        if source_mtime is None:
+            if compiled_mtime is None:
+                raise FileNotFoundError(f"No catalog at {self.source} or {self.compiled}")
+            return
+        if compiled_mtime is None or compiled_mtime < source_mtime:
+            with open(self.source, encoding="utf-8") as f:
+                products = json.load(f)["products"]
+            compile_catalog(products, self.compiled)
+            logger.info(f"Compiled {len(products)} products into {self.compiled}")
+
+    def load(self) -> MappedCatalog:
+        self._compile_if_stale()
+        self._current = MappedCatalog(self.compiled)
+        self._next_check = time.monotonic() + self.check_interval
+        return self._current
+
+    def due(self) -> bool:
+        """Whether poll() would check the files now."""
+        return time.monotonic() >= self._next_check
+
+    def poll(self) -> Optional[MappedCatalog]:
+        """Return a newly mapped catalog if the files changed, else None."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return None
+        self._next_check = now + self.check_interval
+
+        current = self._current
+        try:
+            self._compile_if_stale()
+            stat = self.compiled.stat()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Catalog reload check failed: {e}")
+            return None
+        if current is not None and (stat.st_ino, stat.st_mtime_ns) == (current.inode, current.mtime_ns):
+            return None
+        return self.load()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the product catalog")
+    parser.add_argument("command", choices=["compile"])
+    parser.add_argument("--source", type=Path, default=CATALOG_SOURCE)
+    parser.add_argument("--out", type=Path, default=CATALOG_COMPILED)
+    args = parser.parse_args()
+
+    with open(args.source, encoding="utf-8") as f:
+        products = json.load(f)["products"]
+    compile_catalog(products, args.out)
+    print(f"Compiled {len(products)} products into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
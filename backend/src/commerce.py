@@ -3,255 +3,286 @@ E-commerce backend following ACP-inspired patterns.
 Handles product catalog, cart, and order management.
 """
 
-import json
+import asyncio
+import functools
+import logging
+import os
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from pathlib import Path
-from typing import Optional
-
-# Product catalog
-PRODUCTS = [
-    {
-        "id": "mug-001",
-        "name": "Cyberpunk Coffee Mug",
-        "description": "Neon-lit ceramic mug with LED base",
-        "price": 899,
-        "currency": "INR",
-        "category": "mug",
-        "color": "black",
-        "stock": 15,
-        "image": "☕"
-    },
-    {
-        "id": "mug-002",
-        "name": "Hacker's Energy Mug",
-        "description": "Extra large mug for long coding sessions",
-        "price": 1299,
-        "currency": "INR",
-        "category": "mug",
-        "color": "white",
-        "stock": 8,
-        "image": "☕"
-    },
-    {
-        "id": "tshirt-001",
-        "name": "Neural Network T-Shirt",
-        "description": "100% cotton with circuit board design",
-        "price": 799,
-        "currency": "INR",
-        "category": "tshirt",
-        "color": "black",
-        "size": ["S", "M", "L", "XL"],
-        "stock": 25,
-        "image": "👕"
-    },
-    {
-        "id": "tshirt-002",
-        "name": "AI Developer Tee",
-        "description": "Soft fabric with 'Powered by AI' print",
-        "price": 699,
-        "currency": "INR",
-        "category": "tshirt",
-        "color": "navy",
-        "size": ["S", "M", "L", "XL"],
-        "stock": 30,
-        "image": "👕"
-    },
-    {
-        "id": "hoodie-001",
-        "name": "Cyberpunk Hoodie",
-        "description": "Premium hoodie with neon accents",
-        "price": 1999,
-        "currency": "INR",
-        "category": "hoodie",
-        "color": "black",
-        "size": ["M", "L", "XL"],
-        "stock": 12,
-        "image": "🧥"
-    },
-    {
-        "id": "hoodie-002",
-        "name": "Code Warrior Hoodie",
-        "description": "Warm and comfortable for late-night coding",
-        "price": 2299,
-        "currency": "INR",
-        "category": "hoodie",
-        "color": "gray",
-        "size": ["M", "L", "XL"],
-        "stock": 10,
-        "image": "🧥"
-    },
-    {
-        "id": "cap-001",
-        "name": "Tech Geek Cap",
-        "description": "Adjustable cap with embroidered logo",
-        "price": 499,
-        "currency": "INR",
-        "category": "cap",
-        "color": "black",
-        "stock": 20,
-        "image": "🧢"
-    },
-    {
-        "id": "bag-001",
-        "name": "Developer Backpack",
-        "description": "Laptop compartment with USB charging port",
-        "price": 2499,
-        "currency": "INR",
-        "category": "bag",
-        "color": "black",
-        "stock": 8,
-        "image": "🎒"
-    },
-    {
-        "id": "mouse-001",
-        "name": "RGB Gaming Mouse",
-        "description": "Ergonomic design with customizable RGB",
-        "price": 1499,
-        "currency": "INR",
-        "category": "accessory",
-        "color": "black",
-        "stock": 15,
-        "image": "🖱️"
-    },
-    {
-        "id": "keyboard-001",
-        "name": "Mechanical Keyboard",
-        "description": "Cherry MX switches with RGB backlight",
-        "price": 3999,
-        "currency": "INR",
-        "category": "accessory",
-        "color": "black",
-        "stock": 6,
-        "image": "⌨️"
-    }
-]
+from typing import Callable, Optional
+
+from carts import Cart, CartStore
+from catalog import CatalogIndex
+from catalog_store import CatalogWatcher
+from order_store import open_order_store
+
+logger = logging.getLogger(__name__)
+
+# Product catalog, memory-mapped from the compiled shared-data/catalog.json.
+# Reloaded automatically when either file changes on disk.
+_catalog_watcher = CatalogWatcher()
+PRODUCTS = _catalog_watcher.load()
+
+# Catalog indexes, rebuilt whenever the catalog is reloaded. The text
+# indexes are built by warm_catalog() at prewarm, or on first use.
+_catalog = CatalogIndex(PRODUCTS)
+
+# Reloads after a file change are built here, off the event loop, and
+# swapped in once their indexes are complete
+_reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-reload")
+_reloading: Optional[Future] = None
+
+# Order storage, JSON files unless ORDER_STORE selects SQLite (see order_store.py)
+order_store = open_order_store()
+
+# Session carts (in-memory), keyed by carts.session_key()
+cart_store = CartStore()
+
+# Threads for order storage I/O, so the async API never blocks the event loop
+COMMERCE_IO_THREADS = int(os.environ.get("COMMERCE_IO_THREADS", "4"))
+_io_executor = ThreadPoolExecutor(max_workers=COMMERCE_IO_THREADS, thread_name_prefix="commerce-io")
+
+
+# Callbacks for cart and order changes, called as fn(event, session_id, data):
+# "cart" with the updated cart, or "order" with a new order. They run where
+# the change was made, i.e. on the event loop for the agent.
+Listener = Callable[[str, str, dict], None]
+_listeners: list[Listener] = []
+
+EMPTY_CART = {"items": [], "total": 0, "currency": "INR"}
+
 
-# Order storage
-ORDERS_DIR = Path("../shared-data/orders")
-ORDERS_DIR.mkdir(parents=True, exist_ok=True)
-ORDER_HISTORY_FILE = ORDERS_DIR / "order_history.json"
+def add_listener(fn: Listener):
+    _listeners.append(fn)
 
-# Session carts (in-memory)
-session_carts = {}
+
+def remove_listener(fn: Listener):
+    if fn in _listeners:
+        _listeners.remove(fn)
+
+
+def _notify(event: str, session_id: str, data: dict):
+    for fn in list(_listeners):
+        try:
+            fn(event, session_id, data)
+        except Exception:
+            logger.exception(f"Commerce listener failed on {event} for {session_id}")
+
+
+def _notify_cart(session_id: str, cart: Cart):
+    # Building the view copies every line, so only do it for a listener
+    if _listeners:
+        _notify("cart", session_id, cart.view())
+
+
+async def _run_io(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, functools.partial(fn, *args, **kwargs))
 
 
 def list_products(
     category: Optional[str] = None,
     max_price: Optional[int] = None,
     color: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    limit: Optional[int] = None,
 ) -> list[dict]:
     """
-    List products with optional filters.
-    ACP-inspired catalog browsing.
+    List products with optional filters, in catalog order.
+    ACP-inspired catalog browsing. Pass limit when only the first few are
+    needed: products past it are never read from the catalog.
     """
-    results = PRODUCTS.copy()
-    
-    if category:
-        results = [p for p in results if p.get("category", "").lower() == category.lower()]
-    
-    if max_price:
-        results = [p for p in results if p["price"] <= max_price]
-    
-    if color:
-        results = [p for p in results if p.get("color", "").lower() == color.lower()]
-    
-    if search:
-        search_lower = search.lower()
-        results = [
-            p for p in results
-            if search_lower in p["name"].lower() or search_lower in p.get("description", "").lower()
-        ]
-    
-    return results
+    return _current_catalog().query(
+        category=category,
+        max_price=max_price,
+        color=color,
+        search=search,
+        limit=limit,
+    )
+
+
+def search_products(
+    query: str,
+    limit: int = 5,
+    category: Optional[str] = None,
+    max_price: Optional[int] = None,
+    color: Optional[str] = None,
+) -> list[dict]:
+    """
+    Full-text product search, best matches first.
+    Matches name, description, category and color, including word prefixes.
+    """
+    return _current_catalog().query(
+        category=category,
+        max_price=max_price,
+        color=color,
+        search=query,
+        limit=limit,
+        ranked=True,
+    )
+
+
+def resolve_products(text: str, limit: int = 3) -> list[dict]:
+    """
+    Map free text (e.g. a speech transcript) to the most likely products.
+    Tolerates misspellings, sound-alikes and split words ("key board").
+    """
+    return [product for product, _ in _current_catalog().resolve(text, limit)]
 
 
 def get_product_by_id(product_id: str) -> Optional[dict]:
     """Get a specific product by ID."""
-    for product in PRODUCTS:
-        if product["id"] == product_id:
-            return product
-    return None
+    return _current_catalog().get(product_id)
+
+
+def get_products_by_ids(product_ids: list[str]) -> list[Optional[dict]]:
+    """
+    Get several products by ID in one pass.
+    Returns a list aligned with product_ids, None where an ID is unknown.
+    """
+    return _current_catalog().get_many(product_ids)
+
+
+def warm_catalog():
+    """Build the catalog's search and resolver indexes now, e.g. at prewarm."""
+    _current_catalog().warm()
+
+
+def current_catalog() -> CatalogIndex:
+    """
+    The catalog index in use, after picking up any change to the catalog
+    files. Each reload gives a new object, so it can key caches.
+    """
+    return _current_catalog()
+
+
+def _current_catalog() -> CatalogIndex:
+    """
+    The catalog index. When the catalog files may have changed, a reload
+    starts in the background; the current index serves until it is done.
+    """
+    global _reloading
+
+    if _catalog_watcher.due() and (_reloading is None or _reloading.done()):
+        _reloading = _reload_executor.submit(_reload_from_files)
+    return _catalog
+
+
+def _reload_from_files():
+    global PRODUCTS, _catalog
+
+    try:
+        mapped = _catalog_watcher.poll()
+        if mapped is None:
+            return
+        # Build fully before swapping so readers never see a half-built index
+        index = CatalogIndex(mapped).warm()
+    except Exception:
+        logger.exception("Catalog reload failed")
+        return
+    PRODUCTS, _catalog = mapped, index
+    logger.info(f"Reloaded catalog: {len(mapped)} products")
+
+
+def reload_catalog(products: Optional[list[dict]] = None):
+    """
+    Rebuild the catalog indexes, text indexes included.
+    Pass a new product list to replace the catalog in this process, or None
+    to re-index PRODUCTS after it was edited in place. This blocks for as
+    long as the build takes, so call it off the event loop for a large catalog.
+    """
+    global PRODUCTS, _catalog
+
+    if products is not None:
+        PRODUCTS = list(products)
+    # Build fully before swapping so readers never see a half-built index
+    _catalog = CatalogIndex(PRODUCTS).warm()
+
+
+def upsert_product(product: dict):
+    """Add a product, or replace the one with the same ID, in this process."""
+    if _catalog.get(product["id"]) is not None:
+        products = [product if p["id"] == product["id"] else p for p in PRODUCTS]
+    else:
+        products = [*PRODUCTS, product]
+    reload_catalog(products)
+
+
+def remove_product(product_id: str) -> bool:
+    """Remove a product from this process's catalog. Returns False if it wasn't there."""
+    if _catalog.get(product_id) is None:
+        return False
+    reload_catalog([p for p in PRODUCTS if p["id"] != product_id])
+    return True
+
+
+def _priced(session_id: str, cart: Cart) -> Cart:
+    """Make sure cart prices come from the current catalog, repricing after a reload."""
+    catalog = _current_catalog()
+    if cart.priced_by is not catalog:
+        if cart.priced_by is not None:
+            removed = cart.reprice(catalog, catalog.get_many)
+            cart_store.lines_changed(session_id, -removed)
+        cart.priced_by = catalog
+    return cart
 
 
 def add_to_cart(session_id: str, product_id: str, quantity: int = 1, size: Optional[str] = None) -> dict:
     """
     Add item to session cart.
-    Returns updated cart.
+    Returns the changed line and the cart total; get_cart() has the whole cart.
     """
-    if session_id not in session_carts:
-        session_carts[session_id] = {"items": []}
-    
-    cart = session_carts[session_id]
+    product = get_product_by_id(product_id)
+    if product is None:
+        raise ValueError(f"Product {product_id} not found")
     
-    # Check if item already in cart
-    for item in cart["items"]:
-        if item["product_id"] == product_id and item.get("size") == size:
-            item["quantity"] += quantity
-            return cart
+    cart = _priced(session_id, cart_store.get_or_create(session_id))
+    cart_store.lines_changed(session_id, cart.add(product, quantity, size))
     
-    # Add new item
-    cart["items"].append({
-        "product_id": product_id,
-        "quantity": quantity,
-        "size": size
-    })
-    
-    return cart
+    _notify_cart(session_id, cart)
+    return {"item": dict(cart.line(product_id, size)), "total": cart.total, "currency": EMPTY_CART["currency"]}
 
 
 def remove_from_cart(session_id: str, product_id: str) -> dict:
-    """Remove item from cart."""
-    if session_id not in session_carts:
-        return {"items": []}
+    """
+    Remove item from cart, whatever the size.
+    Returns the number of lines removed and the cart total.
+    """
+    cart = cart_store.get(session_id)
+    if cart is None:
+        return {"removed": 0, "total": 0, "currency": EMPTY_CART["currency"]}
     
-    cart = session_carts[session_id]
-    cart["items"] = [item for item in cart["items"] if item["product_id"] != product_id]
+    removed = cart.remove(product_id)
+    cart_store.lines_changed(session_id, -removed)
     
-    return cart
+    if removed:
+        _notify_cart(session_id, cart)
+    return {"removed": removed, "total": cart.total, "currency": EMPTY_CART["currency"]}
 
 
 def get_cart(session_id: str) -> dict:
-    """Get current cart for session."""
-    if session_id not in session_carts:
+    """
+    Get current cart for session, enriched with names, prices and totals.
+    Totals are kept up to date on every change, so this is O(1) until the
+    cart changes or the catalog is reloaded.
+    """
+    cart = cart_store.get(session_id)
+    if cart is None:
         return {"items": []}
     
-    cart = session_carts[session_id]
-    
-    # Enrich with product details
-    enriched_items = []
-    total = 0
-    
-    for item in cart["items"]:
-        product = get_product_by_id(item["product_id"])
-        if product:
-            item_total = product["price"] * item["quantity"]
-            enriched_items.append({
-                **item,
-                "name": product["name"],
-                "price": product["price"],
-                "currency": product["currency"],
-                "item_total": item_total
-            })
-            total += item_total
-    
-    return {
-        "items": enriched_items,
-        "total": total,
-        "currency": "INR"
-    }
+    return _priced(session_id, cart).view()
 
 
 def clear_cart(session_id: str):
     """Clear the cart for a session."""
-    if session_id in session_carts:
-        session_carts[session_id] = {"items": []}
+    cart_store.discard(session_id)
+    _notify("cart", session_id, EMPTY_CART)
 
 
-def create_order(session_id: str, buyer_name: Optional[str] = None) -> dict:
+def _build_order(session_id: str, buyer_name: Optional[str] = None) -> dict:
     """
-    Create an order from cart contents.
+    Build an order from cart contents.
     ACP-inspired order creation.
     """
     cart = get_cart(session_id)
@@ -285,26 +316,16 @@ def create_order(session_id: str, buyer_name: Optional[str] = None) -> dict:
         "updated_at": datetime.now().isoformat()
     }
     
-    # Save order to file
-    order_file = ORDERS_DIR / f"order_{order_id}.json"
-    with open(order_file, "w") as f:
-        json.dump(order, f, indent=2)
-    
-    # Update order history
-    history = []
-    if ORDER_HISTORY_FILE.exists():
-        with open(ORDER_HISTORY_FILE, "r") as f:
-            history = json.load(f)
-    
-    history.append({
-        "order_id": order_id,
-        "total": order["total"],
-        "currency": order["currency"],
-        "created_at": order["created_at"]
-    })
+    return order
+
+
+def create_order(session_id: str, buyer_name: Optional[str] = None) -> dict:
+    """Create an order from cart contents, save it and clear the cart."""
+    order = _build_order(session_id, buyer_name)
     
-    with open(ORDER_HISTORY_FILE, "w") as f:
-        json.dump(history, f, indent=2)
+    # Save order and add it to the order history
+    order_store.save(order)
+    _notify("order", session_id, order)
     
     # Clear cart
     clear_cart(session_id)
@@ -314,19 +335,31 @@ def create_order(session_id: str, buyer_name: Optional[str] = None) -> dict:
 
 def get_order(order_id: str) -> Optional[dict]:
     """Retrieve an order by ID."""
-    order_file = ORDERS_DIR / f"order_{order_id}.json"
-    if order_file.exists():
-        with open(order_file, "r") as f:
-            return json.load(f)
-    return None
+    return order_store.get(order_id)
 
 
-def get_order_history(limit: int = 10) -> list[dict]:
-    """Get recent order history."""
-    if not ORDER_HISTORY_FILE.exists():
-        return []
-    
-    with open(ORDER_HISTORY_FILE, "r") as f:
-        history = json.load(f)
-    
-    return history[-limit:][::-1]  # Most recent first
+def get_order_history(limit: int = 10, buyer_name: Optional[str] = None) -> list[dict]:
+    """Get recent order history, most recent first, optionally for one buyer."""
+    return order_store.history(limit, buyer=buyer_name)
+
+
+# Async variants for the agent's event loop. Carts live in memory and are
+# touched on the loop; only order storage I/O runs on the executor.
+
+async def create_order_async(session_id: str, buyer_name: Optional[str] = None) -> dict:
+    """Like create_order, but saves the order without blocking the event loop."""
+    order = _build_order(session_id, buyer_name)
+    await _run_io(order_store.save, order)
+    _notify("order", session_id, order)
+    clear_cart(session_id)
+    return order
+
+
+async def get_order_async(order_id: str) -> Optional[dict]:
+    """Like get_order, off the event loop."""
+    return await _run_io(order_store.get, order_id)
+
+
+async def get_order_history_async(limit: int = 10, buyer_name: Optional[str] = None) -> list[dict]:
+    """Like get_order_history, off the event loop."""
+    return await _run_io(order_store.history, limit, buyer=buyer_name)
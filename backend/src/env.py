@@ -0,0 +1,11 @@
+"""
+Loads .env.local into the environment.
+
+Modules here read their settings from the environment when imported, so
+the agent imports this before any of them. Job processes inherit the
+worker's environment, and variables already set are never overridden.
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv(".env.local")
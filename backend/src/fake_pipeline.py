@@ -0,0 +1,282 @@
+"""
+Deterministic stand-ins for the voice pipeline, for benchmarks and tests.
+
+With these an AgentSession runs the whole STT -> LLM -> tools -> TTS loop
+in-process, with no LiveKit room and no paid APIs:
+
+- SilenceAudioInput: the user's microphone, 20 ms of silence at a time
+- FakeSTT: "hears" whatever say() is given, with a realistic speaking
+  time and endpointing delay (use with turn_detection="stt")
+- ScriptedLLM: answers each user line from a script, calling the
+  scripted tools first, then streaming the scripted reply
+- PacedAudioOutput: a speaker that plays audio in real time
+
+Both audio ends can record frame timing into a tracing.Histogram: how
+late each microphone frame is handed to the session, and each gap in the
+agent's speech where the speaker ran out of audio.
+
+TTS is the real murf_tts.TTS pointed at murf_stub.MurfStub.
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from typing import NamedTuple, Optional
+
+from livekit import rtc
+from livekit.agents import APIConnectOptions, llm, stt, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, NotGivenOr
+from livekit.agents.voice import io
+
+from tracing import Histogram
+
+INPUT_SAMPLE_RATE = 16000
+INPUT_FRAME_MS = 20
+# How long a user takes to say a line
+SPEECH_DURATION = 1.0
+# Delay between the end of speech and the STT's final transcript
+FINAL_TRANSCRIPT_DELAY = 0.2
+# LLM delay before the first token, and streaming speed
+LLM_TTFT = 0.3
+LLM_WORDS_PER_SECOND = 60.0
+# Audio a speaker accepts ahead of what it is playing
+OUTPUT_BUFFER = 0.2
+
+FALLBACK_REPLY = "Sorry, I didn't catch that. Could you say it again?"
+
+
+class SilenceAudioInput(io.AudioInput):
+    """Silent microphone frames, paced in real time like a live track."""
+
+    def __init__(
+        self,
+        sample_rate: int = INPUT_SAMPLE_RATE,
+        frame_ms: int = INPUT_FRAME_MS,
+        lateness: Optional[Histogram] = None,
+    ) -> None:
+        super().__init__(label="SilenceAudioInput")
+        self.sample_rate = sample_rate
+        self.lateness = lateness
+        self.samples_per_frame = sample_rate * frame_ms // 1000
+        self._silence = bytes(self.samples_per_frame * 2)
+        self._next: Optional[float] = None
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        loop = asyncio.get_running_loop()
+        if self._next is None:
+            self._next = loop.time()
+        # A fixed schedule, so a late wake-up doesn't slow the stream down
+        self._next += self.samples_per_frame / self.sample_rate
+        await asyncio.sleep(self._next - loop.time())
+        if self.lateness is not None:
+            self.lateness.record(max(loop.time() - self._next, 0.0))
+        return rtc.AudioFrame(self._silence, self.sample_rate, 1, self.samples_per_frame)
+
+
+class FakeSTT(stt.STT):
+    """Streaming STT that transcribes the lines passed to say(), not the audio."""
+
+    def __init__(
+        self,
+        speech_duration: float = SPEECH_DURATION,
+        final_delay: float = FINAL_TRANSCRIPT_DELAY,
+    ) -> None:
+        super().__init__(capabilities=stt.STTCapabilities(streaming=True, interim_results=False))
+        self.speech_duration = speech_duration
+        self.final_delay = final_delay
+        self._utterances: asyncio.Queue[str] = asyncio.Queue()
+
+    def say(self, text: str):
+        self._utterances.put_nowait(text)
+
+    async def _recognize_impl(self, buffer, *, language=NOT_GIVEN, conn_options=DEFAULT_API_CONNECT_OPTIONS):
+        return stt.SpeechEvent(type=stt.SpeechEventType.FINAL_TRANSCRIPT)
+
+    def stream(
+        self,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> "FakeRecognizeStream":
+        return FakeRecognizeStream(stt=self, conn_options=conn_options)
+
+
+class FakeRecognizeStream(stt.RecognizeStream):
+    async def _run(self):
+        fake: FakeSTT = self._stt
+
+        async def _drain():
+            async for _ in self._input_ch:
+                pass
+
+        drain = asyncio.create_task(_drain())
+        try:
+            while True:
+                utterance = asyncio.create_task(fake._utterances.get())
+                await asyncio.wait([drain, utterance], return_when=asyncio.FIRST_COMPLETED)
+                if not utterance.done():
+                    # The input ended: the session is closing
+                    utterance.cancel()
+                    return
+                await self._speak(utterance.result(), fake)
+        finally:
+            await utils.aio.cancel_and_wait(drain)
+
+    async def _speak(self, text: str, fake: FakeSTT):
+        self._event_ch.send_nowait(stt.SpeechEvent(type=stt.SpeechEventType.START_OF_SPEECH))
+        await asyncio.sleep(fake.speech_duration + fake.final_delay)
+        self._event_ch.send_nowait(
+            stt.SpeechEvent(
+                type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+                alternatives=[stt.SpeechData(language="en", text=text, confidence=1.0)],
+            )
+        )
+        self._event_ch.send_nowait(stt.SpeechEvent(type=stt.SpeechEventType.END_OF_SPEECH))
+
+
+class ScriptedTurn(NamedTuple):
+    # (tool name, arguments) to call before replying
+    tool_calls: list[tuple[str, dict]]
+    reply: str
+
+
+class ScriptedLLM(llm.LLM):
+    """
+    Looks up the latest user line in script. Until the chat has tool
+    results for that line, the answer is the scripted tool calls; after
+    that, or if there are none, it is the scripted reply.
+    """
+
+    def __init__(
+        self,
+        script: dict[str, ScriptedTurn],
+        ttft: float = LLM_TTFT,
+        words_per_second: float = LLM_WORDS_PER_SECOND,
+    ) -> None:
+        super().__init__()
+        self.script = {_normalize(line): turn for line, turn in script.items()}
+        self.ttft = ttft
+        self.words_per_second = words_per_second
+        self._call_ids = itertools.count(1)
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[list] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        **kwargs,
+    ) -> "ScriptedLLMStream":
+        return ScriptedLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+    def respond(self, chat_ctx: llm.ChatContext) -> tuple[list[llm.FunctionToolCall], str]:
+        """(tool calls, reply) for the chat so far; only one of them is non-empty."""
+        line, answered = None, False
+        for item in reversed(chat_ctx.items):
+            if item.type == "function_call_output":
+                answered = True
+            elif item.type == "message" and item.role == "user":
+                line = item.text_content
+                break
+        turn = self.script.get(_normalize(line or ""))
+        if turn is None:
+            return [], FALLBACK_REPLY
+        if turn.tool_calls and not answered:
+            calls = [
+                llm.FunctionToolCall(name=name, arguments=json.dumps(args), call_id=f"call_{next(self._call_ids)}")
+                for name, args in turn.tool_calls
+            ]
+            return calls, ""
+        return [], turn.reply
+
+
+class ScriptedLLMStream(llm.LLMStream):
+    async def _run(self):
+        scripted: ScriptedLLM = self._llm
+        request_id = utils.shortuuid("scripted_")
+        calls, reply = scripted.respond(self._chat_ctx)
+        await asyncio.sleep(scripted.ttft)
+        if calls:
+            self._event_ch.send_nowait(
+                llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", tool_calls=calls))
+            )
+        words = reply.split(" ") if reply else []
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(1 / scripted.words_per_second)
+            content = word if i == 0 else " " + word
+            self._event_ch.send_nowait(
+                llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", content=content))
+            )
+        prompt_tokens = sum(len(item.text_content or "") // 4 for item in self._chat_ctx.items if item.type == "message")
+        completion_tokens = len(words) + 10 * len(calls)
+        self._event_ch.send_nowait(
+            llm.ChatChunk(
+                id=request_id,
+                usage=llm.CompletionUsage(
+                    completion_tokens=completion_tokens,
+                    prompt_tokens=prompt_tokens,
+                    total_tokens=prompt_tokens + completion_tokens,
+                ),
+            )
+        )
+
+
+def _normalize(line: str) -> str:
+    return " ".join(line.lower().split())
+
+
+class PacedAudioOutput(io.AudioOutput):
+    """
+    A speaker: plays captured audio in real time, buffering at most
+    OUTPUT_BUFFER ahead. A frame that arrives after the audio before it has
+    finished playing is an underrun: the gap is heard as a stutter.
+    """
+
+    def __init__(self, sample_rate: Optional[int] = None, gaps: Optional[Histogram] = None) -> None:
+        super().__init__(
+            label="PacedAudioOutput",
+            capabilities=io.AudioOutputCapabilities(pause=False),
+            sample_rate=sample_rate,
+        )
+        self._segment_start: Optional[float] = None
+        self._played_until = 0.0
+        self._finish: Optional[asyncio.TimerHandle] = None
+        self.played = 0.0
+        self.gaps = gaps
+        self.underruns = 0
+
+    async def capture_frame(self, frame: rtc.AudioFrame):
+        await super().capture_frame(frame)
+        now = time.monotonic()
+        if self._segment_start is None:
+            self._segment_start = self._played_until = now
+        elif now > self._played_until:
+            self.underruns += 1
+            if self.gaps is not None:
+                self.gaps.record(now - self._played_until)
+        self._played_until = max(self._played_until, now) + frame.duration
+        ahead = self._played_until - now - OUTPUT_BUFFER
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+
+    def flush(self):
+        super().flush()
+        if self._segment_start is None:
+            return
+        delay = max(self._played_until - time.monotonic(), 0.0)
+        self._finish = asyncio.get_running_loop().call_later(delay, self._finished, False)
+
+    def clear_buffer(self):
+        if self._finish is not None:
+            self._finish.cancel()
+        if self._segment_start is not None:
+            self._finished(True)
+
+    def _finished(self, interrupted: bool):
+        position = min(time.monotonic(), self._played_until) - self._segment_start
+        self.played += position
+        self._segment_start = None
+        self._finish = None
+        self.on_playback_finished(playback_position=position, interrupted=interrupted)
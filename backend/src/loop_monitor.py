@@ -0,0 +1,125 @@
+"""
+Event loop lag monitor.
+
+The agent's event loop also pumps audio frames for STT, VAD and TTS, so any
+call that blocks it shows up as an audio stall. The monitor wakes up every
+interval and records how late it woke: that delay is the time the loop was
+busy with something else.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# How often to sample the loop
+LAG_SAMPLE_INTERVAL = 0.05
+
+# Lag long enough to be heard as a gap in 20 ms audio frames
+STALL_THRESHOLD = 0.1
+
+# Recent samples kept for percentiles
+LAG_WINDOW = 1200
+
+
+class LoopLagMonitor:
+    """
+    Samples event loop lag in a background task.
+
+    watch(label) records the worst lag seen while a block of code runs,
+    e.g. `async with monitor.watch("checkout"): ...`, so a slow tool call
+    can be compared before and after a change.
+    """
+
+    def __init__(
+        self,
+        interval: float = LAG_SAMPLE_INTERVAL,
+        stall_threshold: float = STALL_THRESHOLD,
+        window: int = LAG_WINDOW,
+    ) -> None:
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self._recent: deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        # watch id -> [start time, worst lag so far]
+        self._watches: dict[int, list[float]] = {}
+        self._watch_ids = itertools.count()
+        # When the sampler is due to wake next
+        self._expected: Optional[float] = None
+        self.samples = 0
+        self.stalls = 0
+        self.max_lag = 0.0
+        # label -> {"count": n, "max_lag": seconds}
+        self.watched: dict[str, dict] = {}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self.record(max(now - self._expected, 0.0), now)
+
+    def record(self, lag: float, now: Optional[float] = None):
+        self.samples += 1
+        self._recent.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.stall_threshold:
+            self.stalls += 1
+            logger.debug(f"Event loop stalled for {lag * 1000:.0f} ms")
+        if now is None:
+            now = time.perf_counter()
+        for watch in self._watches.values():
+            # Only the part of the lag that fell inside the watched block
+            watch[1] = max(watch[1], min(lag, now - watch[0]))
+
+    @contextlib.asynccontextmanager
+    async def watch(self, label: str):
+        key = next(self._watch_ids)
+        self._watches[key] = [time.perf_counter(), 0.0]
+        try:
+            yield
+        finally:
+            start, worst = self._watches.pop(key)
+            if self._expected is not None:
+                # Lag still building up if the block itself held the loop
+                now = time.perf_counter()
+                worst = max(worst, min(now - self._expected, now - start))
+            stats = self.watched.setdefault(label, {"count": 0, "max_lag": 0.0})
+            stats["count"] += 1
+            stats["max_lag"] = max(stats["max_lag"], worst)
+
+    def percentile(self, q: float) -> float:
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def metrics(self) -> dict:
+        """Lag summary in milliseconds, for logging."""
+        return {
+            "samples": self.samples,
+            "stalls": self.stalls,
+            "p50_ms": round(self.percentile(0.5) * 1000, 1),
+            "p99_ms": round(self.percentile(0.99) * 1000, 1),
+            "max_ms": round(self.max_lag * 1000, 1),
+            "watched": {
+                label: {"count": s["count"], "max_ms": round(s["max_lag"] * 1000, 1)}
+                for label, s in self.watched.items()
+            },
+        }
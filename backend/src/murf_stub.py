@@ -0,0 +1,169 @@
+"""
+Local stand-in for the Murf speech API, for benchmarks and tests.
+
+Serves the two endpoints murf_tts uses, with configurable latency, and
+answers with a tone whose length grows with the text:
+
+- POST /v1/speech/generate: waits for the whole clip to be "synthesized",
+  then returns {"audioFile": url} for a GET of the complete WAV.
+- POST /v1/speech/stream: sends the WAV header after the first-byte
+  latency, then the audio in chunks at the synthesis rate.
+
+inject() adds faults to the next requests: extra latency or an HTTP error.
+
+Usage:
+    uv run python src/murf_stub.py [--port 8181]
+    MURF_API_URL=http://127.0.0.1:8181 MURF_API_KEY=stub uv run python src/agent.py dev
+"""
+
+import argparse
+import asyncio
+import itertools
+import math
+import struct
+from array import array
+from collections import deque
+
+from aiohttp import web
+
+SAMPLE_RATE = 24000
+# Seconds of speech per character of text
+SECONDS_PER_CHAR = 0.06
+# Delay before the first audio byte
+FIRST_BYTE_LATENCY = 0.15
+# Audio seconds synthesized per wall-clock second
+SYNTHESIS_SPEED = 4.0
+# Bytes per streamed chunk (50 ms of audio)
+CHUNK_BYTES = SAMPLE_RATE // 20 * 2
+
+
+def wav_header(data_size: int, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Canonical 44-byte header for 16-bit mono PCM."""
+    return (
+        b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+def tone(text: str, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """16-bit PCM for text: a quiet 220 Hz tone, SECONDS_PER_CHAR per character."""
+    n = max(int(len(text) * SECONDS_PER_CHAR * sample_rate), 1)
+    step = 2 * math.pi * 220 / sample_rate
+    return array("h", (int(3000 * math.sin(i * step)) for i in range(n))).tobytes()
+
+
+class MurfStub:
+    def __init__(
+        self,
+        first_byte_latency: float = FIRST_BYTE_LATENCY,
+        synthesis_speed: float = SYNTHESIS_SPEED,
+        sample_rate: int | None = None,
+    ) -> None:
+        self.first_byte_latency = first_byte_latency
+        self.synthesis_speed = synthesis_speed
+        # Answer at this rate whatever the request asks for
+        self.sample_rate = sample_rate
+        self.requests: list[dict] = []
+        # Client (host, port) pairs seen, i.e. distinct TCP connections
+        self.connections: set[tuple] = set()
+        # (extra delay, error status or None) for the next requests, in order
+        self._faults: deque[tuple[float, int | None]] = deque()
+        self._files: dict[str, bytes] = {}
+        self._ids = itertools.count()
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    def inject(self, count: int = 1, delay: float = 0.0, status: int | None = None):
+        """Delay the next count synthesis requests, and/or fail them with status."""
+        self._faults.extend([(delay, status)] * count)
+
+    async def _fault(self) -> web.Response | None:
+        if not self._faults:
+            return None
+        delay, status = self._faults.popleft()
+        await asyncio.sleep(delay)
+        return web.Response(status=status, text="injected fault") if status else None
+
+    def _synthesis_time(self, pcm: bytes, sample_rate: int) -> float:
+        return len(pcm) / 2 / sample_rate / self.synthesis_speed
+
+    def _rate(self, payload: dict) -> int:
+        return self.sample_rate or payload.get("sampleRate", SAMPLE_RATE)
+
+    async def _generate(self, request: web.Request) -> web.Response:
+        self.connections.add(request.transport.get_extra_info("peername"))
+        payload = await request.json()
+        self.requests.append(payload)
+        if (error := await self._fault()) is not None:
+            return error
+        rate = self._rate(payload)
+        pcm = tone(payload["text"], rate)
+        await asyncio.sleep(self.first_byte_latency + self._synthesis_time(pcm, rate))
+        file_id = str(next(self._ids))
+        self._files[file_id] = wav_header(len(pcm), rate) + pcm
+        return web.json_response({"audioFile": f"{self.url}/audio/{file_id}.wav"})
+
+    async def _audio(self, request: web.Request) -> web.Response:
+        data = self._files.pop(request.match_info["file_id"], None)
+        if data is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=data, content_type="audio/wav")
+
+    async def _stream(self, request: web.Request) -> web.StreamResponse:
+        self.connections.add(request.transport.get_extra_info("peername"))
+        payload = await request.json()
+        self.requests.append(payload)
+        if (error := await self._fault()) is not None:
+            return error
+        rate = self._rate(payload)
+        pcm = tone(payload["text"], rate)
+        response = web.StreamResponse(headers={"Content-Type": "audio/wav"})
+        await response.prepare(request)
+        await asyncio.sleep(self.first_byte_latency)
+        await response.write(wav_header(len(pcm), rate))
+        for start in range(0, len(pcm), CHUNK_BYTES):
+            chunk = pcm[start:start + CHUNK_BYTES]
+            await asyncio.sleep(self._synthesis_time(chunk, rate))
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/speech/generate", self._generate)
+        app.router.add_get("/audio/{file_id}.wav", self._audio)
+        app.router.add_post("/v1/speech/stream", self._stream)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on host:port (0 picks a free port). Returns the base URL."""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(port: int):
+    stub = MurfStub()
+    print(f"Murf stub listening on {await stub.start(port=port)}")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local Murf API stub")
+    parser.add_argument("--port", type=int, default=8181)
+    args = parser.parse_args()
+    asyncio.run(_serve(args.port))
+
+
+if __name__ == "__main__":
+    main()
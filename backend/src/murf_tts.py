@@ -1,16 +1,100 @@
 import asyncio
-import contextlib
+import base64
+import importlib.util
 import logging
+import math
 import os
-from typing import AsyncIterable
-import base64
+import time
+from array import array
+from collections.abc import AsyncIterator
+from typing import Optional
 
-import requests
+import httpx
 from livekit import rtc
-from livekit.agents import tokenize, tts
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectionError,
+    APIConnectOptions,
+    APIStatusError,
+    APITimeoutError,
+    tokenize,
+    tts,
+    utils,
+)
+
+from resilience import CLOSED, CircuitBreaker, LatencyTracker, hedged_stream
+from tts_cache import TTSCache, cache_key
+from wav import WavFormat, WavStreamParser, frames
 
 logger = logging.getLogger(__name__)
 
+MURF_API_URL = os.environ.get("MURF_API_URL", "https://api.murf.ai")
+
+SAMPLE_RATE = 24000
+NUM_CHANNELS = 1
+# Slightly faster for more natural flow
+SPEED = 1.15
+
+# Size of the audio frames handed to LiveKit. Small frames let playback
+# start as soon as the first few milliseconds of audio arrive.
+FRAME_SIZE_MS = 20
+
+OUTPUT_FORMAT = WavFormat(SAMPLE_RATE, NUM_CHANNELS, 16)
+
+# Bytes read from a streaming response at a time (100 ms of 24 kHz 16-bit mono)
+STREAM_CHUNK_SIZE = 4800
+
+# HTTP client limits; one client is shared by every request in the process
+MURF_MAX_CONNECTIONS = int(os.environ.get("MURF_MAX_CONNECTIONS", "8"))
+MURF_KEEPALIVE_EXPIRY = float(os.environ.get("MURF_KEEPALIVE_EXPIRY", "60"))
+MURF_CONNECT_TIMEOUT = 5.0
+# Reduced timeout for faster failure/retry
+MURF_READ_TIMEOUT = 15.0
+MURF_DOWNLOAD_TIMEOUT = 30.0
+
+# Sentences synthesized at once in a stream, counting the one playing
+MURF_PIPELINE_DEPTH = int(os.environ.get("MURF_PIPELINE_DEPTH", "3"))
+
+# Concurrent Murf requests when pre-synthesizing phrases into the cache
+PRESYNTH_CONCURRENCY = 4
+
+# Send a duplicate request when Murf's first byte takes longer than this
+# percentile of recent first-byte latencies
+MURF_HEDGE_ENABLED = os.environ.get("MURF_HEDGE", "1") == "1"
+MURF_HEDGE_PERCENTILE = 0.95
+
+# Consecutive failures that open the circuit, and seconds until a trial request
+MURF_BREAKER_FAILURES = int(os.environ.get("MURF_BREAKER_FAILURES", "3"))
+MURF_BREAKER_RESET = float(os.environ.get("MURF_BREAKER_RESET", "30"))
+
+# Spoken instead of a sentence while Murf is unavailable, if it is in the
+# cache; otherwise a short chime is played
+FALLBACK_PHRASE = "Sorry, I'm having trouble with my voice right now."
+
+
+def create_breaker() -> CircuitBreaker:
+    return CircuitBreaker(MURF_BREAKER_FAILURES, MURF_BREAKER_RESET)
+
+
+def create_http_client(
+    max_connections: int = MURF_MAX_CONNECTIONS,
+    keepalive_expiry: float = MURF_KEEPALIVE_EXPIRY,
+) -> httpx.AsyncClient:
+    """
+    Long-lived client for Murf requests: keeps connections alive between
+    sentences so each one skips the TCP and TLS handshakes. Uses HTTP/2 when
+    the h2 package is installed, multiplexing requests over one connection.
+    """
+    return httpx.AsyncClient(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(MURF_READ_TIMEOUT, connect=MURF_CONNECT_TIMEOUT),
+    )
+
 
 class TTS(tts.TTS):
     def __init__(
@@ -19,73 +103,132 @@ class TTS(tts.TTS):
         voice: str = "en-US-ryan",
         style: str = "Conversational",
         tokenizer: tokenize.SentenceTokenizer = tokenize.basic.SentenceTokenizer(),
+        streaming: bool = True,
+        base_url: str = MURF_API_URL,
+        http_client: Optional[httpx.AsyncClient] = None,
+        pipeline_depth: int = MURF_PIPELINE_DEPTH,
+        cache: Optional[TTSCache] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge: bool = MURF_HEDGE_ENABLED,
     ) -> None:
         """
         Initialize Murf TTS.
-        
+
         Args:
             voice: The voice ID to use (e.g., "en-US-ryan")
             style: The speaking style (e.g., "Conversational", "Narration")
             tokenizer: The tokenizer to use for sentence segmentation
+            streaming: Stream audio frames as Murf produces them, instead of
+                waiting for each sentence's complete WAV file
+            base_url: Murf API base URL (MURF_API_URL, e.g. a local murf_stub)
+            http_client: Client from create_http_client(), e.g. made at
+                prewarm and shared by sessions; its owner closes it.
+                Created on first use, and closed by aclose(), if not given.
+            pipeline_depth: Sentences of a stream synthesized concurrently,
+                including the one playing; 1 synthesizes them in turn
+            cache: Audio cache; repeated phrases are served from it
+                instead of Murf
+            breaker: Circuit breaker for Murf requests, e.g. one shared
+                by every session in the process. While it is open,
+                sentences not in the cache are replaced by a fallback.
+            hedge: Race a second request against one whose first byte is
+                later than the recent p95
         """
         super().__init__(
             capabilities=tts.TTSCapabilities(
-                streaming=False,
+                streaming=streaming,
             ),
-            sample_rate=24000,
-            num_channels=1,
+            sample_rate=SAMPLE_RATE,
+            num_channels=NUM_CHANNELS,
         )
         self._voice = voice
         self._style = style
         self._tokenizer = tokenizer
+        self._base_url = base_url.rstrip("/")
         self._api_key = os.environ.get("MURF_API_KEY")
-        
+        self._client = http_client
+        self._owns_client = http_client is None
+        self._pipeline_depth = max(pipeline_depth, 1)
+        self._cache = cache
+        self._breaker = breaker or create_breaker()
+        self._hedge = hedge
+        self._first_byte = LatencyTracker()
+        # breaker.opened_at when the fallback was last played
+        self._fallback_played: Optional[float] = None
+        self._prewarm_task: Optional[asyncio.Task] = None
+        self.stats = {"hedged": 0, "fallbacks": 0}
+        # Murf requests under way, for the worker's load (admission.py)
+        self.in_flight = 0
+
         if not self._api_key:
             raise ValueError("MURF_API_KEY environment variable is required")
 
-    def _synthesize_audio_sync(self, text: str) -> bytes:
-        """
-        Synchronous method to synthesize speech using Murf API.
-        
-        Args:
-            text: The text to synthesize
-            
-        Returns:
-            Audio data as bytes
-        """
-        url = "https://api.murf.ai/v1/speech/generate"
-        
+    def _http_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = create_http_client()
+        return self._client
+
+    def prewarm(self) -> None:
+        """Open a connection to Murf ahead of the first sentence."""
+        if self._prewarm_task is None:
+            self._prewarm_task = asyncio.create_task(self._warm_connection())
+
+    async def _warm_connection(self):
+        try:
+            await self._http_client().head(self._base_url)
+        except httpx.HTTPError as e:
+            logger.warning(f"Murf connection prewarm failed: {e}")
+
+    @property
+    def provider(self) -> str:
+        return "murf"
+
+    def _request_args(self, text: str) -> dict:
+        """Headers and JSON body for a Murf synthesis request."""
         headers = {
             "api-key": self._api_key,
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
-        
+
         payload = {
             "voiceId": self._voice,
             "style": self._style,
             "text": text,
             "format": "WAV",
-            "sampleRate": 24000,
+            "sampleRate": SAMPLE_RATE,
             "channelType": "MONO",
             "encodeAsBase64": False,
-            "speed": 1.15,  # Slightly faster for more natural flow
+            "speed": SPEED,
             "pitch": 0,    # Normal pitch
         }
-        
+        return {"headers": headers, "json": payload}
+
+    async def _synthesize_audio(self, text: str) -> bytes:
+        """
+        Synthesize speech using Murf API, waiting for the complete file.
+
+        Args:
+            text: The text to synthesize
+
+        Returns:
+            Audio data as bytes
+        """
+        url = f"{self._base_url}/v1/speech/generate"
+        client = self._http_client()
+
         try:
             logger.info(f"Synthesizing with Murf: voice={self._voice}, text_length={len(text)}")
-            # Reduced timeout for faster failure/retry, increased speed
-            response = requests.post(url, json=payload, headers=headers, timeout=15)
+            response = await client.post(url, **self._request_args(text))
             response.raise_for_status()
-            
+
             # Murf API returns JSON with audio URL or base64 data
             response_data = response.json()
-            
+
             if 'audioFile' in response_data:
                 # Download the audio file
                 audio_url = response_data['audioFile']
-                audio_response = requests.get(audio_url, timeout=30)
+                audio_response = await client.get(audio_url, timeout=MURF_DOWNLOAD_TIMEOUT)
                 audio_response.raise_for_status()
                 return audio_response.content
             elif 'audioContent' in response_data:
@@ -94,69 +237,362 @@ class TTS(tts.TTS):
             else:
                 logger.error(f"Unexpected Murf API response: {response_data}")
                 raise ValueError("Unexpected API response format")
-                
-        except requests.exceptions.RequestException as e:
+
+        except httpx.HTTPError as e:
             logger.error(f"Error synthesizing speech with Murf: {e}")
-            if 'response' in locals():
-                logger.error(f"Response status: {response.status_code}")
-                logger.error(f"Response body: {response.text[:500]}")
+            raise _api_error(e) from e
+
+    async def _stream_audio(self, text: str) -> AsyncIterator[bytes]:
+        """WAV file for text from Murf's streaming endpoint, yielded as it arrives."""
+        url = f"{self._base_url}/v1/speech/stream"
+        logger.info(f"Streaming from Murf: voice={self._voice}, text_length={len(text)}")
+        try:
+            async with self._http_client().stream("POST", url, **self._request_args(text)) as response:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                    yield chunk
+        except httpx.HTTPError as e:
+            logger.error(f"Error streaming speech from Murf: {e}")
+            raise _api_error(e) from e
+
+    def cache_key(self, text: str) -> str:
+        return cache_key(self._voice, self._style, SPEED, SAMPLE_RATE, text)
+
+    async def _audio(self, text: str, fallback: bool = True) -> AsyncIterator[bytes]:
+        """
+        PCM frames for text: from the cache if possible, otherwise from
+        Murf (streamed or whole, per the streaming capability), caching the
+        result once it has arrived in full. While the circuit is open the
+        fallback is played instead, or APIConnectionError raised if
+        fallback is False.
+        """
+        key = self.cache_key(text) if self._cache is not None else None
+        if key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                for frame in frames(cached, OUTPUT_FORMAT, FRAME_SIZE_MS):
+                    yield bytes(frame)
+                return
+
+        if not self._breaker.allow():
+            if not fallback:
+                raise APIConnectionError("Murf circuit is open", retryable=False)
+            for frame in self._fallback():
+                yield frame
+            return
+
+        decoder = _PcmDecoder()
+        parts = []
+        start = time.perf_counter()
+        self.in_flight += 1
+        try:
+            async for chunk in hedged_stream(lambda: self._wav(text), self._hedge_after(), self._on_hedge):
+                if not parts:
+                    self._first_byte.record(time.perf_counter() - start)
+                for frame in decoder.push(chunk):
+                    parts.append(frame)
+                    yield frame
+            for frame in decoder.flush():
+                parts.append(frame)
+                yield frame
+        except (asyncio.CancelledError, GeneratorExit):
+            # Interrupted (e.g. barge-in) before Murf answered either way
+            self._breaker.release()
             raise
-        except Exception as e:
-            logger.error(f"Unexpected error in Murf TTS: {e}")
+        except Exception:
+            self._breaker.record_failure()
             raise
+        finally:
+            self.in_flight -= 1
+        self._breaker.record_success()
+
+        if key is not None:
+            self._cache.put(key, b"".join(parts))
 
-    @contextlib.asynccontextmanager
-    async def synthesize(self, text: str, *, conn_options=None):
+    def _hedge_after(self) -> Optional[float]:
+        """Seconds to wait for a first byte before hedging, or None not to hedge."""
+        if not self._hedge or self._breaker.state != CLOSED:
+            return None
+        return self._first_byte.percentile(MURF_HEDGE_PERCENTILE)
+
+    def _on_hedge(self):
+        self.stats["hedged"] += 1
+        logger.info("Murf is slow to answer, sending a hedged request")
+
+    def _fallback(self) -> list[bytes]:
+        """
+        Frames to play in place of a sentence while the circuit is open: the
+        cached FALLBACK_PHRASE, or a chime. Played once per outage; later
+        sentences get a single frame of silence.
+        """
+        if self._fallback_played == self._breaker.opened_at:
+            return [bytes(OUTPUT_FORMAT.sample_rate * FRAME_SIZE_MS // 1000 * OUTPUT_FORMAT.bytes_per_frame)]
+        self._fallback_played = self._breaker.opened_at
+        self.stats["fallbacks"] += 1
+        audio = None
+        if self._cache is not None:
+            audio = self._cache.get(self.cache_key(FALLBACK_PHRASE))
+        if audio is None:
+            audio = _chime()
+        return [bytes(frame) for frame in frames(audio, OUTPUT_FORMAT, FRAME_SIZE_MS)]
+
+    def metrics(self) -> dict:
+        """Resilience counters, for logging."""
+        p95 = self._first_byte.percentile(MURF_HEDGE_PERCENTILE)
+        return {
+            **self.stats,
+            "first_byte_p95_ms": None if p95 is None else round(p95 * 1000),
+            "breaker": self._breaker.metrics(),
+        }
+
+    async def _wav(self, text: str) -> AsyncIterator[bytes]:
+        """WAV file for text, streamed or whole per the streaming capability."""
+        if self.capabilities.streaming:
+            async for chunk in self._stream_audio(text):
+                yield chunk
+        else:
+            yield await self._synthesize_audio(text)
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "ChunkedStream":
         """
-        Synthesize text to speech (async context manager).
-        
+        Synthesize one piece of text.
+
         Args:
             text: The text to synthesize
-            conn_options: Connection options (unused but required by interface)
-            
-        Yields:
-            Async generator of synthesized audio
+            conn_options: Retry and timeout options
+
+        Returns:
+            Stream of synthesized audio frames
         """
-        
-        async def _do_synthesize():
-            try:
-                # Run the synchronous API call in a thread pool
-                loop = asyncio.get_event_loop()
-                audio_data = await loop.run_in_executor(None, self._synthesize_audio_sync, text)
-                
-                # Skip WAV header (44 bytes) if present
-                if len(audio_data) > 44 and audio_data[:4] == b'RIFF':
-                    audio_data = audio_data[44:]
-                
-                # Create audio frame with raw PCM data
-                audio_frame = rtc.AudioFrame(
-                    data=audio_data,
-                    sample_rate=24000,
-                    num_channels=1,
-                    samples_per_channel=(len(audio_data) // 2)  # 16-bit audio = 2 bytes per sample
-                )
-                
-                yield tts.SynthesizedAudio(request_id="", frame=audio_frame)
-            except Exception as e:
-                logger.error(f"Error in synthesize: {e}")
-                raise
-        
-        yield _do_synthesize()
+        return ChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(
+        self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "SynthesizeStream":
+        """Synthesize text pushed incrementally, sentence by sentence."""
+        return SynthesizeStream(tts=self, conn_options=conn_options)
+
+    async def presynthesize(
+        self, phrases: list[str], budget: float, concurrency: int = PRESYNTH_CONCURRENCY
+    ) -> dict:
+        """
+        Render phrases into the cache ahead of time, split into sentences
+        the way stream() splits them. Stops after budget seconds; phrases
+        not reached by then are synthesized on first use as usual.
+        Returns counts of sentences cached, synthesized and skipped.
+        """
+        if self._cache is None:
+            raise ValueError("presynthesize() needs a TTS with a cache")
+
+        sentences = list(dict.fromkeys(
+            sentence for phrase in phrases for sentence in self._tokenizer.tokenize(phrase)
+        ))
+        pending = [s for s in sentences if self.cache_key(s) not in self._cache]
+        counts = {"cached": len(sentences) - len(pending), "synthesized": 0, "skipped": 0}
+        limit = asyncio.Semaphore(concurrency)
+
+        async def _render(sentence: str):
+            async with limit:
+                async for _ in self._audio(sentence, fallback=False):
+                    pass
+            counts["synthesized"] += 1
+
+        tasks = [asyncio.create_task(_render(s)) for s in pending]
+        if tasks:
+            done, not_done = await asyncio.wait(tasks, timeout=budget)
+            await utils.aio.cancel_and_wait(*not_done)
+            counts["skipped"] = len(not_done)
+            failed = [t for t in done if t.exception() is not None]
+            if failed:
+                counts["skipped"] += len(failed)
+                logger.warning(f"Pre-synthesis failed for {len(failed)} sentences: {failed[0].exception()}")
+        return counts
 
     async def aclose(self) -> None:
-        """Close the TTS instance."""
-        pass
+        """Close the TTS instance and its HTTP connections."""
+        if self._prewarm_task is not None:
+            await utils.aio.cancel_and_wait(self._prewarm_task)
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+            self._client = None
+
+
+def _api_error(e: httpx.HTTPError) -> Exception:
+    """Map an httpx error to the LiveKit error type that drives retries."""
+    if isinstance(e, httpx.TimeoutException):
+        return APITimeoutError()
+    if isinstance(e, httpx.HTTPStatusError):
+        return APIStatusError(str(e), status_code=e.response.status_code, body=e.response.text[:500])
+    return APIConnectionError(str(e))
+
+
+def _chime() -> memoryview:
+    """Two soft notes (E5 then C5), 0.3 s in all, as 16-bit PCM."""
+    samples = array("h")
+    n = SAMPLE_RATE * 150 // 1000
+    for freq in (659.25, 523.25):
+        step = 2 * math.pi * freq / SAMPLE_RATE
+        # Fade out each note to avoid clicks
+        samples.extend(int(4000 * (1 - i / n) * math.sin(i * step)) for i in range(n))
+    return memoryview(samples.tobytes())
+
+
+class _PcmDecoder:
+    """
+    WAV bytes in, FRAME_SIZE_MS frames of SAMPLE_RATE mono PCM out.
+
+    PCM is sliced out of the WAV chunks without copying; the one copy is
+    the bytes() of each frame, which AudioEmitter.push() requires. Audio at
+    another sample rate is resampled.
+    """
+
+    def __init__(self) -> None:
+        self._parser = WavStreamParser()
+        self._resampler: Optional[rtc.AudioResampler] = None
+
+    def push(self, chunk: bytes) -> list[bytes]:
+        out = []
+        for pcm in self._parser.feed(chunk):
+            out.extend(self._convert(pcm))
+        return out
+
+    def flush(self) -> list[bytes]:
+        self._parser.close()
+        if self._resampler is None:
+            return []
+        return [bytes(frame.data) for frame in self._resampler.flush()]
+
+    def _convert(self, pcm: memoryview) -> list[bytes]:
+        fmt = self._parser.format
+        if fmt.num_channels != NUM_CHANNELS:
+            raise ValueError(f"Expected mono audio from Murf, got {fmt.num_channels} channels")
+        if fmt.sample_rate == SAMPLE_RATE:
+            return [bytes(frame) for frame in frames(pcm, fmt, FRAME_SIZE_MS)]
+
+        if self._resampler is None:
+            logger.warning(f"Resampling Murf audio from {fmt.sample_rate} Hz to {SAMPLE_RATE} Hz")
+            self._resampler = rtc.AudioResampler(fmt.sample_rate, SAMPLE_RATE, num_channels=NUM_CHANNELS)
+        frame = rtc.AudioFrame(pcm, fmt.sample_rate, fmt.num_channels, len(pcm) // fmt.bytes_per_frame)
+        return [bytes(out.data) for out in self._resampler.push(frame)]
+
+
+class ChunkedStream(tts.ChunkedStream):
+    """Audio for one piece of text."""
+
+    def __init__(self, *, tts: TTS, input_text: str, conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._tts: TTS = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=SAMPLE_RATE,
+            num_channels=NUM_CHANNELS,
+            mime_type="audio/pcm",
+            frame_size_ms=FRAME_SIZE_MS,
+        )
+        async for chunk in self._tts._audio(self._input_text):
+            output_emitter.push(chunk)
+        output_emitter.flush()
+
+
+class SynthesizeStream(tts.SynthesizeStream):
+    """
+    Audio for text pushed token by token. The text is split into sentences
+    and each sentence is streamed from Murf as soon as it is complete.
+
+    Sentences are pipelined: while one plays, the next pipeline_depth - 1
+    are already being synthesized into buffers, so each starts playing
+    without waiting for Murf's first byte. Audio is still emitted in
+    sentence order, and closing the stream (e.g. on barge-in) cancels every
+    request in flight.
+    """
+
+    def __init__(self, *, tts: TTS, conn_options: APIConnectOptions) -> None:
+        super().__init__(tts=tts, conn_options=conn_options)
+        self._tts: TTS = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=SAMPLE_RATE,
+            num_channels=NUM_CHANNELS,
+            mime_type="audio/pcm",
+            frame_size_ms=FRAME_SIZE_MS,
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=utils.shortuuid())
+        sent_stream = self._tts._tokenizer.stream()
+
+        async def _forward_input():
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    sent_stream.flush()
+                    continue
+                sent_stream.push_text(data)
+            sent_stream.end_input()
+
+        # One slot per sentence in flight; freed once the sentence has played
+        slots = asyncio.Semaphore(self._tts._pipeline_depth)
+        # (fetch task, audio chunks) per sentence, in order; None ends the stream
+        sentences: asyncio.Queue = asyncio.Queue()
+        fetches: set[asyncio.Task] = set()
+
+        async def _fetch(text: str, chunks: asyncio.Queue):
+            try:
+                async for chunk in self._tts._audio(text):
+                    chunks.put_nowait(chunk)
+            finally:
+                chunks.put_nowait(None)
+
+        async def _schedule():
+            async for ev in sent_stream:
+                text = ev.token.strip()
+                if not text:
+                    continue
+                await slots.acquire()
+                self._mark_started()
+                chunks: asyncio.Queue = asyncio.Queue()
+                task = asyncio.create_task(_fetch(text, chunks))
+                fetches.add(task)
+                task.add_done_callback(fetches.discard)
+                sentences.put_nowait((task, chunks))
+            sentences.put_nowait(None)
+
+        async def _play():
+            while (sentence := await sentences.get()) is not None:
+                task, chunks = sentence
+                while (chunk := await chunks.get()) is not None:
+                    output_emitter.push(chunk)
+                await task  # re-raise a request error
+                output_emitter.flush()
+                slots.release()
+
+        tasks = [
+            asyncio.create_task(_forward_input()),
+            asyncio.create_task(_schedule()),
+            asyncio.create_task(_play()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await sent_stream.aclose()
+            await utils.aio.cancel_and_wait(*tasks, *fetches)
 
 
 # Create a default instance
 def create_tts(voice: str = "en-US-ryan", style: str = "Conversational") -> TTS:
     """
     Create a Murf TTS instance.
-    
+
     Args:
         voice: The voice ID to use
         style: The speaking style
-        
+
     Returns:
         Murf TTS instance
     """
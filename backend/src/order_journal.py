@@ -0,0 +1,299 @@
+"""
+Append-only order history journal.
+
+Each order summary is one JSON line appended to order_history.jsonl, so a
+checkout costs one small write instead of rewriting the whole history.
+fsyncs are batched (group commit), and a small index file records where
+every Nth entry starts so reading the most recent orders never scans the
+whole journal.
+"""
+
+import atexit
+import contextlib
+import json
+import logging
+import os
+import secrets
+import stat
+import threading
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are still atomic within one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# fsync after this many appends, or after FLUSH_INTERVAL, whichever comes first
+BATCH_SIZE = 32
+FLUSH_INTERVAL = 0.05
+
+# Index every Nth entry; tail reads scan at most this many extra lines
+CHECKPOINT_EVERY = 256
+
+# Refresh the index file (and compact, if it found torn lines) after this many appends
+INDEX_REFRESH_EVERY = 1024
+
+
+@contextlib.contextmanager
+def _locked(fd: int):
+    """Exclusive advisory lock, so concurrent workers don't interleave lines."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _write_atomic(path: Path, data: bytes):
+    """
+    Replace path with data. The new file keeps the mode of the one it
+    replaces; a new file gets 0o666 less the umask, as open() would.
+    """
+    tmp_name = path.parent / f"{path.name}.{secrets.token_hex(4)}.tmp"
+    fd = os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with contextlib.suppress(FileNotFoundError):
+            os.chmod(tmp_name, stat.S_IMODE(os.stat(path).st_mode))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
+class OrderJournal:
+    """
+    JSON-lines journal with group commit and a checkpoint index.
+
+    The journal file is opened for each append rather than held open, so a
+    compaction that replaces it is picked up by every process. A line torn
+    by a crash is terminated before the next append and skipped on read.
+
+    The index file describes a prefix of the journal: how many entries and
+    bytes it covers, plus the byte offset of every CHECKPOINT_EVERY-th entry.
+    Because the journal only grows, a stale index is still correct; entries
+    past it are found by reading the short unindexed tail. The index also
+    records the inode of the journal file it describes. compact() replaces
+    the file, so an index left from before a compaction no longer matches,
+    and readers ignore it rather than seek to offsets in a different file.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        legacy_path: Optional[Path] = None,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+    ) -> None:
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".idx")
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._mutex = threading.Lock()
+        self._unsynced = 0
+        self._appends_since_index = 0
+        self._timer: Optional[threading.Timer] = None
+        self._ready = False
+        atexit.register(self.sync)
+
+    def _ensure_ready(self):
+        """Create the journal on first use, importing a legacy JSON history once."""
+        if self._ready:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.path.exists() and self.legacy_path and self.legacy_path.exists():
+            self._import_legacy()
+        self._ready = True
+
+    def _import_legacy(self):
+        """
+        Fill a new, empty journal from the legacy history, under the lock
+        append() takes, so another process can't append or import meanwhile.
+        """
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                with _locked(fd):
+                    st = os.fstat(fd)
+                    if st.st_ino != os.stat(self.path).st_ino:
+                        continue  # replaced while we waited for the lock
+                    if st.st_size:
+                        return  # another process got there first
+                    with open(self.legacy_path) as f:
+                        history = json.load(f)
+                    _write_atomic(self.path, b"".join(self._encode(entry) for entry in history))
+                    break
+            finally:
+                os.close(fd)
+        logger.info(f"Imported {len(history)} orders from {self.legacy_path}")
+        self.checkpoint()
+
+    @staticmethod
+    def _encode(entry: dict) -> bytes:
+        return json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+
+    def append(self, entry: dict):
+        """
+        Append one entry. It is written immediately and made durable by the
+        next group fsync, at most flush_interval later.
+        """
+        self._ensure_ready()
+        line = self._encode(entry)
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                with _locked(fd):
+                    st = os.fstat(fd)
+                    if st.st_ino != os.stat(self.path).st_ino:
+                        continue  # compacted while we waited for the lock
+                    if st.st_size and os.pread(fd, 1, st.st_size - 1) != b"\n":
+                        line = b"\n" + line  # terminate a line torn by a crash
+                    os.write(fd, line)
+                    break
+            finally:
+                os.close(fd)
+
+        with self._mutex:
+            self._unsynced += 1
+            self._appends_since_index += 1
+            sync_now = self._unsynced >= self.batch_size
+            if not sync_now and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+        if sync_now:
+            self.sync()
+        if self._appends_since_index >= INDEX_REFRESH_EVERY and self.checkpoint():
+            self.compact()
+
+    def sync(self):
+        """fsync every entry appended so far."""
+        with self._mutex:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._unsynced:
+                return
+            self._unsynced = 0
+        with contextlib.suppress(FileNotFoundError):
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _read_index(self, inode: int) -> dict:
+        """The index, if it describes the journal file with this inode."""
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if index.get("inode") == inode:
+                return index
+        except (FileNotFoundError, ValueError):
+            pass
+        return {"entries": 0, "size": 0, "checkpoints": []}
+
+    def checkpoint(self) -> int:
+        """
+        Extend the index over entries appended since it was last written.
+        Returns how many torn lines it skipped.
+        """
+        torn = 0
+        with open(self.path, "rb") as f:
+            inode = os.fstat(f.fileno()).st_ino
+            index = self._read_index(inode)
+            entries, offset = index["entries"], index["size"]
+            checkpoints = index["checkpoints"]
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # incomplete last line; index it next time
+                try:
+                    json.loads(line)
+                except ValueError:
+                    offset += len(line)  # torn by a crash; not an entry
+                    torn += 1
+                    continue
+                if entries % CHECKPOINT_EVERY == 0:
+                    checkpoints.append([entries, offset])
+                entries += 1
+                offset += len(line)
+        index = {"inode": inode, "entries": entries, "size": offset, "checkpoints": checkpoints}
+        _write_atomic(self.index_path, json.dumps(index, separators=(",", ":")).encode())
+        self._appends_since_index = 0
+        return torn
+
+    def compact(self):
+        """
+        Rewrite the journal without torn or corrupt lines and rebuild the
+        index. Only needed after a crash; the periodic index refresh runs it
+        when it finds torn lines.
+
+        The rewrite is a new file: appenders in other processes notice the
+        new inode and reopen, and their readers stop trusting the old index.
+        """
+        self._ensure_ready()
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            with _locked(fd):
+                entries = list(self._parse(os.read(fd, os.fstat(fd).st_size)))
+                _write_atomic(self.path, b"".join(self._encode(e) for e in entries))
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self.index_path)
+                self.checkpoint()
+        finally:
+            os.close(fd)
+        logger.info(f"Compacted order journal: {len(entries)} entries")
+
+    @staticmethod
+    def _parse(data: bytes) -> list[dict]:
+        entries = []
+        for line in data.splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # torn by a crash
+        return entries
+
+    def tail(self, limit: int) -> list[dict]:
+        """The last limit entries, oldest first, reading only the end of the journal."""
+        self._ensure_ready()
+        if limit <= 0 or not self.path.exists():
+            return []
+        with open(self.path, "rb") as f:
+            index = self._read_index(os.fstat(f.fileno()).st_ino)
+            f.seek(index["size"])
+            recent = self._parse(f.read())
+            if len(recent) >= limit:
+                return recent[-limit:]
+
+            # Start at the last checkpoint at or before the first entry we need
+            first_needed = max(index["entries"] - (limit - len(recent)), 0)
+            start_entry, start_offset = 0, 0
+            for entry_no, offset in reversed(index["checkpoints"]):
+                if entry_no <= first_needed:
+                    start_entry, start_offset = entry_no, offset
+                    break
+            f.seek(start_offset)
+            older = self._parse(f.read(index["size"] - start_offset))
+        return (older[first_needed - start_entry:] + recent)[-limit:]
+
+    def __len__(self) -> int:
+        self._ensure_ready()
+        if not self.path.exists():
+            return 0
+        with open(self.path, "rb") as f:
+            index = self._read_index(os.fstat(f.fileno()).st_ino)
+            f.seek(index["size"])
+            return index["entries"] + len(self._parse(f.read()))
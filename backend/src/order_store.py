@@ -0,0 +1,269 @@
+"""
+Order storage backends.
+
+JsonFileOrderStore keeps the original layout: one order_<id>.json per
+order plus the order history journal. SqliteOrderStore keeps everything in
+a single SQLite database, which stays fast with millions of orders.
+
+The backend is chosen with ORDER_STORE: "json" (default) or
+"sqlite:///path/to/orders.db".
+
+Usage:
+    uv run python src/order_store.py migrate [--orders-dir PATH] [--to PATH]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Protocol
+
+from order_journal import OrderJournal
+
+logger = logging.getLogger(__name__)
+
+ORDERS_DIR = Path(os.environ.get("ORDERS_DIR", "../shared-data/orders"))
+ORDER_STORE = os.environ.get("ORDER_STORE", "json")
+SQLITE_DEFAULT_PATH = Path("../shared-data/orders.db")
+
+# Idle connections kept per process
+SQLITE_POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", "4"))
+# Orders inserted per transaction when migrating
+MIGRATE_BATCH = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    buyer TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_created_at ON orders (created_at);
+CREATE INDEX IF NOT EXISTS orders_buyer ON orders (buyer, created_at);
+"""
+
+# Fixed statement texts, so each connection's statement cache prepares them once
+_INSERT_ORDER = (
+    "INSERT OR REPLACE INTO orders (id, buyer, total, currency, created_at, body) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SELECT_ORDER = "SELECT body FROM orders WHERE id = ?"
+_SELECT_HISTORY = (
+    "SELECT id, total, currency, created_at, buyer FROM orders "
+    "ORDER BY created_at DESC, rowid DESC LIMIT ?"
+)
+_SELECT_BUYER_HISTORY = (
+    "SELECT id, total, currency, created_at, buyer FROM orders WHERE buyer = ? "
+    "ORDER BY created_at DESC, rowid DESC LIMIT ?"
+)
+
+
+def _summary(order: dict) -> dict:
+    """The order history entry for an order."""
+    return {
+        "order_id": order["id"],
+        "total": order["total"],
+        "currency": order["currency"],
+        "created_at": order["created_at"],
+        "buyer": order["buyer"]["name"],
+    }
+
+
+class OrderStore(Protocol):
+    def save(self, order: dict) -> None: ...
+
+    def get(self, order_id: str) -> Optional[dict]: ...
+
+    def history(self, limit: int = 10, buyer: Optional[str] = None) -> list[dict]:
+        """Order summaries, most recent first."""
+        ...
+
+
+class JsonFileOrderStore:
+    """One JSON file per order, with summaries in an OrderJournal."""
+
+    def __init__(self, orders_dir: Path = ORDERS_DIR) -> None:
+        self.orders_dir = Path(orders_dir)
+        self.orders_dir.mkdir(parents=True, exist_ok=True)
+        self.journal = OrderJournal(
+            self.orders_dir / "order_history.jsonl",
+            legacy_path=self.orders_dir / "order_history.json",
+        )
+
+    def _order_file(self, order_id: str) -> Path:
+        return self.orders_dir / f"order_{order_id}.json"
+
+    def save(self, order: dict):
+        with open(self._order_file(order["id"]), "w") as f:
+            json.dump(order, f, indent=2)
+        self.journal.append(_summary(order))
+
+    def get(self, order_id: str) -> Optional[dict]:
+        order_file = self._order_file(order_id)
+        if order_file.exists():
+            with open(order_file) as f:
+                return json.load(f)
+        return None
+
+    def history(self, limit: int = 10, buyer: Optional[str] = None) -> list[dict]:
+        if buyer is None:
+            return self.journal.tail(limit)[::-1]
+        # The journal has no buyer index, so this reads all of it
+        matches = [e for e in self.journal.tail(len(self.journal)) if e.get("buyer") == buyer]
+        return matches[-limit:][::-1] if limit > 0 else []
+
+    def iter_orders(self):
+        """Every stored order, in no particular order."""
+        with os.scandir(self.orders_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith("order_") and entry.name.endswith(".json") \
+                        and entry.name != "order_history.json":
+                    with open(entry.path) as f:
+                        yield json.load(f)
+
+
+class SqliteOrderStore:
+    """
+    Orders in an SQLite database in WAL mode, so readers never block the
+    writer and concurrent workers can share one file.
+
+    Each process keeps its own small pool of connections; a pool inherited
+    across fork() is discarded rather than reused.
+    """
+
+    def __init__(self, path: Path = SQLITE_DEFAULT_PATH, pool_size: int = SQLITE_POOL_SIZE) -> None:
+        self.path = Path(path)
+        self.pool_size = pool_size
+        self._pool: list[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        self._pid = os.getpid()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL commits are durable at checkpoints; a crash may lose the last few
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextlib.contextmanager
+    def _connection(self):
+        with self._pool_lock:
+            if self._pid != os.getpid():
+                self._pool, self._pid = [], os.getpid()
+            conn = self._pool.pop() if self._pool else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        except BaseException:
+            conn.close()
+            raise
+        with self._pool_lock:
+            if len(self._pool) < self.pool_size:
+                self._pool.append(conn)
+                conn = None
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, []
+        for conn in pool:
+            conn.close()
+
+    @staticmethod
+    def _row(order: dict) -> tuple:
+        return (
+            order["id"],
+            order["buyer"]["name"],
+            order["total"],
+            order["currency"],
+            order["created_at"],
+            json.dumps(order, separators=(",", ":")),
+        )
+
+    def save(self, order: dict):
+        with self._connection() as conn:
+            conn.execute(_INSERT_ORDER, self._row(order))
+
+    def save_many(self, orders) -> int:
+        """Insert orders in one transaction. Returns how many were written."""
+        rows = [self._row(order) for order in orders]
+        with self._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(_INSERT_ORDER, rows)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return len(rows)
+
+    def get(self, order_id: str) -> Optional[dict]:
+        with self._connection() as conn:
+            row = conn.execute(_SELECT_ORDER, (order_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def history(self, limit: int = 10, buyer: Optional[str] = None) -> list[dict]:
+        if limit <= 0:
+            return []
+        with self._connection() as conn:
+            if buyer is None:
+                rows = conn.execute(_SELECT_HISTORY, (limit,)).fetchall()
+            else:
+                rows = conn.execute(_SELECT_BUYER_HISTORY, (buyer, limit)).fetchall()
+        return [
+            {"order_id": order_id, "total": total, "currency": currency, "created_at": created_at, "buyer": buyer}
+            for order_id, total, currency, created_at, buyer in rows
+        ]
+
+
+def open_order_store(spec: str = ORDER_STORE) -> OrderStore:
+    """Open the backend named by spec: "json" or "sqlite:///path"."""
+    if spec == "json":
+        return JsonFileOrderStore()
+    if spec.startswith("sqlite:///"):
+        # Like SQLAlchemy: sqlite:///relative.db, sqlite:////absolute.db
+        return SqliteOrderStore(Path(spec[len("sqlite:///"):] or SQLITE_DEFAULT_PATH))
+    raise ValueError(f"Unknown ORDER_STORE {spec!r}; expected 'json' or 'sqlite:///path'")
+
+
+def migrate(orders_dir: Path, db_path: Path) -> int:
+    """Copy every order_<id>.json in orders_dir into an SQLite store. Returns the count."""
+    source = JsonFileOrderStore(orders_dir)
+    target = SqliteOrderStore(db_path)
+    migrated, batch = 0, []
+    for order in source.iter_orders():
+        batch.append(order)
+        if len(batch) >= MIGRATE_BATCH:
+            migrated += target.save_many(batch)
+            batch = []
+    migrated += target.save_many(batch)
+    target.close()
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage order storage")
+    parser.add_argument("command", choices=["migrate"])
+    parser.add_argument("--orders-dir", type=Path, default=ORDERS_DIR)
+    parser.add_argument("--to", type=Path, default=SQLITE_DEFAULT_PATH)
+    args = parser.parse_args()
+
+    count = migrate(args.orders_dir, args.to)
+    print(f"Migrated {count} orders into {args.to}")
+    print(f"Set ORDER_STORE=sqlite://{args.to.resolve()} to use it")
+
+
+if __name__ == "__main__":
+    main()
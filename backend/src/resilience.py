@@ -0,0 +1,160 @@
+"""
+Latency and failure handling for calls to a remote service (Murf).
+
+- LatencyTracker keeps recent latencies, to know what "slow" means
+- CircuitBreaker stops calling a service that keeps failing, and lets one
+  trial call through after a cool-down
+- hedged_stream() starts a duplicate request when the first has not
+  answered within the usual (p95) latency, and keeps whichever answers first
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Callable, Optional
+
+from livekit.agents import utils
+
+logger = logging.getLogger(__name__)
+
+# Recent latencies kept for percentiles
+LATENCY_WINDOW = 200
+# Latencies needed before the percentile is trusted
+LATENCY_MIN_SAMPLES = 20
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LatencyTracker:
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = LATENCY_MIN_SAMPLES) -> None:
+        self._recent: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def record(self, seconds: float):
+        self._recent.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The q-th percentile of recent latencies, or None with too few samples."""
+        if len(self._recent) < self.min_samples:
+            return None
+        ordered = sorted(self._recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures. While open, allow()
+    is False; after reset_timeout it lets a single trial call through
+    (half-open), whose outcome closes the breaker or opens it again.
+    Every allowed call must end in record_success(), record_failure() or,
+    if it was cancelled before it had an outcome, release().
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        # When the breaker last opened
+        self.opened_at: Optional[float] = None
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            logger.info("Circuit half-open, sending a trial request")
+            return True
+        self.stats["rejected"] += 1
+        return False
+
+    def record_success(self):
+        if self.state != CLOSED:
+            logger.info("Circuit closed")
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(f"Circuit open after {self.failures} failures")
+                self.stats["opened"] += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """A call ended without an outcome; a half-open breaker lets the next call be its trial."""
+        if self.state == HALF_OPEN:
+            self.state = OPEN
+
+    def metrics(self) -> dict:
+        return {"state": self.state, "failures": self.failures, **self.stats}
+
+
+async def _first(stream: AsyncIterator[bytes]) -> Optional[bytes]:
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+async def hedged_stream(
+    start: Callable[[], AsyncIterator[bytes]],
+    hedge_after: Optional[float],
+    on_hedge: Optional[Callable[[], None]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Chunks of start(). If its first chunk has not arrived after hedge_after
+    seconds (None: never hedge), a second start() races it; the stream that
+    produces a first chunk first is used and the other is cancelled. An
+    attempt's error is raised once no other attempt is left running.
+    """
+    attempts: dict[asyncio.Task, AsyncIterator[bytes]] = {}
+
+    def _attempt():
+        stream = start()
+        attempts[asyncio.create_task(_first(stream))] = stream
+
+    _attempt()
+    timeout = hedge_after
+    winner: Optional[AsyncIterator[bytes]] = None
+    first: Optional[bytes] = None
+    try:
+        while winner is None:
+            done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if on_hedge is not None:
+                    on_hedge()
+                _attempt()
+                timeout = None
+                continue
+            for task in done:
+                stream = attempts.pop(task)
+                if task.exception() is None:
+                    winner, first = stream, task.result()
+                    break
+                if not attempts:
+                    raise task.exception()
+    finally:
+        losers = list(attempts.items())
+        await utils.aio.cancel_and_wait(*(task for task, _ in losers))
+        for _, stream in losers:
+            await stream.aclose()
+
+    try:
+        if first is None:
+            return
+        yield first
+        async for chunk in winner:
+            yield chunk
+    finally:
+        await winner.aclose()
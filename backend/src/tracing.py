@@ -0,0 +1,376 @@
+"""
+Per-turn latency tracing.
+
+A turn is one agent reply (one SpeechHandle) and the user speech that
+prompted it. TurnTracer listens to the AgentSession and builds a timeline
+for each turn from the metrics LiveKit already emits, all keyed by the
+speech ID:
+
+    end_of_utterance  end of user speech -> turn committed (EOUMetrics),
+                      with the STT transcription delay
+    llm               LLM request, with time to first token; one per step
+    tool.<name>       each function tool call (traced_tool on the tools)
+    tts               TTS request, with time to first audio
+    playout           agent state turns to "speaking" -> reply done
+
+Finished turns feed per-stage histograms (p50/p95/p99) and go to the
+exporters: a JSON lines file (TURN_TRACE_FILE) and/or OpenTelemetry spans
+sent to an OTLP collector (TURN_TRACE_OTLP_ENDPOINT).
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import math
+import os
+import time
+from typing import Any, NamedTuple, Optional, Protocol
+
+from livekit.agents import AgentSession, metrics
+
+logger = logging.getLogger(__name__)
+
+# Turns as JSON lines, one per finished turn
+TRACE_FILE = os.environ.get("TURN_TRACE_FILE")
+# OTLP/HTTP endpoint for turn spans, e.g. http://localhost:4318/v1/traces
+OTLP_ENDPOINT = os.environ.get("TURN_TRACE_OTLP_ENDPOINT")
+
+# Metrics for a reply can arrive just after it finishes playing
+FINALIZE_DELAY = 1.0
+
+# Histogram buckets: upper bounds MIN_LATENCY * GROWTH**i, so percentiles
+# are within 5% of the true value
+MIN_LATENCY = 1e-4
+GROWTH = 1.05
+
+
+class Span(NamedTuple):
+    name: str
+    # Wall clock seconds, like LiveKit metric timestamps
+    start: float
+    end: float
+    attributes: dict
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Turn:
+    def __init__(self, turn_id: str, started: float) -> None:
+        self.id = turn_id
+        # When the reply was created; the turn starts earlier if the user spoke
+        self.started = started
+        self.end_of_speech: Optional[float] = None
+        self.first_audio: Optional[float] = None
+        self.ended: Optional[float] = None
+        self.spans: list[Span] = []
+
+    def add_span(self, name: str, start: float, end: float, **attributes):
+        self.spans.append(Span(name, start, end, attributes))
+
+    @property
+    def start(self) -> float:
+        return self.end_of_speech if self.end_of_speech is not None else self.started
+
+    def latencies(self) -> dict[str, list[float]]:
+        """Seconds per stage; stages that ran more than once have several."""
+        stages: dict[str, list[float]] = {}
+        for span in self.spans:
+            stages.setdefault(span.name, []).append(span.duration)
+            if "ttft" in span.attributes:
+                stages.setdefault("llm_ttft", []).append(span.attributes["ttft"])
+            if "ttfb" in span.attributes:
+                stages.setdefault("tts_ttfb", []).append(span.attributes["ttfb"])
+        if self.end_of_speech is not None and self.first_audio is not None:
+            # What the user waits for: silence between their speech and the reply
+            stages["response"] = [self.first_audio - self.end_of_speech]
+        if self.ended is not None:
+            stages["turn"] = [self.ended - self.start]
+        return stages
+
+    def to_dict(self) -> dict:
+        return {
+            "turn_id": self.id,
+            "start": self.start,
+            "end_of_speech": self.end_of_speech,
+            "first_audio": self.first_audio,
+            "end": self.ended,
+            "spans": [
+                {"name": s.name, "start": s.start, "end": s.end, "duration": s.duration, **s.attributes}
+                for s in self.spans
+            ],
+        }
+
+
+class Histogram:
+    """Latency histogram with logarithmic buckets; constant memory however many samples."""
+
+    def __init__(self) -> None:
+        self._buckets: dict[int, int] = {}
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        index = 0 if seconds <= MIN_LATENCY else math.ceil(math.log(seconds / MIN_LATENCY, GROWTH))
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def reset(self):
+        self._buckets.clear()
+        self.count = 0
+        self.max = 0.0
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (0 if empty)."""
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return min(MIN_LATENCY * GROWTH**index, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """Percentiles in milliseconds, for logging."""
+        return {
+            "count": self.count,
+            "p50_ms": round(self.percentile(0.5) * 1000, 1),
+            "p95_ms": round(self.percentile(0.95) * 1000, 1),
+            "p99_ms": round(self.percentile(0.99) * 1000, 1),
+            "max_ms": round(self.max * 1000, 1),
+        }
+
+
+class Exporter(Protocol):
+    def export(self, turn: Turn) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class JsonlExporter:
+    """Appends each turn to a file as one JSON line."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def export(self, turn: Turn):
+        # Opened per turn: turns are seconds apart, nothing is left unflushed
+        # on a crash, and no file handle outlives a session that never closes
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(turn.to_dict()) + "\n")
+
+    def close(self):
+        pass
+
+
+class OTelExporter:
+    """Replays each turn as an OpenTelemetry span tree: a turn span with one child per stage."""
+
+    def __init__(self, provider) -> None:
+        self.provider = provider
+        self._tracer = provider.get_tracer(__name__)
+
+    def export(self, turn: Turn):
+        from opentelemetry import trace
+
+        end = turn.ended or max((s.end for s in turn.spans), default=turn.start)
+        root = self._tracer.start_span(
+            "turn",
+            start_time=_ns(turn.start),
+            attributes={"turn.id": turn.id},
+        )
+        context = trace.set_span_in_context(root)
+        for span in turn.spans:
+            child = self._tracer.start_span(
+                span.name,
+                context=context,
+                start_time=_ns(span.start),
+                attributes=_attributes(span),
+            )
+            child.end(end_time=_ns(span.end))
+        root.end(end_time=_ns(end))
+
+    def close(self):
+        self.provider.shutdown()
+
+
+def _ns(seconds: float) -> int:
+    return int(seconds * 1e9)
+
+
+def _attributes(span: Span) -> dict[str, Any]:
+    # OpenTelemetry attributes can't be None
+    return {k: v for k, v in span.attributes.items() if v is not None}
+
+
+def create_exporters(trace_file: Optional[str] = TRACE_FILE, otlp_endpoint: Optional[str] = OTLP_ENDPOINT) -> list[Exporter]:
+    """Exporters configured by the environment; none by default."""
+    exporters: list[Exporter] = []
+    if trace_file:
+        exporters.append(JsonlExporter(trace_file))
+    if otlp_endpoint:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        provider = TracerProvider(resource=Resource.create({"service.name": "shop-agent"}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=otlp_endpoint)))
+        exporters.append(OTelExporter(provider))
+    return exporters
+
+
+class TurnTracer:
+    def __init__(self, exporters: Optional[list[Exporter]] = None, finalize_delay: float = FINALIZE_DELAY) -> None:
+        self.exporters = exporters or []
+        self.finalize_delay = finalize_delay
+        self._turns: dict[str, Turn] = {}
+        self._pending: dict[str, asyncio.TimerHandle] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self.stats = {"turns": 0, "unmatched_metrics": 0, "export_errors": 0}
+
+    def attach(self, session: AgentSession):
+        session.on("speech_created", lambda ev: self.start_turn(ev.speech_handle))
+        session.on("metrics_collected", lambda ev: self.on_metrics(ev.metrics))
+        session.on("agent_state_changed", lambda ev: self.on_agent_state(session, ev.new_state, ev.created_at))
+
+    def start_turn(self, speech_handle) -> Turn:
+        turn = self._turns[speech_handle.id] = Turn(speech_handle.id, time.time())
+        speech_handle.add_done_callback(lambda handle: self._finish_later(handle.id))
+        return turn
+
+    def turn(self, turn_id: Optional[str]) -> Optional[Turn]:
+        return self._turns.get(turn_id) if turn_id else None
+
+    def on_metrics(self, ev: metrics.AgentMetrics):
+        turn = self.turn(getattr(ev, "speech_id", None))
+        if isinstance(ev, metrics.EOUMetrics):
+            if turn is None:
+                self.stats["unmatched_metrics"] += 1
+                return
+            committed = ev.timestamp - ev.on_user_turn_completed_delay
+            turn.end_of_speech = committed - ev.end_of_utterance_delay
+            turn.add_span(
+                "end_of_utterance", turn.end_of_speech, committed, transcription_delay=ev.transcription_delay
+            )
+        elif isinstance(ev, metrics.LLMMetrics):
+            if turn is None:
+                self.stats["unmatched_metrics"] += 1
+                return
+            turn.add_span(
+                "llm",
+                ev.timestamp - ev.duration,
+                ev.timestamp,
+                ttft=ev.ttft,
+                prompt_tokens=ev.prompt_tokens,
+                completion_tokens=ev.completion_tokens,
+                cancelled=ev.cancelled,
+            )
+        elif isinstance(ev, metrics.TTSMetrics):
+            if turn is None:
+                self.stats["unmatched_metrics"] += 1
+                return
+            turn.add_span(
+                "tts",
+                ev.timestamp - ev.duration,
+                ev.timestamp,
+                ttfb=ev.ttfb,
+                characters=ev.characters_count,
+                audio_duration=ev.audio_duration,
+                cancelled=ev.cancelled,
+            )
+
+    def on_agent_state(self, session: AgentSession, state: str, at: float):
+        speech = session.current_speech
+        turn = self.turn(speech.id if speech is not None else None)
+        if state == "speaking" and turn is not None and turn.first_audio is None:
+            turn.first_audio = at
+
+    def record_tool(self, turn_id: Optional[str], name: str, start: float, end: float, error: Optional[str] = None):
+        turn = self.turn(turn_id)
+        if turn is None:
+            # Called outside a reply (tests, RPC): still worth a latency sample
+            self._record(f"tool.{name}", end - start)
+        else:
+            turn.add_span(f"tool.{name}", start, end, error=error)
+
+    def _finish_later(self, turn_id: str):
+        turn = self._turns.get(turn_id)
+        if turn is not None:
+            # The reply finished playing (or was interrupted)
+            turn.ended = time.time()
+        loop = asyncio.get_running_loop()
+        self._pending[turn_id] = loop.call_later(self.finalize_delay, self.finish, turn_id)
+
+    def finish(self, turn_id: str):
+        """Close a turn: record its latencies and export it."""
+        self._pending.pop(turn_id, None)
+        turn = self._turns.pop(turn_id, None)
+        if turn is None:
+            return
+        if turn.ended is None:
+            turn.ended = max([s.end for s in turn.spans] + [turn.started])
+        if turn.first_audio is not None:
+            turn.add_span("playout", turn.first_audio, turn.ended)
+        turn.spans.sort(key=lambda span: span.start)
+        self.stats["turns"] += 1
+        for stage, values in turn.latencies().items():
+            for value in values:
+                self._record(stage, value)
+        for exporter in self.exporters:
+            try:
+                exporter.export(turn)
+            except Exception as e:
+                self.stats["export_errors"] += 1
+                logger.warning(f"Failed to export turn {turn.id}: {e}")
+
+    def _record(self, stage: str, seconds: float):
+        self.histograms.setdefault(stage, Histogram()).record(seconds)
+
+    async def aclose(self):
+        """Finish every open turn and close the exporters."""
+        for handle in self._pending.values():
+            handle.cancel()
+        for turn_id in list(self._turns):
+            self.finish(turn_id)
+        for exporter in self.exporters:
+            exporter.close()
+        self.exporters = []
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "stages": {stage: h.summary() for stage, h in sorted(self.histograms.items())},
+        }
+
+
+def traced_tool(fn):
+    """
+    Times a function tool of an agent with a `tracer` attribute, as a span of
+    the reply that called it. Goes under @function_tool, which reads the
+    signature and docstring through the wrapper.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(self, context, *args, **kwargs):
+        tracer: Optional[TurnTracer] = getattr(self, "tracer", None)
+        if tracer is None:
+            return await fn(self, context, *args, **kwargs)
+        speech = getattr(context, "speech_handle", None)
+        start = time.time()
+        error: Optional[str] = None
+        try:
+            return await fn(self, context, *args, **kwargs)
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            tracer.record_tool(speech.id if speech is not None else None, fn.__name__, start, time.time(), error)
+
+    return wrapper
+
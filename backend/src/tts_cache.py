@@ -0,0 +1,216 @@
+"""
+Content-addressed cache for synthesized speech.
+
+The agent repeats itself a lot: greetings, "Great choice!", product
+pitches, cart confirmations. Audio is cached by a hash of everything that
+changes how it sounds (voice, style, speed, sample rate and the text), in
+two tiers:
+
+- memory: an LRU within a byte budget, per process
+- disk: one raw PCM file per entry under TTS_CACHE_DIR, memory-mapped on
+  read, so every worker process shares the same page cache copy
+
+Disk writes, and the eviction scans that follow them, run on one
+background thread, so put() never blocks the audio loop on the disk.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_DIR = Path(os.environ.get("TTS_CACHE_DIR", "../shared-data/tts-cache"))
+TTS_CACHE_MEMORY_BYTES = int(os.environ.get("TTS_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+TTS_CACHE_DISK_BYTES = int(os.environ.get("TTS_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+
+# Disk eviction trims the tier to this fraction of its budget
+DISK_LOW_WATER = 0.9
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Writes disk entries for every cache in the process, one at a time, so
+# the disk usage counts are only touched by this thread
+_disk_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-cache-write")
+
+Audio = Union[bytes, memoryview]
+
+
+def normalize_text(text: str) -> str:
+    """
+    Text as it affects speech. Whitespace is collapsed; case and punctuation
+    are kept, since they change pronunciation and intonation.
+    """
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def cache_key(voice: str, style: str, speed: float, sample_rate: int, text: str) -> str:
+    params = [voice, style, speed, sample_rate, normalize_text(text)]
+    return hashlib.sha256(json.dumps(params).encode()).hexdigest()
+
+
+class TTSCache:
+    """
+    Two-tier audio cache. get() checks memory, then disk (promoting disk
+    hits into memory); put() writes memory and queues the disk write.
+    Disk entries are written to a temporary file and renamed into place,
+    so concurrent workers never read a partial entry.
+
+    Set disk_dir=None for a memory-only cache.
+    """
+
+    def __init__(
+        self,
+        disk_dir: Optional[Path] = TTS_CACHE_DIR,
+        memory_bytes: int = TTS_CACHE_MEMORY_BYTES,
+        disk_bytes: int = TTS_CACHE_DISK_BYTES,
+    ) -> None:
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: OrderedDict[str, Audio] = OrderedDict()
+        self._memory_used = 0
+        # Bytes on disk, as last counted plus what this process has written since
+        self._disk_used: Optional[int] = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._memory or (self.disk_dir is not None and self._path(key).exists())
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.pcm"
+
+    def get(self, key: str) -> Optional[Audio]:
+        """Cached audio for key, or None."""
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return audio
+
+        audio = self._read_disk(key)
+        if audio is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["disk_hits"] += 1
+        self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        self._remember(key, audio)
+        if self.disk_dir is not None:
+            _disk_writer.submit(self._write_in_background, key, audio)
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait for disk writes queued so far."""
+        _disk_writer.submit(lambda: None).result(timeout)
+
+    def _remember(self, key: str, audio: Audio):
+        if len(audio) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_used -= len(old)
+        self._memory[key] = audio
+        self._memory_used += len(audio)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+            self.stats["memory_evictions"] += 1
+
+    def _read_disk(self, key: str) -> Optional[memoryview]:
+        if self.disk_dir is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError: empty file
+            return None
+        # Recently used entries survive disk eviction
+        with contextlib.suppress(OSError):
+            os.utime(self._path(key))
+        return memoryview(mapped)
+
+    def _write_in_background(self, key: str, audio: bytes):
+        try:
+            self._write_disk(key, audio)
+        except OSError as e:
+            logger.warning(f"Could not write TTS cache entry {key}: {e}")
+
+    def _write_disk(self, key: str, audio: bytes):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=key, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_name)
+            raise
+
+        if self._disk_used is None:
+            self._disk_used = self._scan_disk()[1]
+        else:
+            self._disk_used += len(audio)
+        if self._disk_used > self.disk_bytes:
+            self._evict_disk()
+
+    def _scan_disk(self) -> tuple[list[tuple[float, int, str]], int]:
+        """(mtime, size, path) of every entry, and their total size."""
+        entries = []
+        for subdir in os.scandir(self.disk_dir):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.endswith(".pcm"):
+                    with contextlib.suppress(FileNotFoundError):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries, sum(size for _, size, _ in entries)
+
+    def _evict_disk(self):
+        """Delete the least recently used entries until under the low-water mark."""
+        entries, used = self._scan_disk()
+        entries.sort()
+        target = self.disk_bytes * DISK_LOW_WATER
+        for _, size, path in entries:
+            if used <= target:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+                self.stats["disk_evictions"] += 1
+            used -= size
+        self._disk_used = used
+
+    def metrics(self) -> dict:
+        """Counters and sizes, for logging."""
+        return {
+            **self.stats,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_used,
+        }
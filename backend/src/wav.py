@@ -0,0 +1,154 @@
+"""
+RIFF/WAV parsing for synthesized speech.
+
+Murf returns WAV files whose header is not always the canonical 44 bytes:
+there may be LIST or fact chunks before the audio, and the sample rate is
+whatever the request negotiated. These helpers walk the RIFF chunks to
+find `fmt ` and `data`, validate the format, and hand out the PCM as
+memoryview slices of the original buffer rather than copies.
+"""
+
+import struct
+from collections.abc import Iterator
+from typing import NamedTuple, Optional, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_RIFF_HEADER = struct.Struct("<4sI4s")
+_CHUNK_HEADER = struct.Struct("<4sI")
+_FMT = struct.Struct("<HHIIHH")
+
+
+class WavFormat(NamedTuple):
+    sample_rate: int
+    num_channels: int
+    bits_per_sample: int
+
+    @property
+    def bytes_per_frame(self) -> int:
+        return self.num_channels * self.bits_per_sample // 8
+
+
+def _parse_fmt(body: memoryview) -> WavFormat:
+    if len(body) < _FMT.size:
+        raise ValueError("WAV fmt chunk is truncated")
+    tag, channels, rate, _, _, bits = _FMT.unpack_from(body)
+    if tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+        # The real format tag is the first two bytes of the subformat GUID
+        tag = struct.unpack_from("<H", body, 24)[0]
+    if tag != WAVE_FORMAT_PCM:
+        raise ValueError(f"Unsupported WAV encoding {tag:#x}; expected PCM")
+    if bits != 16:
+        raise ValueError(f"Unsupported WAV sample width {bits} bits; expected 16")
+    if channels < 1 or rate < 1:
+        raise ValueError(f"Invalid WAV format: {channels} channels at {rate} Hz")
+    return WavFormat(rate, channels, bits)
+
+
+def _parse_header(data: memoryview) -> Optional[tuple[WavFormat, int, Optional[int]]]:
+    """
+    (format, offset of the PCM, PCM length or None if unknown) once data
+    holds everything up to the start of the `data` chunk, else None.
+    """
+    if len(data) < _RIFF_HEADER.size:
+        return None
+    riff, _, wave = _RIFF_HEADER.unpack_from(data)
+    if riff != b"RIFF" or wave != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt: Optional[WavFormat] = None
+    offset = _RIFF_HEADER.size
+    while offset + _CHUNK_HEADER.size <= len(data):
+        chunk_id, size = _CHUNK_HEADER.unpack_from(data, offset)
+        body_start = offset + _CHUNK_HEADER.size
+        if chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk comes before fmt chunk")
+            # Streamed files may not know their length: 0 or 0xFFFFFFFF
+            length = size if 0 < size < 0xFFFFFFFF else None
+            return fmt, body_start, length
+        if body_start + size > len(data):
+            return None
+        if chunk_id == b"fmt ":
+            fmt = _parse_fmt(data[body_start:body_start + size])
+        # Chunks are padded to an even size
+        offset = body_start + size + (size & 1)
+    return None
+
+
+def parse_wav(data: Buffer) -> tuple[WavFormat, memoryview]:
+    """Format and PCM of a complete WAV file. The PCM is a view into data."""
+    view = memoryview(data).cast("B")
+    header = _parse_header(view)
+    if header is None:
+        raise ValueError("WAV file is truncated before its data chunk")
+    fmt, start, length = header
+    end = len(view) if length is None else min(start + length, len(view))
+    end -= (end - start) % fmt.bytes_per_frame
+    return fmt, view[start:end]
+
+
+class WavStreamParser:
+    """
+    Incremental parser for a WAV file arriving in chunks. feed() returns
+    PCM as views of the fed chunks, always a whole number of samples; only
+    the header and a split sample are ever buffered.
+    """
+
+    def __init__(self) -> None:
+        self.format: Optional[WavFormat] = None
+        self._header = bytearray()
+        self._carry = b""
+        self._remaining: Optional[int] = None
+
+    def feed(self, chunk: Buffer) -> list[memoryview]:
+        view = memoryview(chunk).cast("B")
+        out: list[memoryview] = []
+        if self.format is None:
+            buffered = len(self._header)
+            self._header += view
+            header = _parse_header(memoryview(self._header))
+            if header is None:
+                return out
+            self.format, start, self._remaining = header
+            if start < buffered:
+                # PCM that arrived with the header in earlier chunks
+                self._emit(memoryview(bytes(self._header[start:buffered])), out)
+            view = view[max(start - buffered, 0):]
+            self._header = bytearray()
+        self._emit(view, out)
+        return out
+
+    def _emit(self, view: memoryview, out: list[memoryview]):
+        if self._remaining is not None:
+            view = view[:self._remaining]
+            self._remaining -= len(view)
+
+        frame_bytes = self.format.bytes_per_frame
+        if self._carry:
+            need = frame_bytes - len(self._carry)
+            self._carry += bytes(view[:need])
+            view = view[need:]
+            if len(self._carry) < frame_bytes:
+                return
+            out.append(memoryview(self._carry))
+            self._carry = b""
+        whole = len(view) - len(view) % frame_bytes
+        if whole:
+            out.append(view[:whole])
+        self._carry = bytes(view[whole:])
+
+    def close(self):
+        """Check the stream ended after a complete header."""
+        if self.format is None:
+            raise ValueError("WAV stream ended before its data chunk")
+
+
+def frames(pcm: memoryview, fmt: WavFormat, frame_ms: int) -> Iterator[memoryview]:
+    """Fixed-duration slices of pcm; the last may be shorter."""
+    size = fmt.sample_rate * frame_ms // 1000 * fmt.bytes_per_frame
+    for start in range(0, len(pcm), size):
+        yield pcm[start:start + size]
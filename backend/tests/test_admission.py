@@ -0,0 +1,63 @@
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from admission import AdmissionController, LoadReporter
+
+
+def _controller(directory, **kwargs) -> AdmissionController:
+    """A controller on a machine at 10% CPU with a quarter of its 16 GB in use."""
+    memory = SimpleNamespace(total=16 * 2**30, available=12 * 2**30)
+    return AdmissionController(directory=directory, machine_cpu=lambda: 0.1, virtual_memory=lambda: memory, **kwargs)
+
+
+def test_reports_set_per_session_cost(tmp_path) -> None:
+    for job in ["a", "b"]:
+        LoadReporter(job, tts_in_flight=lambda: 2, directory=tmp_path).report(cpu=0.4, rss_mb=100)
+    admission = AdmissionController(directory=tmp_path, session_cpu=0.4, session_rss_mb=100)
+
+    reports = admission.read_reports()
+    assert [r["tts_in_flight"] for r in reports] == [2, 2]
+    # Both jobs run in this process, so each costs half of it
+    admission.update_costs(reports)
+    assert 0.35 < admission.cpu_per_session < 0.4
+    assert 90 < admission.rss_mb_per_session < 100
+
+
+def test_full_before_session_limit(tmp_path) -> None:
+    admission = _controller(tmp_path, threshold=0.7, max_sessions=10, max_tts_in_flight=8)
+    worker = SimpleNamespace(active_jobs=[object()] * 5)
+    assert admission.load(worker) < 0.7
+    assert not admission.full
+
+    # The seventh room would take the worker to 70% of its sessions
+    worker.active_jobs = [object()] * 6
+    assert admission.load(worker) >= 0.7
+    assert admission.full
+    assert admission.metrics()["times_full"] == 1
+
+
+def test_tts_in_flight_counts_towards_load(tmp_path) -> None:
+    LoadReporter("a", tts_in_flight=lambda: 6, directory=tmp_path).report(cpu=0.0, rss_mb=0)
+    admission = _controller(tmp_path, max_tts_in_flight=8)
+    assert admission.load() >= 0.75
+    assert max(admission.loads, key=admission.loads.get) == "tts"
+
+
+def test_reports_of_exited_processes_are_removed(tmp_path) -> None:
+    live = LoadReporter("live", directory=tmp_path)
+    live.report(cpu=0.1, rss_mb=100)
+    gone = tmp_path / "gone.json"
+    gone.write_text(json.dumps({"pid": 2**22 + 1, "time": time.time() - 60, "cpu": 0.1, "rss_mb": 100, "tts_in_flight": 0}))
+
+    reports = AdmissionController(directory=tmp_path).read_reports()
+    assert [r["pid"] for r in reports] == [os.getpid()]
+    assert not gone.exists()
+
+
+def test_controllers_share_one_cpu_sampler(tmp_path) -> None:
+    for _ in range(3):
+        assert 0 <= AdmissionController(directory=tmp_path).load() <= 1
+    assert [t.name for t in threading.enumerate()].count("admission-cpu") == 1
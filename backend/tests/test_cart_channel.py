@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import pytest
+from livekit import rtc
+
+import commerce
+from cart_channel import CART_TOPIC, CartChannel
+from order_store import JsonFileOrderStore
+
+
+class FakeParticipant:
+    def __init__(self) -> None:
+        self.published: list[dict] = []
+        self.rpc_methods: dict = {}
+
+    async def publish_data(self, payload, *, reliable=True, topic=""):
+        assert reliable and topic == CART_TOPIC
+        self.published.append(json.loads(payload))
+
+    def register_rpc_method(self, method, handler):
+        self.rpc_methods[method] = handler
+
+    def unregister_rpc_method(self, method):
+        self.rpc_methods.pop(method, None)
+
+
+class FakeRoom(rtc.EventEmitter):
+    def __init__(self) -> None:
+        super().__init__()
+        self.local_participant = FakeParticipant()
+
+
+@pytest.fixture
+async def channel(tmp_path, monkeypatch):
+    monkeypatch.setattr(commerce, "order_store", JsonFileOrderStore(tmp_path))
+    channel = CartChannel(FakeRoom(), "room-channel")
+    channel.start()
+    yield channel
+    await channel.aclose()
+    commerce.clear_cart("room-channel")
+
+
+def _published(channel: CartChannel) -> list[dict]:
+    return channel.room.local_participant.published
+
+
+async def _call(channel: CartChannel, method: str, **args) -> dict:
+    handler = channel.room.local_participant.rpc_methods[method]
+    return json.loads(await handler(rtc.RpcInvocationData("req", "web-user", json.dumps(args), 5.0)))
+
+
+async def test_changes_are_published_in_order(channel) -> None:
+    commerce.add_to_cart("room-channel", "mouse-001")
+    commerce.add_to_cart("some-other-room", "mug-001")
+    commerce.add_to_cart("room-channel", "mouse-001")
+    await asyncio.sleep(0)
+
+    messages = _published(channel)
+    assert [m["version"] for m in messages] == [1, 2, 3]
+    assert messages[0] == {"type": "cart", "version": 1, "cart": commerce.EMPTY_CART}
+    assert messages[-1]["cart"]["items"][0]["quantity"] == 2
+    commerce.clear_cart("some-other-room")
+
+
+async def test_ui_actions_go_through_the_python_cart(channel) -> None:
+    cart = await _call(channel, "cart.add", product_id="hoodie-001", quantity=2, size="L")
+    assert cart == commerce.get_cart("room-channel")
+    assert cart["total"] == 2 * commerce.get_product_by_id("hoodie-001")["price"]
+
+    order = await _call(channel, "cart.checkout")
+    assert commerce.get_order(order["id"])["total"] == cart["total"]
+    await asyncio.sleep(0)
+
+    assert [m["type"] for m in _published(channel)] == ["cart", "cart", "order", "cart"]
+    assert _published(channel)[-1]["cart"] == commerce.EMPTY_CART
+
+
+async def test_rpc_errors(channel) -> None:
+    with pytest.raises(rtc.RpcError, match="not found"):
+        await _call(channel, "cart.add", product_id="nope-001")
+    for bad in ({"quantity": 0}, {"quantity": "2"}, {"quantity": 1.5}, {"size": "XS"}, {"size": None}):
+        with pytest.raises(rtc.RpcError, match=r"quantity|size"):
+            await _call(channel, "cart.add", **{"product_id": "hoodie-001", "size": "L", **bad})
+    with pytest.raises(rtc.RpcError, match="size"):
+        await _call(channel, "cart.add", product_id="mug-001", size="L")
+    assert commerce.get_cart("room-channel") == {"items": []}
+    with pytest.raises(rtc.RpcError, match="Cart is empty"):
+        await _call(channel, "cart.checkout")
+    with pytest.raises(rtc.RpcError, match="product_id"):
+        await _call(channel, "cart.remove")
+
+
+async def test_late_joiner_gets_the_cart(channel) -> None:
+    commerce.add_to_cart("room-channel", "mug-001")
+    channel.room.emit("participant_connected", object())
+    await asyncio.sleep(0)
+    assert _published(channel)[-1]["cart"]["items"][0]["product_id"] == "mug-001"
+
+
+async def test_close_stops_publishing(channel) -> None:
+    await channel.aclose()
+    commerce.add_to_cart("room-channel", "mug-001")
+    await asyncio.sleep(0)
+    assert len(_published(channel)) == 1
+    assert channel.room.local_participant.rpc_methods == {}
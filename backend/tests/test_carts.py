@@ -0,0 +1,184 @@
+import asyncio
+
+import pytest
+
+import commerce
+from carts import Cart, CartStore, session_key
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _product(product_id: str, price: int = 100) -> dict:
+    return {"id": product_id, "name": product_id.title(), "price": price, "currency": "INR"}
+
+
+def _add_line(store: CartStore, session_id: str) -> None:
+    cart = store.get_or_create(session_id)
+    store.lines_changed(session_id, cart.add(_product(f"item-{len(cart)}")))
+
+
+def test_idle_carts_expire() -> None:
+    clock = FakeClock()
+    store = CartStore(idle_ttl=60, clock=clock)
+    _add_line(store, "room-a")
+    clock.now = 30
+    _add_line(store, "room-b")
+
+    clock.now = 70
+    assert store.evict_expired() == 1
+    assert store.get("room-a") is None
+    assert store.get("room-b") is not None
+    assert store.metrics()["evicted_idle"] == 1
+    assert store.line_count == 1
+
+
+def test_least_recently_used_cart_is_evicted_at_session_cap() -> None:
+    clock = FakeClock()
+    store = CartStore(max_sessions=2, clock=clock)
+    for name in ("a", "b"):
+        clock.now += 1
+        _add_line(store, name)
+    clock.now += 1
+    store.get("a")  # "b" is now least recently used
+    _add_line(store, "c")
+
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.metrics()["evicted_lru"] == 1
+
+
+def test_line_cap_evicts_other_sessions_only() -> None:
+    store = CartStore(max_lines=3)
+    for _ in range(2):
+        _add_line(store, "a")
+    for _ in range(2):
+        _add_line(store, "b")
+
+    assert store.get("a") is None
+    assert len(store.get("b")) == 2
+    assert store.metrics()["evicted_lines"] == 1
+
+
+@pytest.mark.asyncio
+async def test_locked_carts_are_not_evicted() -> None:
+    clock = FakeClock()
+    store = CartStore(idle_ttl=10, clock=clock)
+    _add_line(store, "a")
+    async with store.lock("a"):
+        clock.now = 100
+        assert store.evict_expired() == 0
+    assert store.evict_expired() == 1
+
+
+async def test_locks_are_dropped_once_unused() -> None:
+    store = CartStore()
+    async with store.lock("no-cart"):
+        pass
+    assert store._locks == {} and store._lock_users == {}
+
+
+async def test_discard_keeps_lock_for_waiters() -> None:
+    store = CartStore()
+    _add_line(store, "a")
+    holders = []
+    overlapped = False
+
+    async def critical_section(name: str, discard_after: bool = False):
+        nonlocal overlapped
+        async with store.lock("a"):
+            holders.append(name)
+            overlapped = overlapped or len(holders) > 1
+            await asyncio.sleep(0.01)
+            holders.remove(name)
+        if discard_after:
+            # Released, but the waiter hasn't taken the lock yet
+            store.discard("a")
+
+    first = asyncio.create_task(critical_section("first", discard_after=True))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(critical_section("waiter"))
+    await first
+    await asyncio.gather(waiter, critical_section("late"))
+    assert not overlapped
+    assert store._locks == {}
+
+
+def test_cart_merges_lines_and_keeps_running_total() -> None:
+    cart = Cart()
+    assert cart.add(_product("mug", 300)) == 1
+    assert cart.add(_product("tee", 500), 1, "M") == 1
+    assert cart.add(_product("tee", 500), 2, "M") == 0
+    assert cart.add(_product("tee", 500), 1, "L") == 1
+    assert cart.total == 300 + 3 * 500 + 500
+
+    view = cart.view()
+    assert cart.view() is view  # cached until the next change
+    assert [(i["product_id"], i["size"], i["quantity"], i["item_total"]) for i in view["items"]] == [
+        ("mug", None, 1, 300), ("tee", "M", 3, 1500), ("tee", "L", 1, 500),
+    ]
+
+    assert cart.remove("tee") == 2
+    assert cart.remove("tee") == 0
+    assert cart.total == 300
+    assert cart.view() is not view and cart.view()["total"] == 300
+
+
+def test_cart_reprice_follows_catalog() -> None:
+    cart = Cart()
+    cart.add(_product("mug", 300), 2)
+    cart.add(_product("gone", 50))
+    catalog = {"mug": _product("mug", 350)}
+    assert cart.reprice("v2", lambda ids: [catalog.get(i) for i in ids]) == 1
+    assert cart.total == 700
+    assert cart.priced_by == "v2"
+    assert [i["product_id"] for i in cart.view()["items"]] == ["mug"]
+
+
+def test_get_cart_reprices_after_catalog_reload() -> None:
+    original = list(commerce.PRODUCTS)
+    session_id = session_key("room-reload")
+    try:
+        commerce.add_to_cart(session_id, "cap-001", 2)
+        commerce.upsert_product({**commerce.get_product_by_id("cap-001"), "price": 599})
+        cart = commerce.get_cart(session_id)
+        assert cart["total"] == 1198
+        assert cart["items"][0]["item_total"] == 1198
+    finally:
+        commerce.reload_catalog(original)
+        commerce.clear_cart(session_id)
+
+
+def test_rooms_have_separate_carts() -> None:
+    room_a, room_b = session_key("room-a"), session_key("room-b", "customer-1")
+    try:
+        commerce.add_to_cart(room_a, "mug-001")
+        commerce.add_to_cart(room_b, "cap-001", 2)
+        assert [i["product_id"] for i in commerce.get_cart(room_a)["items"]] == ["mug-001"]
+        assert commerce.get_cart(room_b)["total"] == 998
+    finally:
+        commerce.clear_cart(room_a)
+        commerce.clear_cart(room_b)
+    assert commerce.get_cart(room_a) == {"items": []}
+
+
+def test_cart_changes_return_the_line_not_the_cart() -> None:
+    session_id = session_key("room-change")
+    try:
+        commerce.add_to_cart(session_id, "mug-001")
+        added = commerce.add_to_cart(session_id, "mug-001", 2)
+        assert added["item"]["quantity"] == 3
+        assert added["total"] == added["item"]["item_total"] == commerce.get_cart(session_id)["total"]
+        # Nobody is listening, so no view was built for the change
+        commerce.add_to_cart(session_id, "cap-001")
+        assert commerce.cart_store.get(session_id)._view is None
+        assert commerce.remove_from_cart(session_id, "mug-001")["removed"] == 1
+        assert commerce.remove_from_cart(session_id, "mug-001")["removed"] == 0
+        assert commerce.remove_from_cart("room-none", "mug-001")["total"] == 0
+    finally:
+        commerce.clear_cart(session_id)
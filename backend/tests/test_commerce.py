@@ -0,0 +1,182 @@
+import json
+import os
+
+import commerce
+from catalog import CatalogIndex
+from catalog_store import CatalogWatcher, MappedCatalog, compile_catalog
+
+
+def _linear_filter(products, category=None, max_price=None, color=None, search=None):
+    results = list(products)
+    if category:
+        results = [p for p in results if p.get("category", "").lower() == category.lower()]
+    if max_price:
+        results = [p for p in results if p["price"] <= max_price]
+    if color:
+        results = [p for p in results if p.get("color", "").lower() == color.lower()]
+    if search:
+        results = [
+            p for p in results
+            if search.lower() in p["name"].lower() or search.lower() in p.get("description", "").lower()
+        ]
+    return results
+
+
+def test_list_products_matches_linear_filters() -> None:
+    """The indexed catalog returns the same products as a full scan."""
+    cases = [
+        {},
+        {"category": "hoodie"},
+        {"category": "Accessory", "max_price": 2000},
+        {"color": "BLACK"},
+        {"color": "black", "max_price": 900},
+        {"max_price": 500},
+        {"max_price": 1},
+        {"category": "mug", "color": "white"},
+        {"category": "unknown"},
+        {"search": "hoodie"},
+        {"search": "Black", "max_price": 3000},
+        {"category": "accessory", "search": "rgb"},
+        {"search": "hoodies"},
+    ]
+    for filters in cases:
+        assert commerce.list_products(**filters) == _linear_filter(commerce.PRODUCTS, **filters)
+
+
+def test_search_ranks_and_normalizes() -> None:
+    """Plurals, spelling variants and prefixes match; best match comes first."""
+    assert {p["id"] for p in commerce.search_products("hoodies")} == {"hoodie-001", "hoodie-002"}
+    assert {p["id"] for p in commerce.search_products("hoody")} == {"hoodie-001", "hoodie-002"}
+    assert commerce.search_products("key")[0]["id"] == "keyboard-001"
+    assert commerce.search_products("rgb mouse")[0]["id"] == "mouse-001"
+    assert commerce.search_products("black cyberpunk hoodie")[0]["id"] == "hoodie-001"
+    assert [p["id"] for p in commerce.search_products("t-shirt", limit=1)] in (["tshirt-001"], ["tshirt-002"])
+    assert commerce.search_products("the a of") == []
+
+
+def test_search_combines_with_filters() -> None:
+    assert [p["id"] for p in commerce.list_products(category="accessory", search="cherry")] == ["keyboard-001"]
+    assert [p["id"] for p in commerce.search_products("rgb", max_price=2000)] == ["mouse-001"]
+    assert len(commerce.search_products("black", limit=2)) == 2
+
+
+def test_catalog_index_handles_missing_optional_fields() -> None:
+    index = CatalogIndex([
+        {"id": "a", "name": "Plain", "price": 10},
+        {"id": "b", "name": "Blue", "price": 5, "color": "Blue", "category": "cap"},
+    ])
+    assert [p["id"] for p in index.query(color="blue")] == ["b"]
+    assert [p["id"] for p in index.query(max_price=7)] == ["b"]
+    assert [p["id"] for p in index.query()] == ["a", "b"]
+
+
+def test_get_products_by_ids_is_aligned_with_input() -> None:
+    products = commerce.get_products_by_ids(["mouse-001", "nope", "mug-001"])
+    assert [p["id"] if p else None for p in products] == ["mouse-001", None, "mug-001"]
+    assert commerce.get_product_by_id("keyboard-001")["price"] == 3999
+    assert commerce.get_product_by_id("nope") is None
+
+
+def test_lookup_stays_consistent_after_catalog_changes() -> None:
+    original = list(commerce.PRODUCTS)
+    try:
+        commerce.upsert_product({**commerce.get_product_by_id("cap-001"), "price": 599})
+        assert commerce.get_product_by_id("cap-001")["price"] == 599
+        assert commerce.list_products(max_price=500) == []
+
+        commerce.upsert_product({"id": "sock-001", "name": "Binary Socks", "price": 299, "category": "socks"})
+        assert commerce.get_product_by_id("sock-001")["name"] == "Binary Socks"
+        assert [p["id"] for p in commerce.list_products(category="socks")] == ["sock-001"]
+
+        assert commerce.remove_product("sock-001")
+        assert not commerce.remove_product("sock-001")
+        assert commerce.get_product_by_id("sock-001") is None
+    finally:
+        commerce.reload_catalog(original)
+    assert commerce.get_product_by_id("cap-001")["price"] == 499
+
+
+def test_resolve_products_handles_transcript_errors() -> None:
+    """Misheard product names resolve to the intended products."""
+    def top(text):
+        return commerce.resolve_products(text)[0]["id"]
+
+    assert top("key board") == "keyboard-001"
+    assert top("RGB mouse") == "mouse-001"
+    assert top("mechanical keybored") == "keyboard-001"
+    assert top("backpak") == "bag-001"
+    assert {p["id"] for p in commerce.resolve_products("hoody")} == {"hoodie-001", "hoodie-002"}
+    assert [p["id"] for p in commerce.resolve_products("is mug-002 in stock")] == ["mug-002"]
+    assert commerce.resolve_products("something random") == []
+
+
+def test_mapped_catalog_matches_in_memory_index(tmp_path) -> None:
+    compiled = tmp_path / "catalog.bin"
+    compile_catalog(list(commerce.PRODUCTS), compiled)
+    mapped = CatalogIndex(MappedCatalog(compiled))
+    in_memory = CatalogIndex(list(commerce.PRODUCTS))
+
+    for filters in ({}, {"category": "hoodie"}, {"color": "black", "max_price": 1500}, {"search": "rgb"}):
+        assert mapped.query(**filters) == in_memory.query(**filters)
+    assert mapped.get("keyboard-001") == in_memory.get("keyboard-001")
+    assert mapped.get_many(["cap-001", "nope"]) == in_memory.get_many(["cap-001", "nope"])
+    assert mapped.get("nope") is None
+
+
+def test_limited_listing_reads_only_what_it_returns(tmp_path, monkeypatch) -> None:
+    compiled = tmp_path / "catalog.bin"
+    compile_catalog(list(commerce.PRODUCTS), compiled)
+    reads = []
+
+    class CountingCatalog(MappedCatalog):
+        def __getitem__(self, pos):
+            reads.append(pos)
+            return super().__getitem__(pos)
+
+    index = CatalogIndex(CountingCatalog(compiled)).warm()
+    monkeypatch.setattr(commerce, "_catalog", index)
+    everything = index.query()
+    for filters in ({}, {"category": "hoodie"}, {"max_price": 2000}, {"search": "a"}):
+        reads.clear()
+        limited = commerce.list_products(limit=2, **filters)
+        assert len(reads) == len(limited) == 2
+        assert limited == commerce.list_products(**filters)[:2]
+    # Not ranked: the substring match, in catalog order
+    assert commerce.list_products(search="hoodie", limit=1) == [p for p in everything if "hoodie" in p["name"].lower()][:1]
+
+
+def test_catalog_watcher_reloads_on_change(tmp_path) -> None:
+    source = tmp_path / "catalog.json"
+    source.write_text(json.dumps({"products": [{"id": "a-1", "name": "Alpha", "price": 1}]}))
+    watcher = CatalogWatcher(source, tmp_path / "catalog.bin", check_interval=0)
+
+    first = watcher.load()
+    assert [p["id"] for p in first] == ["a-1"]
+    assert watcher.poll() is None
+
+    source.write_text(json.dumps({"products": [{"id": "b-1", "name": "Beta", "price": 2}]}))
+    os.utime(source, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    reloaded = watcher.poll()
+    assert [p["id"] for p in reloaded] == ["b-1"]
+    # The old mapping stays readable for anyone still holding it
+    assert first[0]["name"] == "Alpha"
+
+
+def test_catalog_change_is_indexed_before_it_is_served(tmp_path, monkeypatch) -> None:
+    source = tmp_path / "catalog.json"
+    source.write_text(json.dumps({"products": [{"id": "a-1", "name": "Alpha", "price": 1}]}))
+    watcher = CatalogWatcher(source, tmp_path / "catalog.bin", check_interval=0)
+    first = watcher.load()
+    monkeypatch.setattr(commerce, "_catalog_watcher", watcher)
+    monkeypatch.setattr(commerce, "PRODUCTS", first)
+    monkeypatch.setattr(commerce, "_catalog", CatalogIndex(first))
+
+    source.write_text(json.dumps({"products": [{"id": "b-1", "name": "Beta", "price": 2}]}))
+    os.utime(source, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    # The caller keeps the current catalog while the new one is built
+    assert commerce.current_catalog().get("a-1") is not None
+    commerce._reloading.result()
+
+    reloaded = commerce._catalog
+    assert reloaded.get("b-1") is not None
+    assert reloaded._search is not None and reloaded._resolver is not None
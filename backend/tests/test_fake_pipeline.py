@@ -0,0 +1,26 @@
+import asyncio
+
+from livekit import rtc
+
+from fake_pipeline import PacedAudioOutput
+from tracing import Histogram
+
+
+def _frame(ms: int) -> rtc.AudioFrame:
+    samples = 24000 * ms // 1000
+    return rtc.AudioFrame(bytes(samples * 2), 24000, 1, samples)
+
+
+async def test_speaker_records_underruns() -> None:
+    gaps = Histogram()
+    speaker = PacedAudioOutput(gaps=gaps)
+    await speaker.capture_frame(_frame(20))
+    await speaker.capture_frame(_frame(20))
+    assert speaker.underruns == 0
+
+    # The next frame comes after the 40 ms already captured have played
+    await asyncio.sleep(0.1)
+    await speaker.capture_frame(_frame(20))
+    assert speaker.underruns == 1
+    assert 0.04 < gaps.max < 0.1
+    speaker.clear_buffer()
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import commerce
+from loop_monitor import LoopLagMonitor
+from order_store import JsonFileOrderStore
+
+
+class SlowStore(JsonFileOrderStore):
+    """Order store whose writes take as long as a slow disk."""
+
+    def save(self, order: dict):
+        time.sleep(0.3)
+        super().save(order)
+
+
+async def test_monitor_detects_blocking_call() -> None:
+    monitor = LoopLagMonitor(interval=0.01, stall_threshold=0.1)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    async with monitor.watch("blocking"):
+        time.sleep(0.2)
+    async with monitor.watch("idle"):
+        await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    metrics = monitor.metrics()
+    assert metrics["watched"]["blocking"]["max_ms"] >= 150
+    assert metrics["watched"]["idle"]["max_ms"] < 100
+
+
+async def test_async_checkout_keeps_loop_responsive(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(commerce, "order_store", SlowStore(tmp_path))
+    product = commerce.list_products()[0]
+    monitor = LoopLagMonitor(interval=0.01, stall_threshold=0.1)
+    monitor.start()
+    await asyncio.sleep(0.05)
+
+    commerce.add_to_cart("lag-sync", product["id"])
+    async with monitor.watch("sync"):
+        commerce.create_order("lag-sync")
+    commerce.add_to_cart("lag-async", product["id"])
+    async with monitor.watch("async"):
+        order = await commerce.create_order_async("lag-async", buyer_name="Asha")
+    await monitor.stop()
+
+    assert monitor.watched["sync"]["max_lag"] >= 0.25
+    assert monitor.watched["async"]["max_lag"] < 0.1
+    assert commerce.get_cart("lag-async") == {"items": []}
+    assert (await commerce.get_order_async(order["id"]))["buyer"]["name"] == "Asha"
+    history = await commerce.get_order_history_async(limit=5, buyer_name="Asha")
+    assert [entry["order_id"] for entry in history] == [order["id"]]
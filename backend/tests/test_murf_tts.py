@@ -0,0 +1,168 @@
+import asyncio
+import itertools
+import time
+from array import array
+
+import pytest
+
+import murf_tts
+from murf_stub import SECONDS_PER_CHAR, MurfStub, wav_header
+
+SENTENCE = "Our RGB Gaming Mouse has an ergonomic grip."
+
+
+@pytest.fixture
+async def stub(monkeypatch):
+    monkeypatch.setenv("MURF_API_KEY", "stub")
+    stub = MurfStub(first_byte_latency=0.05, synthesis_speed=4.0)
+    await stub.start()
+    yield stub
+    await stub.stop()
+
+
+async def _frames(stream) -> tuple[list, float]:
+    start = time.perf_counter()
+    first = None
+    frames = []
+    async for ev in stream:
+        if first is None:
+            first = time.perf_counter() - start
+        frames.append(ev.frame)
+    return frames, first
+
+
+async def test_streaming_starts_before_synthesis_finishes(stub) -> None:
+    tts = murf_tts.TTS(base_url=stub.url)
+    assert tts.capabilities.streaming
+    async with tts.synthesize(SENTENCE) as stream:
+        frames, first = await _frames(stream)
+
+    audio_seconds = len(SENTENCE) * SECONDS_PER_CHAR
+    assert first < audio_seconds / stub.synthesis_speed
+    assert sum(f.duration for f in frames) == pytest.approx(audio_seconds, abs=0.02)
+    assert max(f.duration for f in frames) <= murf_tts.FRAME_SIZE_MS / 1000 + 1e-6
+
+
+async def test_whole_file_mode(stub) -> None:
+    tts = murf_tts.TTS(base_url=stub.url, streaming=False)
+    async with tts.synthesize(SENTENCE) as stream:
+        frames, _ = await _frames(stream)
+    assert sum(f.duration for f in frames) == pytest.approx(len(SENTENCE) * SECONDS_PER_CHAR, abs=0.02)
+    assert stub.requests[0]["text"] == SENTENCE
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+async def test_other_sample_rates_are_resampled(monkeypatch, streaming) -> None:
+    monkeypatch.setenv("MURF_API_KEY", "stub")
+    stub = MurfStub(first_byte_latency=0.01, synthesis_speed=20.0, sample_rate=16000)
+    tts = murf_tts.TTS(base_url=await stub.start(), streaming=streaming)
+    try:
+        async with tts.synthesize(SENTENCE) as stream:
+            frames, _ = await _frames(stream)
+    finally:
+        await tts.aclose()
+        await stub.stop()
+    assert {f.sample_rate for f in frames} == {murf_tts.SAMPLE_RATE}
+    assert sum(f.duration for f in frames) == pytest.approx(len(SENTENCE) * SECONDS_PER_CHAR, abs=0.02)
+
+
+async def test_stream_synthesizes_each_sentence(stub) -> None:
+    tts = murf_tts.TTS(base_url=stub.url)
+    stream = tts.stream()
+    stream.push_text("This is the first sentence here. ")
+    stream.push_text("And this is the second sentence.")
+    stream.end_input()
+    frames, _ = await _frames(stream)
+    await stream.aclose()
+
+    assert [r["text"] for r in stub.requests] == [
+        "This is the first sentence here.",
+        "And this is the second sentence.",
+    ]
+    expected = sum(len(r["text"]) for r in stub.requests) * SECONDS_PER_CHAR
+    assert sum(f.duration for f in frames) == pytest.approx(expected, abs=0.02)
+
+
+async def test_sentences_share_one_connection(stub) -> None:
+    tts = murf_tts.TTS(base_url=stub.url, http_client=murf_tts.create_http_client())
+    for _ in range(3):
+        async with tts.synthesize(SENTENCE) as stream:
+            await _frames(stream)
+    assert len(stub.connections) == 1
+
+    # The client is shared; closing one session's TTS leaves it open
+    client = tts._client
+    await tts.aclose()
+    assert not client.is_closed
+    await client.aclose()
+
+    tts = murf_tts.TTS(base_url=stub.url)
+    async with tts.synthesize(SENTENCE) as stream:
+        await _frames(stream)
+    client = tts._client
+    await tts.aclose()
+    assert client.is_closed
+
+
+class ScriptedTTS(murf_tts.TTS):
+    """Murf TTS whose sentences take a scripted time and return marked audio."""
+
+    def __init__(self, delays: dict[str, float], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.delays = delays
+        self.started: list[str] = []
+        self.cancelled: list[str] = []
+        self.max_in_flight = 0
+
+    async def _stream_audio(self, text: str):
+        self.started.append(text)
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays[text])
+            # 100 ms of samples all equal to the sentence number
+            pcm = array("h", [int(text.split()[1])] * 2400).tobytes()
+            yield wav_header(len(pcm)) + pcm
+        except asyncio.CancelledError:
+            self.cancelled.append(text)
+            raise
+
+
+def _sentence(n: int) -> str:
+    return f"Sentence {n} is long enough to stand alone."
+
+
+async def test_pipelined_sentences_play_in_order(monkeypatch) -> None:
+    monkeypatch.setenv("MURF_API_KEY", "stub")
+    # Later sentences finish first
+    delays = {_sentence(n): 0.2 - 0.04 * n for n in range(1, 5)}
+    tts = ScriptedTTS(delays, pipeline_depth=3)
+    stream = tts.stream()
+    stream.push_text(" ".join(delays))
+    stream.end_input()
+
+    start = time.perf_counter()
+    samples = array("h")
+    async for ev in stream:
+        samples.extend(array("h", bytes(ev.frame.data)))
+    elapsed = time.perf_counter() - start
+    await stream.aclose()
+
+    assert [n for n, _ in itertools.groupby(samples) if n] == [1, 2, 3, 4]
+    assert tts.max_in_flight == 3
+    assert elapsed < sum(delays.values())
+
+
+async def test_closing_stream_cancels_in_flight_sentences(monkeypatch) -> None:
+    monkeypatch.setenv("MURF_API_KEY", "stub")
+    delays = {_sentence(1): 0.01, _sentence(2): 5, _sentence(3): 5}
+    tts = ScriptedTTS(delays, pipeline_depth=3)
+    stream = tts.stream()
+    stream.push_text(" ".join(delays))
+    stream.flush()
+
+    async for _ in stream:
+        break  # barge-in after the first frame
+    await stream.aclose()
+
+    assert sorted(tts.cancelled) == [_sentence(2), _sentence(3)]
+    assert tts.in_flight == 0
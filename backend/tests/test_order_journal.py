@@ -0,0 +1,128 @@
+import json
+import os
+import stat
+
+import order_journal
+from order_journal import OrderJournal
+
+
+def _entry(n: int) -> dict:
+    return {"order_id": f"order-{n}", "total": n, "currency": "INR"}
+
+
+def test_tail_reads_across_checkpoints(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(order_journal, "CHECKPOINT_EVERY", 4)
+    journal = OrderJournal(tmp_path / "history.jsonl")
+    for n in range(10):
+        journal.append(_entry(n))
+    journal.checkpoint()
+    for n in range(10, 13):
+        journal.append(_entry(n))
+    journal.sync()
+
+    assert len(journal) == 13
+    for limit in (1, 3, 5, 12, 13, 20):
+        expected = [_entry(n) for n in range(13)][-limit:]
+        assert journal.tail(limit) == expected
+    assert journal.tail(0) == []
+
+
+def test_torn_line_is_skipped_and_compacted(tmp_path) -> None:
+    path = tmp_path / "history.jsonl"
+    journal = OrderJournal(path)
+    journal.append(_entry(1))
+    with open(path, "ab") as f:
+        f.write(b'{"order_id": "tor')  # crash mid-write
+    journal.append(_entry(2))
+    journal.checkpoint()
+
+    assert journal.tail(5) == [_entry(1), _entry(2)]
+    assert len(journal) == 2
+
+    journal.compact()
+    assert path.read_bytes().count(b"\n") == 2
+    assert journal.tail(5) == [_entry(1), _entry(2)]
+
+
+def test_legacy_history_is_imported(tmp_path) -> None:
+    legacy = tmp_path / "history.json"
+    legacy.write_text(json.dumps([_entry(1), _entry(2)], indent=2))
+    journal = OrderJournal(tmp_path / "history.jsonl", legacy_path=legacy)
+    journal.append(_entry(3))
+
+    assert journal.tail(10) == [_entry(1), _entry(2), _entry(3)]
+    assert json.loads(legacy.read_text()) == [_entry(1), _entry(2)]
+
+
+
+def test_legacy_history_is_imported_once(tmp_path) -> None:
+    legacy = tmp_path / "history.json"
+    legacy.write_text(json.dumps([_entry(1), _entry(2)]))
+    first = OrderJournal(tmp_path / "history.jsonl", legacy_path=legacy)
+    second = OrderJournal(tmp_path / "history.jsonl", legacy_path=legacy)
+    first.append(_entry(3))
+    # second found no journal just before first created it
+    second._import_legacy()
+
+    assert second.tail(10) == [_entry(1), _entry(2), _entry(3)]
+
+
+def test_index_of_replaced_journal_is_ignored(tmp_path) -> None:
+    path = tmp_path / "history.jsonl"
+    journal = OrderJournal(path)
+    for n in range(5):
+        journal.append(_entry(n))
+    journal.checkpoint()
+    # Another process compacts: a new, shorter file under the same name
+    replacement = tmp_path / "replacement.jsonl"
+    replacement.write_bytes(OrderJournal._encode(_entry(9)))
+    os.replace(replacement, path)
+
+    assert len(journal) == 1
+    assert journal.tail(5) == [_entry(9)]
+
+
+def test_rewritten_files_keep_their_mode(tmp_path) -> None:
+    legacy = tmp_path / "history.json"
+    legacy.write_text(json.dumps([_entry(1)]))
+    umask = os.umask(0o022)
+    try:
+        journal = OrderJournal(tmp_path / "history.jsonl", legacy_path=legacy)
+        journal.append(_entry(2))
+        assert stat.S_IMODE(journal.path.stat().st_mode) == 0o644
+        assert stat.S_IMODE(journal.index_path.stat().st_mode) == 0o644
+
+        journal.path.chmod(0o640)
+        journal.compact()
+        assert stat.S_IMODE(journal.path.stat().st_mode) == 0o640
+    finally:
+        os.umask(umask)
+
+def test_group_commit_batches_fsyncs(tmp_path, monkeypatch) -> None:
+    synced = []
+    real_fsync = order_journal.os.fsync
+    monkeypatch.setattr(order_journal.os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+    journal = OrderJournal(tmp_path / "history.jsonl", batch_size=4, flush_interval=60)
+    for n in range(8):
+        journal.append(_entry(n))
+
+    assert len(synced) == 2
+    journal.append(_entry(8))
+    journal.sync()
+    assert len(synced) == 3
+
+
+def test_order_history_most_recent_first(tmp_path, monkeypatch) -> None:
+    import commerce
+    from order_store import JsonFileOrderStore
+
+    monkeypatch.setattr(commerce, "order_store", JsonFileOrderStore(tmp_path))
+    product = commerce.list_products()[0]
+    for _ in range(3):
+        commerce.add_to_cart("journal-test", product["id"])
+        commerce.create_order("journal-test")
+
+    history = commerce.get_order_history(limit=2)
+    assert len(history) == 2
+    assert history[0]["created_at"] >= history[1]["created_at"]
+    assert commerce.get_order(history[0]["order_id"])["total"] == product["price"]
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from order_store import JsonFileOrderStore, SqliteOrderStore, migrate, open_order_store
+
+
+def _order(n: int, buyer: str = "Asha") -> dict:
+    return {
+        "id": f"ord{n:05d}",
+        "status": "CONFIRMED",
+        "buyer": {"name": buyer},
+        "line_items": [],
+        "total": 100 * n,
+        "currency": "INR",
+        "created_at": f"2025-01-01T00:00:{n:02d}",
+        "updated_at": f"2025-01-01T00:00:{n:02d}",
+    }
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_backends_agree(tmp_path, backend) -> None:
+    if backend == "json":
+        store = JsonFileOrderStore(tmp_path / "orders")
+    else:
+        store = SqliteOrderStore(tmp_path / "orders.db")
+    for n in range(6):
+        store.save(_order(n, buyer="Asha" if n % 2 else "Ravi"))
+
+    assert store.get("ord00003") == _order(3)
+    assert store.get("missing") is None
+    assert [e["order_id"] for e in store.history(3)] == ["ord00005", "ord00004", "ord00003"]
+    assert [e["order_id"] for e in store.history(10, buyer="Ravi")] == ["ord00004", "ord00002", "ord00000"]
+    assert store.history(0) == []
+
+
+def test_sqlite_uses_wal_and_indexes(tmp_path) -> None:
+    store = SqliteOrderStore(tmp_path / "orders.db", pool_size=1)
+    with store._connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM orders WHERE buyer = ? ORDER BY created_at DESC", ("x",)
+        ).fetchall()
+        first = conn
+    assert "orders_buyer" in str(plan)
+    with store._connection() as conn:
+        assert conn is first  # returned to the pool and reused
+    store.close()
+
+
+def test_migrate_copies_json_orders(tmp_path) -> None:
+    orders_dir = tmp_path / "orders"
+    source = JsonFileOrderStore(orders_dir)
+    for n in range(5):
+        source.save(_order(n))
+    (orders_dir / "order_history.json").write_text(json.dumps([]))
+
+    assert migrate(orders_dir, tmp_path / "orders.db") == 5
+    target = SqliteOrderStore(tmp_path / "orders.db")
+    assert target.get("ord00004") == _order(4)
+    assert len(target.history(100)) == 5
+
+
+def test_open_order_store(tmp_path) -> None:
+    store = open_order_store(f"sqlite:///{tmp_path}/orders.db")
+    assert isinstance(store, SqliteOrderStore)
+    assert store.path == tmp_path / "orders.db"
+    with pytest.raises(ValueError):
+        open_order_store("postgres://db")
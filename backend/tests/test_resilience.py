@@ -0,0 +1,154 @@
+import asyncio
+import time
+
+import pytest
+from livekit.agents import APIConnectOptions, APIStatusError
+
+import murf_tts
+from murf_stub import SECONDS_PER_CHAR, MurfStub
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, hedged_stream
+
+SENTENCE = "Our RGB Gaming Mouse has an ergonomic grip."
+NO_RETRY = APIConnectOptions(max_retry=0)
+
+
+@pytest.fixture
+async def stub(monkeypatch):
+    monkeypatch.setenv("MURF_API_KEY", "stub")
+    stub = MurfStub(first_byte_latency=0.02, synthesis_speed=20.0)
+    await stub.start()
+    yield stub
+    await stub.stop()
+
+
+async def _duration(tts: murf_tts.TTS, text: str = SENTENCE) -> float:
+    async with tts.synthesize(text, conn_options=NO_RETRY) as stream:
+        return sum([ev.frame.duration async for ev in stream])
+
+
+def test_breaker_opens_and_recovers() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # one trial at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+    assert breaker.metrics()["opened"] == 2
+
+
+async def test_hedge_wins_over_slow_attempt() -> None:
+    delays = iter([5, 0.01])
+    closed = []
+
+    async def attempt():
+        delay = next(delays)
+        try:
+            await asyncio.sleep(delay)
+            yield delay
+            yield "rest"
+        finally:
+            closed.append(delay)
+
+    hedges = []
+    start = time.perf_counter()
+    chunks = [c async for c in hedged_stream(attempt, 0.05, lambda: hedges.append(1))]
+    assert chunks == [0.01, "rest"]
+    assert time.perf_counter() - start < 1
+    assert hedges == [1] and sorted(closed) == [0.01, 5]
+
+
+async def test_no_hedge_when_first_answers_in_time() -> None:
+    starts = []
+
+    async def attempt():
+        starts.append(1)
+        yield b"audio"
+
+    assert [c async for c in hedged_stream(attempt, 0.5)] == [b"audio"]
+    assert starts == [1]
+
+
+async def test_slow_request_is_hedged(stub) -> None:
+    tts = murf_tts.TTS(base_url=stub.url)
+    for _ in range(20):
+        tts._first_byte.record(0.05)
+    stub.inject(delay=1)
+
+    start = time.perf_counter()
+    duration = await _duration(tts)
+    assert time.perf_counter() - start < 0.5
+    assert duration == pytest.approx(len(SENTENCE) * SECONDS_PER_CHAR, abs=0.02)
+    assert len(stub.requests) == 2
+    assert tts.metrics()["hedged"] == 1
+    await tts.aclose()
+
+
+async def test_open_circuit_plays_fallback_once(stub) -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    tts = murf_tts.TTS(base_url=stub.url, breaker=breaker)
+    stub.inject(count=2, status=503)
+    for _ in range(2):
+        with pytest.raises(APIStatusError):
+            await _duration(tts)
+    assert breaker.state == OPEN
+
+    # A chime for the first sentence, then silence; Murf is not called
+    assert await _duration(tts) == pytest.approx(0.3, abs=0.02)
+    assert await _duration(tts) < 0.05
+    assert len(stub.requests) == 2
+    assert tts.metrics()["fallbacks"] == 1
+    await tts.aclose()
+
+
+async def test_fallback_phrase_from_cache(stub, tmp_path) -> None:
+    from tts_cache import TTSCache
+
+    cache = TTSCache(disk_dir=None)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    tts = murf_tts.TTS(base_url=stub.url, breaker=breaker, cache=cache)
+    await _duration(tts, murf_tts.FALLBACK_PHRASE)
+
+    stub.inject(status=500)
+    with pytest.raises(APIStatusError):
+        await _duration(tts)
+    expected = len(murf_tts.FALLBACK_PHRASE) * SECONDS_PER_CHAR
+    assert await _duration(tts) == pytest.approx(expected, abs=0.02)
+
+    # The trial request after the reset timeout closes the circuit again
+    await asyncio.sleep(0.06)
+    assert await _duration(tts) == pytest.approx(len(SENTENCE) * SECONDS_PER_CHAR, abs=0.02)
+    assert breaker.state == CLOSED
+    await tts.aclose()
+
+
+async def test_cancelled_trial_lets_another_through(stub) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    tts = murf_tts.TTS(base_url=stub.url, breaker=breaker)
+    stub.inject(status=500)
+    with pytest.raises(APIStatusError):
+        await _duration(tts)
+    await asyncio.sleep(0.06)
+
+    # The user barges in while the trial request is under way
+    stub.inject(delay=1)
+    trial = asyncio.create_task(_duration(tts))
+    await asyncio.sleep(0.1)
+    assert breaker.state == HALF_OPEN
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    assert breaker.state == OPEN
+
+    assert await _duration(tts) == pytest.approx(len(SENTENCE) * SECONDS_PER_CHAR, abs=0.02)
+    assert breaker.state == CLOSED
+    await tts.aclose()
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import random
+
+import pytest
+from livekit.agents import metrics
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from tracing import Histogram, JsonlExporter, OTelExporter, TurnTracer, traced_tool
+
+
+class FakeSpeechHandle:
+    def __init__(self, speech_id: str) -> None:
+        self.id = speech_id
+        self._callbacks = []
+
+    def add_done_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def mark_done(self):
+        for callback in self._callbacks:
+            callback(self)
+
+
+class FakeContext:
+    def __init__(self, speech_handle: FakeSpeechHandle) -> None:
+        self.speech_handle = speech_handle
+
+
+class Tools:
+    def __init__(self, tracer: TurnTracer) -> None:
+        self.tracer = tracer
+
+    @traced_tool
+    async def lookup(self, context, product_id: str):
+        """Look up a product."""
+        await asyncio.sleep(0.02)
+        return product_id
+
+    @traced_tool
+    async def broken(self, context):
+        raise ValueError("no such product")
+
+
+def play_turn(tracer: TurnTracer, speech: FakeSpeechHandle, now: float):
+    """Metrics for a turn whose user stopped speaking at now - 1.5"""
+    tracer.on_metrics(
+        metrics.EOUMetrics(
+            timestamp=now - 1.0,
+            end_of_utterance_delay=0.4,
+            transcription_delay=0.2,
+            on_user_turn_completed_delay=0.1,
+            speech_id=speech.id,
+        )
+    )
+    tracer.on_metrics(
+        metrics.LLMMetrics(
+            label="llm", request_id="r1", timestamp=now - 0.5, duration=0.4, ttft=0.25, cancelled=False,
+            completion_tokens=10, prompt_tokens=100, prompt_cached_tokens=0, total_tokens=110,
+            tokens_per_second=25.0, speech_id=speech.id,
+        )
+    )
+    tracer.on_metrics(
+        metrics.TTSMetrics(
+            label="tts", request_id="r2", timestamp=now, duration=0.6, ttfb=0.3, audio_duration=2.0,
+            cancelled=False, characters_count=40, streamed=False, speech_id=speech.id,
+        )
+    )
+
+
+def test_histogram_percentiles_within_bucket_error() -> None:
+    values = [random.uniform(0.001, 1.0) for _ in range(5000)]
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+    ordered = sorted(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * len(ordered))]
+        assert histogram.percentile(q) == pytest.approx(exact, rel=0.06)
+    assert histogram.percentile(1.0) == max(values)
+    assert Histogram().percentile(0.5) == 0.0
+
+
+async def test_turn_timeline_and_histograms(tmp_path) -> None:
+    path = tmp_path / "turns.jsonl"
+    tracer = TurnTracer([JsonlExporter(str(path))], finalize_delay=0.01)
+    speech = FakeSpeechHandle("speech_1")
+    turn = tracer.start_turn(speech)
+    now = turn.started
+    play_turn(tracer, speech, now)
+    assert await Tools(tracer).lookup(FakeContext(speech), "mouse-001") == "mouse-001"
+    turn.first_audio = now - 0.2
+
+    speech.mark_done()
+    await asyncio.sleep(0.05)
+
+    assert turn.end_of_speech == pytest.approx(now - 1.5)
+    summary = tracer.metrics()
+    assert summary["turns"] == 1
+    stages = summary["stages"]
+    assert set(stages) >= {"end_of_utterance", "llm", "llm_ttft", "tts", "tts_ttfb", "tool.lookup", "response", "turn"}
+    assert stages["response"]["p50_ms"] == pytest.approx(1300, rel=0.05)
+    assert stages["tool.lookup"]["p50_ms"] >= 20
+
+    await tracer.aclose()
+    [line] = path.read_text().splitlines()
+    exported = json.loads(line)
+    assert exported["turn_id"] == "speech_1"
+    names = [span["name"] for span in exported["spans"]]
+    assert names == ["end_of_utterance", "llm", "tts", "playout", "tool.lookup"]
+    assert exported["spans"][0]["transcription_delay"] == 0.2
+
+
+async def test_tool_errors_are_traced_and_raised() -> None:
+    tracer = TurnTracer()
+    speech = FakeSpeechHandle("speech_2")
+    turn = tracer.start_turn(speech)
+    with pytest.raises(ValueError):
+        await Tools(tracer).broken(FakeContext(speech))
+    [span] = turn.spans
+    assert (span.name, span.attributes["error"]) == ("tool.broken", "ValueError")
+
+    # Outside a reply the call is still counted
+    await Tools(tracer).lookup(None, "mug-001")
+    assert tracer.histograms["tool.lookup"].count == 1
+
+
+async def test_otel_export_nests_stages_under_turn() -> None:
+    spans = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(spans))
+    tracer = TurnTracer([OTelExporter(provider)])
+    speech = FakeSpeechHandle("speech_3")
+    turn = tracer.start_turn(speech)
+    play_turn(tracer, speech, turn.started)
+    tracer.on_metrics(metrics.EOUMetrics(timestamp=0, end_of_utterance_delay=0, transcription_delay=0,
+                                         on_user_turn_completed_delay=0, speech_id="unknown"))
+    await tracer.aclose()
+
+    finished = {span.name: span for span in spans.get_finished_spans()}
+    assert set(finished) == {"turn", "end_of_utterance", "llm", "tts"}
+    root = finished["turn"]
+    assert all(finished[name].parent.span_id == root.context.span_id for name in ("llm", "tts"))
+    assert finished["llm"].attributes["ttft"] == 0.25
+    assert root.start_time == int(turn.end_of_speech * 1e9)
+    assert tracer.stats["unmatched_metrics"] == 1
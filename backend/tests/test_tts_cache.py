@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+
+import murf_tts
+from tts_cache import TTSCache, cache_key, normalize_text
+
+
+def test_key_covers_voice_and_normalized_text() -> None:
+    base = cache_key("en-US-ryan", "Conversational", 1.15, 24000, "Great choice!")
+    assert cache_key("en-US-ryan", "Conversational", 1.15, 24000, "  Great   choice! ") == base
+    assert cache_key("en-US-ryan", "Conversational", 1.15, 24000, "Great choice?") != base
+    assert cache_key("en-US-natalie", "Conversational", 1.15, 24000, "Great choice!") != base
+    assert cache_key("en-US-ryan", "Conversational", 1.0, 24000, "Great choice!") != base
+    assert normalize_text("RGB\n mouse ") == "RGB mouse"
+
+
+def test_memory_lru_respects_byte_budget() -> None:
+    cache = TTSCache(disk_dir=None, memory_bytes=300)
+    for key in "abc":
+        cache.put(key, bytes(100))
+    cache.get("a")
+    cache.put("d", bytes(100))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats["memory_evictions"] == 1
+    assert cache.metrics()["memory_bytes"] == 300
+
+
+def test_disk_tier_is_shared_and_evicted(tmp_path) -> None:
+    writer = TTSCache(disk_dir=tmp_path, disk_bytes=1000)
+    writer.put("aa01", b"\x01" * 400)
+    writer.put("aa02", b"\x02" * 400)
+    writer.flush()
+    os.utime(tmp_path / "aa" / "aa01.pcm", (0, 0))
+
+    # Another process: empty memory tier, same directory
+    reader = TTSCache(disk_dir=tmp_path)
+    assert bytes(reader.get("aa02")) == b"\x02" * 400
+    assert reader.stats["disk_hits"] == 1
+    assert reader.get("aa02") is not None
+    assert reader.stats["memory_hits"] == 1
+
+    writer.put("aa03", b"\x03" * 400)
+    writer.flush()
+    assert "aa01" not in TTSCache(disk_dir=tmp_path)
+    assert writer.stats["disk_evictions"] == 1
+
+
+def test_disk_writes_are_off_the_caller_thread(tmp_path, monkeypatch) -> None:
+    cache = TTSCache(disk_dir=tmp_path)
+    writers = []
+    write_disk = cache._write_disk
+
+    def recording_write(key, audio):
+        writers.append(threading.current_thread())
+        write_disk(key, audio)
+
+    monkeypatch.setattr(cache, "_write_disk", recording_write)
+
+    cache.put("bb01", b"\x01" * 400)
+    assert bytes(cache.get("bb01")) == b"\x01" * 400
+    cache.flush()
+    assert writers and writers[0] is not threading.current_thread()
+    assert (tmp_path / "bb" / "bb01.pcm").read_bytes() == b"\x01" * 400
+
+
+def test_memory_hit_is_fast() -> None:
+    cache = TTSCache(disk_dir=None)
+    cache.put("k", bytes(48000))
+    start = time.perf_counter()
+    for _ in range(1000):
+        cache.get("k")
+    assert (time.perf_counter() - start) / 1000 < 50e-6
+
+
+async def test_tts_serves_repeats_from_cache(tmp_path, monkeypatch) -> None:
+    from murf_stub import MurfStub
+
+    monkeypatch.setenv("MURF_API_KEY", "stub")
+    stub = MurfStub(first_byte_latency=0.05, synthesis_speed=8)
+    await stub.start()
+    cache = TTSCache(disk_dir=tmp_path)
+    try:
+        for streaming in (True, False):
+            tts = murf_tts.TTS(base_url=stub.url, streaming=streaming, cache=cache)
+            for _ in range(2):
+                async with tts.synthesize(f"Great choice, streaming={streaming}!") as stream:
+                    frames = [ev.frame async for ev in stream]
+                assert frames
+            await tts.aclose()
+    finally:
+        await stub.stop()
+
+    assert len(stub.requests) == 2
+    assert cache.stats["memory_hits"] == 2
+
+
+async def test_presynthesize_fills_cache_within_budget(tmp_path, monkeypatch) -> None:
+    from murf_stub import MurfStub
+
+    monkeypatch.setenv("MURF_API_KEY", "stub")
+    stub = MurfStub(first_byte_latency=0.05, synthesis_speed=20)
+    await stub.start()
+    phrases = [f"I've added product number {n} to your cart." for n in range(8)]
+    try:
+        tts = murf_tts.TTS(base_url=stub.url, cache=TTSCache(disk_dir=tmp_path))
+        assert await tts.presynthesize(phrases, budget=10) == {"cached": 0, "synthesized": 8, "skipped": 0}
+        assert await tts.presynthesize(phrases, budget=10) == {"cached": 8, "synthesized": 0, "skipped": 0}
+
+        slow = MurfStub(first_byte_latency=1)
+        await slow.start()
+        try:
+            tts = murf_tts.TTS(base_url=slow.url, cache=TTSCache(disk_dir=None))
+            start = time.perf_counter()
+            counts = await tts.presynthesize(phrases, budget=0.2)
+            assert time.perf_counter() - start < 0.8
+            assert counts["skipped"] == 8
+        finally:
+            await slow.stop()
+    finally:
+        await stub.stop()
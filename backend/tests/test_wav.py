@@ -0,0 +1,107 @@
+import struct
+from array import array
+
+import pytest
+
+from murf_stub import wav_header
+from wav import WavFormat, WavStreamParser, frames, parse_wav
+
+PCM = array("h", range(-500, 500)).tobytes()
+
+
+def _chunk(chunk_id: bytes, body: bytes) -> bytes:
+    padding = b"\0" if len(body) % 2 else b""
+    return chunk_id + struct.pack("<I", len(body)) + body + padding
+
+
+def _wav(pcm: bytes, *, before_data: bytes = b"", tag: int = 1, bits: int = 16,
+         rate: int = 24000, data_size: int | None = None) -> bytes:
+    fmt = struct.pack("<HHIIHH", tag, 1, rate, rate * bits // 8, bits // 8, bits)
+    body = b"WAVE" + _chunk(b"fmt ", fmt) + before_data
+    body += b"data" + struct.pack("<I", len(pcm) if data_size is None else data_size) + pcm
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def _streamed(data: bytes, size: int) -> bytes:
+    parser = WavStreamParser()
+    out = b"".join(
+        bytes(pcm) for start in range(0, len(data), size) for pcm in parser.feed(data[start:start + size])
+    )
+    parser.close()
+    assert parser.format == WavFormat(24000, 1, 16)
+    return out
+
+
+def test_canonical_header() -> None:
+    fmt, pcm = parse_wav(wav_header(len(PCM)) + PCM)
+    assert fmt == WavFormat(24000, 1, 16)
+    assert pcm == PCM
+
+
+def test_skips_chunks_before_data() -> None:
+    # Odd-sized LIST chunk, padded to an even length, then a fact chunk
+    extra = _chunk(b"LIST", b"INFOISFT\x03\0\0\0ab\0") + _chunk(b"fact", struct.pack("<I", 1000))
+    data = _wav(PCM, before_data=extra)
+    assert parse_wav(data)[1] == PCM
+    assert _streamed(data, 7) == PCM
+
+
+def test_pcm_is_a_view_of_the_input() -> None:
+    data = bytearray(wav_header(len(PCM)) + PCM)
+    _, pcm = parse_wav(data)
+    data[-2:] = b"\x01\x02"
+    assert pcm[-2:] == b"\x01\x02"
+
+
+@pytest.mark.parametrize("size", [1, 3, 44, 45, 4800])
+def test_stream_split_anywhere(size) -> None:
+    assert _streamed(wav_header(len(PCM)) + PCM, size) == PCM
+
+
+def test_stream_yields_whole_samples() -> None:
+    parser = WavStreamParser()
+    data = wav_header(len(PCM)) + PCM
+    # Header plus a sample and a half, then the other half
+    assert parser.feed(data[:47]) == [PCM[:2]]
+    assert parser.feed(data[47:48]) == [PCM[2:4]]
+    assert parser.feed(data[48:49]) == []
+    assert b"".join(parser.feed(data[49:100])) == PCM[4:56]
+
+
+def test_unknown_data_size_reads_to_end() -> None:
+    for size in (0, 0xFFFFFFFF):
+        data = _wav(PCM, data_size=size)
+        assert parse_wav(data)[1] == PCM
+        assert _streamed(data, 100) == PCM
+
+
+def test_ignores_bytes_after_data_chunk() -> None:
+    data = _wav(PCM) + _chunk(b"LIST", b"trailer")
+    assert parse_wav(data)[1] == PCM
+    assert _streamed(data, 100) == PCM
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"tag": 3, "bits": 32}, "expected PCM"),
+    ({"bits": 8}, "expected 16"),
+])
+def test_rejects_unsupported_formats(kwargs, message) -> None:
+    with pytest.raises(ValueError, match=message):
+        parse_wav(_wav(PCM, **kwargs))
+
+
+def test_rejects_truncated_and_foreign_files() -> None:
+    with pytest.raises(ValueError, match="RIFF"):
+        parse_wav(b"ID3\x04" + bytes(100))
+    with pytest.raises(ValueError, match="truncated"):
+        parse_wav(wav_header(len(PCM))[:30])
+    parser = WavStreamParser()
+    parser.feed(wav_header(len(PCM))[:30])
+    with pytest.raises(ValueError, match="ended"):
+        parser.close()
+
+
+def test_frames() -> None:
+    fmt, pcm = parse_wav(wav_header(len(PCM)) + PCM)
+    sizes = [len(f) for f in frames(pcm, fmt, 20)]
+    assert sizes == [960, 960, 80]
@@ -3,6 +3,8 @@
 import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'motion/react';
 import { ShoppingCart, Package, Plus, Check } from 'lucide-react';
+import { toastAlert } from '@/components/livekit/alert-toast';
+import { useCart } from '@/hooks/useCart';
 import { cn } from '@/lib/utils';
 
 interface Product {
@@ -24,8 +26,10 @@ interface ProductCatalogProps {
 
 export function ProductCatalog({ className }: ProductCatalogProps) {
   const [products, setProducts] = useState<Product[]>([]);
-  const [cart, setCart] = useState<any[]>([]);
+  const { cart, addItem } = useCart();
   const [addedItems, setAddedItems] = useState<Set<string>>(new Set());
+  // Size picked for each sized product; the agent won't add one without it
+  const [sizes, setSizes] = useState<Record<string, string>>({});
 
   useEffect(() => {
     // Load products from backend
@@ -43,33 +47,26 @@ export function ProductCatalog({ className }: ProductCatalogProps) {
     loadProducts();
   }, []);
 
+  const needsSize = (product: Product) => Boolean(product.size?.length) && !sizes[product.id];
+
   const handleAddToCart = async (product: Product) => {
     try {
-      const response = await fetch('/api/cart', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          product_id: product.id,
-          quantity: 1,
-        }),
-      });
+      await addItem(product.id, 1, sizes[product.id]);
 
-      if (response.ok) {
-        const updatedCart = await response.json();
-        setCart(updatedCart.items);
-        
-        // Show checkmark animation
-        setAddedItems(prev => new Set(prev).add(product.id));
-        setTimeout(() => {
-          setAddedItems(prev => {
-            const next = new Set(prev);
-            next.delete(product.id);
-            return next;
-          });
-        }, 2000);
-      }
+      // Show checkmark animation
+      setAddedItems((prev) => new Set(prev).add(product.id));
+      setTimeout(() => {
+        setAddedItems((prev) => {
+          const next = new Set(prev);
+          next.delete(product.id);
+          return next;
+        });
+      }, 2000);
     } catch (error) {
-      console.error('Failed to add to cart:', error);
+      toastAlert({
+        title: `Couldn't add ${product.name} to your cart`,
+        description: error instanceof Error ? error.message : String(error),
+      });
     }
   };
 
@@ -90,9 +87,9 @@ export function ProductCatalog({ className }: ProductCatalogProps) {
           </div>
           <div className="relative">
             <ShoppingCart className="w-5 h-5 text-purple-400" />
-            {cart.length > 0 && (
+            {cart.items.length > 0 && (
               <span className="absolute -top-2 -right-2 bg-cyan-500 text-black text-xs font-bold rounded-full w-5 h-5 flex items-center justify-center">
-                {cart.length}
+                {cart.items.length}
               </span>
             )}
           </div>
@@ -127,11 +124,23 @@ export function ProductCatalog({ className }: ProductCatalogProps) {
                   </div>
 
                   {product.size && (
-                    <div className="mt-1 flex gap-1">
-                      {product.size.slice(0, 4).map(size => (
-                        <span key={size} className="text-[10px] px-1.5 py-0.5 bg-purple-500/20 border border-purple-500/30 rounded text-purple-300">
+                    <div className="mt-1 flex gap-1" role="radiogroup" aria-label={`Size for ${product.name}`}>
+                      {product.size.map((size) => (
+                        <button
+                          key={size}
+                          type="button"
+                          role="radio"
+                          aria-checked={sizes[product.id] === size}
+                          onClick={() => setSizes((prev) => ({ ...prev, [product.id]: size }))}
+                          className={cn(
+                            'text-[10px] px-1.5 py-0.5 border rounded transition-all',
+                            sizes[product.id] === size
+                              ? 'bg-purple-500/60 border-purple-300 text-white'
+                              : 'bg-purple-500/20 border-purple-500/30 text-purple-300 hover:border-purple-400'
+                          )}
+                        >
                           {size}
-                        </span>
+                        </button>
                       ))}
                     </div>
                   )}
@@ -143,11 +152,13 @@ export function ProductCatalog({ className }: ProductCatalogProps) {
                 whileHover={{ scale: 1.02 }}
                 whileTap={{ scale: 0.98 }}
                 onClick={() => handleAddToCart(product)}
-                disabled={addedItems.has(product.id)}
+                disabled={addedItems.has(product.id) || needsSize(product)}
                 className={cn(
                   'w-full mt-3 py-2 rounded font-bold text-xs uppercase tracking-wider transition-all',
                   addedItems.has(product.id)
                     ? 'bg-green-500/20 border border-green-500/50 text-green-400'
+                    : needsSize(product)
+                    ? 'bg-black/40 border border-gray-600/50 text-gray-500 cursor-not-allowed'
                     : 'bg-gradient-to-r from-cyan-500/20 to-purple-500/20 border border-cyan-500/50 text-cyan-400 hover:border-cyan-500/80'
                 )}
               >
@@ -156,6 +167,8 @@ export function ProductCatalog({ className }: ProductCatalogProps) {
                     <Check className="w-4 h-4" />
                     ADDED
                   </span>
+                ) : needsSize(product) ? (
+                  <span className="flex items-center justify-center gap-2">SELECT A SIZE</span>
                 ) : (
                   <span className="flex items-center justify-center gap-2">
                     <Plus className="w-4 h-4" />
@@ -1,69 +1,49 @@
 'use client';
 
-import React, { useState, useEffect } from 'react';
+import React, { useEffect, useState } from 'react';
 import { motion, AnimatePresence } from 'motion/react';
 import { ShoppingCart, Trash2, CreditCard } from 'lucide-react';
+import { type CartItem, useCart } from '@/hooks/useCart';
 import { cn } from '@/lib/utils';
 
-interface CartItem {
-  product_id: string;
-  name: string;
-  quantity: number;
-  price: number;
-  currency: string;
-  item_total: number;
-  size?: string;
-}
-
 interface ShopCartProps {
   className?: string;
 }
 
 export function ShopCart({ className }: ShopCartProps) {
-  const [cart, setCart] = useState<{ items: CartItem[]; total: number; currency: string }>({
-    items: [],
-    total: 0,
-    currency: 'INR',
-  });
+  // Updated by the agent on every change, from voice or from these buttons
+  const { cart, lastOrder, removeItem, checkout } = useCart();
   const [showSuccess, setShowSuccess] = useState(false);
   const [orderSummary, setOrderSummary] = useState<{ items: CartItem[]; total: number } | null>(null);
 
-  const fetchCart = async () => {
-    try {
-      const response = await fetch('/api/cart');
-      if (response.ok) {
-        const data = await response.json();
-        setCart(data);
-      }
-    } catch (error) {
-      console.error('Failed to fetch cart:', error);
-    }
-  };
-
+  // Show every new order, whether placed by voice or with the checkout button
   useEffect(() => {
-    fetchCart();
-    // Poll for updates every 2 seconds
-    const interval = setInterval(fetchCart, 2000);
-    return () => clearInterval(interval);
-  }, []);
+    if (!lastOrder) return;
+    setOrderSummary({
+      items: lastOrder.line_items.map((item) => ({
+        product_id: item.product_id,
+        name: item.product_name,
+        quantity: item.quantity,
+        price: item.total / item.quantity,
+        currency: lastOrder.currency,
+        item_total: item.total,
+        size: item.size,
+      })),
+      total: lastOrder.total,
+    });
+    setShowSuccess(true);
+
+    // Hide after 5 seconds (longer to read items)
+    const timeout = setTimeout(() => {
+      setShowSuccess(false);
+      setOrderSummary(null);
+    }, 5000);
+    return () => clearTimeout(timeout);
+  }, [lastOrder]);
 
-  const removeItem = async (productId: string) => {
-    console.log('Attempting to remove product:', productId);
+  const handleRemove = async (productId: string) => {
     try {
-      const response = await fetch(`/api/cart/${productId}`, {
-        method: 'DELETE',
-      });
-      console.log('Delete response status:', response.status);
-      if (response.ok) {
-        const data = await response.json();
-        console.log('Updated cart:', data);
-        // Update state immediately with the response
-        setCart(data);
-      } else {
-        console.error('Delete failed with status:', response.status);
-        const errorText = await response.text();
-        console.error('Error response:', errorText);
-      }
+      await removeItem(productId);
     } catch (error) {
       console.error('Failed to remove item:', error);
     }
@@ -71,40 +51,8 @@ export function ShopCart({ className }: ShopCartProps) {
 
   const handleCheckout = async () => {
     if (cart.items.length === 0) return;
-    
-    // Save order summary before clearing cart
-    const summary = {
-      items: [...cart.items],
-      total: cart.total
-    };
-    
     try {
-      // Create order via checkout endpoint
-      const response = await fetch('/api/checkout', {
-        method: 'POST',
-      });
-      
-      if (response.ok) {
-        const result = await response.json();
-        console.log('Order created:', result);
-        
-        // Save order summary for success message
-        setOrderSummary(summary);
-        
-        // Clear cart state
-        setCart({ items: [], total: 0, currency: 'INR' });
-        
-        // Show success message
-        setShowSuccess(true);
-        
-        // Hide after 5 seconds (longer to read items)
-        setTimeout(() => {
-          setShowSuccess(false);
-          setOrderSummary(null);
-        }, 5000);
-      } else {
-        console.error('Checkout failed');
-      }
+      await checkout();
     } catch (error) {
       console.error('Checkout failed:', error);
     }
@@ -152,7 +100,7 @@ export function ShopCart({ className }: ShopCartProps) {
                 <motion.button
                   whileHover={{ scale: 1.1 }}
                   whileTap={{ scale: 0.9 }}
-                  onClick={() => removeItem(item.product_id)}
+                  onClick={() => handleRemove(item.product_id)}
                   className="text-red-400 hover:text-red-300 transition-colors"
                 >
                   <Trash2 className="w-4 h-4" />
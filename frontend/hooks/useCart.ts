@@ -0,0 +1,107 @@
+import { useCallback, useEffect, useState } from 'react';
+import { type RemoteParticipant, RoomEvent } from 'livekit-client';
+import { useRoomContext } from '@livekit/components-react';
+
+// Must match CART_TOPIC in backend/src/cart_channel.py
+const CART_TOPIC = 'cart';
+
+export interface CartItem {
+  product_id: string;
+  name: string;
+  quantity: number;
+  price: number;
+  currency: string;
+  item_total: number;
+  size?: string | null;
+}
+
+export interface Cart {
+  items: CartItem[];
+  total: number;
+  currency: string;
+}
+
+export interface Order {
+  id: string;
+  line_items: {
+    product_id: string;
+    product_name: string;
+    quantity: number;
+    size?: string | null;
+    total: number;
+  }[];
+  total: number;
+  currency: string;
+}
+
+const EMPTY_CART: Cart = { items: [], total: 0, currency: 'INR' };
+
+/**
+ * The agent's cart for this room. The agent publishes the cart on every
+ * change, whoever made it, and the cart actions here are RPCs to the agent,
+ * so there is no copy of the cart to keep in sync.
+ */
+export function useCart() {
+  const room = useRoomContext();
+  const [cart, setCart] = useState<Cart>(EMPTY_CART);
+  const [lastOrder, setLastOrder] = useState<Order | null>(null);
+
+  useEffect(() => {
+    // Latest message version applied, per sender
+    const versions = new Map<string, number>();
+    const decoder = new TextDecoder();
+
+    function onData(
+      payload: Uint8Array,
+      participant?: RemoteParticipant,
+      _kind?: unknown,
+      topic?: string
+    ) {
+      if (topic !== CART_TOPIC) return;
+      const message = JSON.parse(decoder.decode(payload));
+      const sender = participant?.identity ?? '';
+      if (message.version <= (versions.get(sender) ?? 0)) return;
+      versions.set(sender, message.version);
+
+      if (message.type === 'cart') {
+        setCart(message.cart);
+      } else if (message.type === 'order') {
+        setLastOrder(message.order);
+      }
+    }
+
+    room.on(RoomEvent.DataReceived, onData);
+    return () => {
+      room.off(RoomEvent.DataReceived, onData);
+    };
+  }, [room]);
+
+  const call = useCallback(
+    async (method: string, args: Record<string, unknown> = {}) => {
+      const agent = Array.from(room.remoteParticipants.values()).find((p) => p.isAgent);
+      if (!agent) {
+        throw new Error('The shop assistant is not connected');
+      }
+      const response = await room.localParticipant.performRpc({
+        destinationIdentity: agent.identity,
+        method,
+        payload: JSON.stringify(args),
+      });
+      return JSON.parse(response);
+    },
+    [room]
+  );
+
+  const addItem = useCallback(
+    (productId: string, quantity = 1, size?: string) =>
+      call('cart.add', { product_id: productId, quantity, size }) as Promise<Cart>,
+    [call]
+  );
+  const removeItem = useCallback(
+    (productId: string) => call('cart.remove', { product_id: productId }) as Promise<Cart>,
+    [call]
+  );
+  const checkout = useCallback(() => call('cart.checkout') as Promise<Order>, [call]);
+
+  return { cart, lastOrder, addItem, removeItem, checkout };
+}
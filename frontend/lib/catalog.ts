@@ -0,0 +1,31 @@
+import { readFile, stat } from 'fs/promises';
+import { join } from 'path';
+
+// Shared with the Python agent, which memory-maps a compiled copy of it
+const CATALOG_FILE = join(process.cwd(), '..', 'shared-data', 'catalog.json');
+
+export interface Product {
+  id: string;
+  name: string;
+  description: string;
+  price: number;
+  currency: string;
+  category: string;
+  color?: string;
+  size?: string[];
+  stock?: number;
+  image?: string;
+  highlights?: string;
+}
+
+let cached: { mtimeMs: number; products: Product[] } | null = null;
+
+// Load the catalog, re-reading the file only when it has changed
+export async function loadCatalog(): Promise<Product[]> {
+  const { mtimeMs } = await stat(CATALOG_FILE);
+  if (!cached || cached.mtimeMs !== mtimeMs) {
+    const data = JSON.parse(await readFile(CATALOG_FILE, 'utf-8'));
+    cached = { mtimeMs, products: data.products };
+  }
+  return cached.products;
+}